@@ -3,20 +3,47 @@ skills_summarize_agent: extract reusable SKILL.md from agent execution logs.
 
 SDK:
 - summarize_skills_from_log: main entry; summarize from a log file (JSONL).
-- SkillSummarizerAgent: low-level agent with read_file / write_file / list_dir tools.
+- summarize_skills_from_logs: batch entry; summarize many logs with bounded parallelism.
+- summarize_skills_map_reduce: shard a large log, extract candidates in parallel, merge and write.
+- summarize_workflow_clusters: mine repeated workflows across logs, summarize one run per workflow.
+- SkillSummarizerAgent: low-level agent with read_file / write_file / list_dir / search_log / find_similar_skills tools.
 
 Output follows the summarizing-new-skills spec (see SKILL.md).
 """
-from .skill_summarizer_agent import (
-    SkillSummarizerAgent,
-    summarize_skills_from_log,
-)
+import importlib
+from typing import Any
+
+# Exports are imported on first use, so light submodules (e.g. the daemon client) can be
+# run without loading the OpenAI SDK.
+_EXPORTS = {
+    "SkillSummarizerAgent": ".skill_summarizer_agent",
+    "summarize_skills_from_log": ".skill_summarizer_agent",
+    "summarize_skills_from_logs": ".batch",
+    "summarize_skills_map_reduce": ".mapreduce",
+    "summarize_workflow_clusters": ".mining",
+}
 
 # Backward compatibility
-extract_skills_from_agent_log = summarize_skills_from_log
+_ALIASES = {"extract_skills_from_agent_log": "summarize_skills_from_log"}
 
 __all__ = [
     "SkillSummarizerAgent",
     "summarize_skills_from_log",
+    "summarize_skills_from_logs",
+    "summarize_skills_map_reduce",
+    "summarize_workflow_clusters",
     "extract_skills_from_agent_log",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    target = _ALIASES.get(name, name)
+    if target not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[target], __name__), target)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,161 @@
+"""
+Batch mode: summarize many logs with bounded parallelism.
+
+- collect_logs: expand a directory + glob pattern into a sorted list of log files.
+- summarize_skills_from_logs: fan logs out over a thread pool sharing one OpenAI client
+  (its HTTP connection pool is thread-safe), with a configurable concurrency limit.
+
+With triage enabled, every log is first scored locally (triage.py, sequentially and in
+order, so duplicate tasks are dropped deterministically); only logs marked "process"
+reach the pool. Each worker runs summarize_skills_from_log; concurrent writes into output_root are kept
+consistent by write_file (atomic rename + per-run skill-directory claims).
+"""
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from openai import OpenAI
+
+from .config import TRIAGE_CONFIG
+from .history import HistoryPolicy
+from .skill_summarizer_agent import build_openai_client, summarize_skills_from_log
+from .triage import triage_log
+
+DEFAULT_CONCURRENCY = 4
+
+
+def collect_logs(log_dir: str, pattern: str = "*", recursive: bool = False) -> List[str]:
+    """Return sorted absolute paths of files in log_dir matching pattern (e.g. "*.jsonl")."""
+    root = os.path.abspath(log_dir)
+    if recursive:
+        matches = glob.glob(os.path.join(root, "**", pattern), recursive=True)
+    else:
+        matches = glob.glob(os.path.join(root, pattern))
+    return sorted(p for p in matches if os.path.isfile(p))
+
+
+def summarize_skills_from_logs(
+    log_paths: List[str],
+    project_root: Optional[str] = None,
+    output_root: Optional[str] = None,
+    last_n: Optional[int] = None,
+    digest: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    llm_client: Optional[OpenAI] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    history_policy: Union[str, HistoryPolicy, None] = None,
+    triage: Optional[bool] = None,
+    min_score: Optional[float] = None,
+    budget: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    SDK entry point for batch runs: summarize skills from several logs concurrently.
+
+    Args:
+        log_paths: Log files (relative to project_root or absolute).
+        project_root: Root for reading; defaults to current working directory.
+        output_root: Shared root for generated SKILLs; defaults to package default.
+        last_n: Use only the last N lines of each log; None = use all.
+        digest: Send pre-digested logs instead of raw lines (see digest.py).
+        concurrency: Maximum logs processed at the same time.
+        llm_client: Shared OpenAI-compatible client; built once from OPENAI_CONFIG if None.
+        on_result: Optional callback invoked (from worker threads) with each per-log result.
+        history_policy: Context-window policy for each agent run (see history.py).
+        triage: Score logs locally first and skip the unpromising ones (see triage.py);
+            default TRIAGE_CONFIG["enabled"].
+        min_score: Triage threshold; default TRIAGE_CONFIG["min_score"].
+        budget: Limits of each agent run (see SkillSummarizerAgent); default BUDGET_CONFIG.
+
+    Returns:
+        {"success": bool, "results": list[dict], "succeeded": int, "failed": int,
+         "skipped": int, "elapsed": float, "writes": {"written", "skipped", "bytes"}}
+        Each per-log result: {"log_path", "success", "elapsed", "tool_calls",
+        "final_response", "history", "writes", "budget", "stopped", "error"}, in the order
+        of log_paths; with triage also "triage" (see triage.triage_log) and "skipped" (True
+        for logs not sent).
+    """
+    project_root = os.path.abspath(project_root or os.getcwd())
+    client = llm_client or build_openai_client()
+    started = time.perf_counter()
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(log_paths)
+    verdicts: Dict[int, Dict[str, Any]] = {}
+    if TRIAGE_CONFIG["enabled"] if triage is None else triage:
+        seen: set = set()
+        for i, log_path in enumerate(log_paths):
+            t0 = time.perf_counter()
+            abs_log = log_path if os.path.isabs(log_path) else os.path.join(project_root, log_path)
+            verdicts[i] = triage_log(abs_log, seen=seen, min_score=min_score)
+            if verdicts[i]["decision"] == "skip":
+                results[i] = {
+                    "log_path": log_path,
+                    "success": True,
+                    "skipped": True,
+                    "elapsed": time.perf_counter() - t0,
+                    "tool_calls": 0,
+                    "final_response": None,
+                    "history": None,
+                    "error": None,
+                    "triage": verdicts[i],
+                }
+                if on_result is not None:
+                    on_result(results[i])
+
+    def work(index: int, log_path: str) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            result = summarize_skills_from_log(
+                log_path=log_path,
+                project_root=project_root,
+                output_root=output_root,
+                last_n=last_n,
+                digest=digest,
+                llm_client=client,
+                history_policy=history_policy,
+                triage=False,
+                budget=budget,
+            )
+            error = result.get("error")
+        except Exception as e:
+            result = {"success": False, "tool_calls": [], "final_response": None}
+            error = f"{type(e).__name__}: {e}"
+        item = {
+            "log_path": log_path,
+            "success": bool(result.get("success")),
+            "elapsed": time.perf_counter() - t0,
+            "tool_calls": len(result.get("tool_calls", [])),
+            "final_response": result.get("final_response"),
+            "history": result.get("history"),
+            "writes": result.get("writes"),
+            "budget": result.get("budget"),
+            "stopped": result.get("stopped"),
+            "error": error,
+        }
+        if index in verdicts:
+            item.update(skipped=False, triage=verdicts[index])
+        if on_result is not None:
+            on_result(item)
+        return item
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(work, i, p): i for i, p in enumerate(log_paths) if results[i] is None}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    skipped = sum(1 for r in results if r and r.get("skipped"))
+    failed = sum(1 for r in results if not (r and r["success"]))
+    writes = {"written": 0, "skipped": 0, "bytes": 0}
+    for r in results:
+        for key in writes:
+            writes[key] += ((r or {}).get("writes") or {}).get(key, 0)
+    return {
+        "success": failed == 0,
+        "results": results,
+        "succeeded": len(log_paths) - failed - skipped,
+        "failed": failed,
+        "skipped": skipped,
+        "elapsed": time.perf_counter() - started,
+        "writes": writes,
+    }
@@ -0,0 +1,20 @@
+"""
+Offline benchmark suite: no network, deterministic inputs.
+
+- ScriptedLLMClient: fake OpenAI-compatible client replaying scripted tool-call turns.
+- generate_log: synthetic example1/example2-shaped logs from KB to GB.
+- run_benchmarks / compare: ingestion, tool and end-to-end agent metrics (wall time,
+  peak RSS, payload bytes per turn) checked against a stored baseline.
+
+Run: python -m skills_summarize_agent.bench [--save_baseline]
+"""
+from .fake_llm import ScriptedLLMClient
+from .runner import compare, run_benchmarks
+from .synth import generate_log
+
+__all__ = [
+    "ScriptedLLMClient",
+    "generate_log",
+    "run_benchmarks",
+    "compare",
+]
@@ -0,0 +1,90 @@
+"""
+Offline benchmark entry point (no network; the LLM is scripted).
+
+Usage:
+  python -m skills_summarize_agent.bench
+  python -m skills_summarize_agent.bench --sizes 64KB,16MB,1GB --shapes example1,example2
+  python -m skills_summarize_agent.bench --save_baseline
+  python -m skills_summarize_agent.bench --baseline .bench/baseline.json --tolerance 0.2
+
+Exits with status 1 when a metric regressed beyond the tolerance against the baseline.
+"""
+import argparse
+import json
+import os
+import sys
+
+from .runner import CASES, compare, run_benchmarks
+from .synth import SHAPES, parse_size
+
+
+def _fmt(name, value):
+    if name.endswith("_seconds"):
+        return f"{value * 1000:.2f}ms"
+    if name.endswith("_bytes"):
+        return f"{value / 1024:.1f}KB"
+    if name.endswith("_rss_kb"):
+        return f"{value / 1024:.1f}MB"
+    return f"{value:g}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for log ingestion, tools and the agent loop.")
+    parser.add_argument("--sizes", type=str, default="256KB,16MB", help="Comma-separated log sizes (KB/MB/GB); default: 256KB,16MB.")
+    parser.add_argument("--shapes", type=str, default=",".join(SHAPES), help=f"Comma-separated log shapes ({', '.join(SHAPES)}).")
+    parser.add_argument("--cases", type=str, default=",".join(CASES), help=f"Comma-separated cases ({', '.join(CASES)}).")
+    parser.add_argument("--data_dir", type=str, default=os.path.join(".bench", "data"), help="Cache for generated logs; default: .bench/data.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic logs.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement (best is kept); default: 3.")
+    parser.add_argument("--baseline", type=str, default=os.path.join(".bench", "baseline.json"), help="Baseline results file; default: .bench/baseline.json.")
+    parser.add_argument("--save_baseline", action="store_true", help="Write this run's results to --baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative increase before a metric counts as a regression; default: 0.25.")
+    parser.add_argument("--output", type=str, default=None, help="Also write this run's results (JSON) here.")
+    parser.add_argument("--no_isolate", action="store_true", help="Run cases in this process (faster; peak RSS becomes cumulative).")
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+
+    def report(prefix, metrics):
+        print(f"[{prefix}] " + ", ".join(f"{k}={_fmt(k, v)}" for k, v in metrics.items()))
+
+    results = run_benchmarks(
+        sizes, shapes, os.path.abspath(args.data_dir), cases=cases, seed=args.seed,
+        repeat=args.repeat, isolate=not args.no_isolate, on_case=report,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"\n[INFO] Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.isfile(args.baseline):
+        print(f"\n[INFO] No baseline at {args.baseline}; run with --save_baseline to create one.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results["metrics"], baseline["metrics"], tolerance=args.tolerance)
+    regressions = [r for r in rows if r["regression"]]
+    print(f"\nCompared {len(rows)} metric(s) against {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(
+            f"  {r['metric']:<60} {_fmt(r['metric'], r['baseline']):>12} -> "
+            f"{_fmt(r['metric'], r['current']):>12} {r['change']:+7.1%} {flag}"
+        )
+    if regressions:
+        print(f"\n[FAIL] {len(regressions)} regression(s).")
+        return 1
+    print("\n[OK] No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
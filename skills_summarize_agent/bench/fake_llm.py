@@ -0,0 +1,97 @@
+"""
+Deterministic, scripted stand-in for an OpenAI-compatible client (no network).
+
+ScriptedLLMClient replays a fixed list of turns. Each turn is either a list of
+(tool_name, arguments) calls or the final text. Streaming requests are answered with
+chunked deltas. Every request's messages payload size is recorded, so benchmarks can
+report bytes sent per turn.
+"""
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+Turn = Union[str, Sequence[Tuple[str, Dict[str, Any]]]]
+
+
+class _Completions:
+    def __init__(self, owner: "ScriptedLLMClient"):
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner._create(kwargs)
+
+
+class ScriptedLLMClient:
+    """Replays script turns in order; after the last turn every call returns the final text."""
+
+    def __init__(self, script: List[Turn], latency: float = 0.0, chunk_chars: int = 256):
+        """
+        Args:
+            script: Turns to replay (tool-call lists, then a final string).
+            latency: Simulated seconds per completion (split across chunks when streaming).
+            chunk_chars: Argument/content characters per streamed delta.
+        """
+        self.script = list(script)
+        self.latency = latency
+        self.chunk_chars = max(1, chunk_chars)
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _create(self, kwargs: Dict[str, Any]) -> Any:
+        payload = len(json.dumps(kwargs.get("messages", []), ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            turn = len(self.requests)
+            self.requests.append({"turn": turn + 1, "messages": len(kwargs.get("messages", [])), "payload_bytes": payload})
+        step = self.script[turn] if turn < len(self.script) else self._final()
+        usage = SimpleNamespace(
+            prompt_tokens=payload // 4,
+            completion_tokens=len(json.dumps(step)) // 4,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+        )
+        if kwargs.get("stream"):
+            return self._stream(turn, step, usage)
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(step, str):
+            message = SimpleNamespace(content=step, tool_calls=None)
+        else:
+            message = SimpleNamespace(content="", tool_calls=[
+                SimpleNamespace(
+                    id=f"call_{turn}_{i}",
+                    type="function",
+                    function=SimpleNamespace(name=name, arguments=json.dumps(args, ensure_ascii=False)),
+                )
+                for i, (name, args) in enumerate(step)
+            ])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+    def _final(self) -> str:
+        last = self.script[-1] if self.script else "Done."
+        return last if isinstance(last, str) else "Done."
+
+    def _stream(self, turn: int, step: Turn, usage: Any):
+        def chunk(content: Any = None, tool_calls: Any = None) -> Any:
+            delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+            return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+
+        pieces: List[Any] = []
+        if isinstance(step, str):
+            for j in range(0, len(step), self.chunk_chars):
+                pieces.append(chunk(content=step[j:j + self.chunk_chars]))
+        else:
+            for i, (name, args) in enumerate(step):
+                raw = json.dumps(args, ensure_ascii=False)
+                head = SimpleNamespace(index=i, id=f"call_{turn}_{i}", function=SimpleNamespace(name=name, arguments=""))
+                pieces.append(chunk(tool_calls=[head]))
+                for j in range(0, len(raw), self.chunk_chars):
+                    part = SimpleNamespace(index=i, id=None, function=SimpleNamespace(name=None, arguments=raw[j:j + self.chunk_chars]))
+                    pieces.append(chunk(tool_calls=[part]))
+        delay = self.latency / max(1, len(pieces))
+        for piece in pieces:
+            if delay:
+                time.sleep(delay)
+            yield piece
+        yield SimpleNamespace(choices=[], usage=usage)
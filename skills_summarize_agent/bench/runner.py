@@ -0,0 +1,250 @@
+"""
+Benchmark cases and baseline comparison.
+
+For each (shape, size) log the suite measures:
+- ingest: count_lines, seek_last_lines, log_window and digest_log wall time;
+- tools: ranged read_file (lines and bytes) and search_log latency;
+- agent: an end-to-end summarize_skills_from_log run against ScriptedLLMClient: wall
+  time, turns, tool time and messages payload bytes (total and largest turn).
+
+Each case runs in a fresh child process (unless isolate=False), so its peak RSS can be
+reported. Metrics are flat {"<shape>/<size>/<case>/<metric>": number}; lower is better
+for all of them.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .. import tools as file_tools
+from ..digest import digest_log
+from ..ingest import count_lines, log_window, seek_last_lines
+from ..skill_summarizer_agent import summarize_skills_from_log
+from .fake_llm import ScriptedLLMClient
+from .synth import ensure_log
+
+CASES = ("ingest", "tools", "agent")
+
+# Noise floor of a metric: changes smaller than these absolute amounts, or than
+# _MIN_DELTA_FRACTION of the baseline when that is smaller (sub-millisecond timings),
+# are never reported as regressions.
+_MIN_DELTA = {"_seconds": 0.005, "_bytes": 4096, "_rss_kb": 4096}
+_MIN_DELTA_FRACTION = 0.5
+
+_SKILL_MD = """---
+name: bench-average-ratings
+description: Computes the average rating of a scraped list of films. Use when asked to 'average these ratings'.
+---
+
+# Average ratings
+
+1. Collect the ratings from the list page.
+2. Sum them and divide by the count; round as requested.
+""" + "\n".join(f"- Detail line {i}: keep the raw values for verification." for i in range(60))
+
+_SCRIPT_PY = "import sys\n\nvalues = [float(v) for v in sys.argv[1:]]\nprint(round(sum(values) / len(values), 2))\n"
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _mean(fn: Callable[[int], Any], count: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - t0) / count
+
+
+def agent_script(log_path: str) -> List[Any]:
+    """Scripted turns for the agent case: search, ranged reads, duplicate check, two writes."""
+    return [
+        [
+            ("search_log", {"file_path": log_path, "pattern": "average|rating", "max_results": 10}),
+            ("read_file", {"file_path": log_path, "offset": 0, "limit": 20}),
+        ],
+        [
+            ("read_file", {"file_path": log_path, "offset": 0, "limit": 65536, "unit": "bytes"}),
+            ("find_similar_skills", {"query": "computing average ratings from a scraped film list"}),
+        ],
+        [
+            ("write_file", {"file_path": "bench-average-ratings/SKILL.md", "content": _SKILL_MD}),
+            ("write_file", {"file_path": "bench-average-ratings/scripts/average.py", "content": _SCRIPT_PY}),
+        ],
+        "Wrote 1 skill: bench-average-ratings.",
+    ]
+
+
+def bench_ingest(log_path: str, repeat: int) -> Dict[str, float]:
+    return {
+        "count_lines_seconds": _best(lambda: count_lines(log_path), repeat),
+        "seek_last_lines_seconds": _best(lambda: seek_last_lines(log_path, 100), repeat),
+        "log_window_seconds": _best(lambda: log_window(log_path), repeat),
+        "digest_seconds": _best(lambda: digest_log(log_path), repeat),
+    }
+
+
+def bench_tools(log_path: str, repeat: int) -> Dict[str, float]:
+    roots = [os.path.dirname(log_path)]
+    size = os.path.getsize(log_path)
+    lines = count_lines(log_path)
+    rng = random.Random(0)
+    line_offsets = [rng.randrange(max(1, lines)) for _ in range(20)]
+    byte_offsets = [rng.randrange(max(1, size)) for _ in range(20)]
+    cache = file_tools.FileReadCache()
+    try:
+        # The first ranged read builds the line index; it is reported separately.
+        first = _best(lambda: file_tools.read_file(log_path, roots, offset=lines // 2, limit=50, cache=file_tools.FileReadCache()), 1)
+        return {
+            "read_file_first_seconds": first,
+            "read_file_lines_seconds": _mean(
+                lambda i: file_tools.read_file(log_path, roots, offset=line_offsets[i], limit=50, cache=cache), 20
+            ),
+            "read_file_bytes_seconds": _mean(
+                lambda i: file_tools.read_file(log_path, roots, offset=byte_offsets[i], limit=16384, unit="bytes", cache=cache), 20
+            ),
+            "search_log_seconds": _best(
+                lambda: file_tools.search_log(log_path, roots, pattern="average|rating", max_results=20), repeat
+            ),
+        }
+    finally:
+        cache.close()
+
+
+def bench_agent(log_path: str, repeat: int) -> Dict[str, float]:
+    best: Dict[str, float] = {}
+    for _ in range(max(1, repeat)):
+        output_root = tempfile.mkdtemp(prefix="bench-skills-")
+        try:
+            client = ScriptedLLMClient(agent_script(log_path))
+            t0 = time.perf_counter()
+            result = summarize_skills_from_log(
+                log_path,
+                project_root=os.path.dirname(log_path),
+                output_root=output_root,
+                llm_client=client,
+                trace=True,
+            )
+            elapsed = time.perf_counter() - t0
+        finally:
+            shutil.rmtree(output_root, ignore_errors=True)
+        if not result["success"]:
+            raise RuntimeError(f"Scripted agent run failed: {result.get('final_response')}")
+        payloads = [r["payload_bytes"] for r in client.requests]
+        totals = result["trace"]["totals"]
+        run = {
+            "e2e_seconds": elapsed,
+            "tool_seconds": totals["tool_seconds"],
+            "turns": totals["turns"],
+            "payload_bytes": sum(payloads),
+            "payload_max_turn_bytes": max(payloads),
+        }
+        best = run if not best or run["e2e_seconds"] < best["e2e_seconds"] else best
+    return best
+
+
+_BENCHES = {"ingest": bench_ingest, "tools": bench_tools, "agent": bench_agent}
+
+
+def run_case(case: str, log_path: str, repeat: int) -> Dict[str, float]:
+    """Run one case in this process; adds peak_rss_kb when available."""
+    metrics = _BENCHES[case](log_path, repeat)
+    rss = _peak_rss_kb()
+    if rss is not None:
+        metrics["peak_rss_kb"] = rss
+    return metrics
+
+
+def run_benchmarks(
+    sizes: List[int],
+    shapes: List[str],
+    data_dir: str,
+    cases: Optional[List[str]] = None,
+    seed: int = 0,
+    repeat: int = 3,
+    isolate: bool = True,
+    on_case: Optional[Callable[[str, Dict[str, float]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Generate (or reuse) synthetic logs and run the benchmark cases on each.
+
+    Cases on logs above 256 MB run once regardless of repeat.
+
+    Returns:
+        {"meta": dict, "metrics": dict[str, float]}
+    """
+    metrics: Dict[str, float] = {}
+    started = time.perf_counter()
+    for shape in shapes:
+        for size in sizes:
+            log_path = ensure_log(data_dir, shape, size, seed)
+            reps = 1 if size > (256 << 20) else repeat
+            for case in cases or CASES:
+                if isolate:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                        result = pool.submit(run_case, case, log_path, reps).result()
+                else:
+                    result = run_case(case, log_path, reps)
+                prefix = f"{shape}/{size}/{case}"
+                if on_case is not None:
+                    on_case(prefix, result)
+                metrics.update({f"{prefix}/{k}": v for k, v in result.items()})
+    meta = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "sizes": sizes,
+        "shapes": shapes,
+        "seed": seed,
+        "isolate": isolate,
+        "elapsed_seconds": time.perf_counter() - started,
+        "created": time.time(),
+    }
+    return {"meta": meta, "metrics": metrics}
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Compare metrics present in both runs.
+
+    Returns one row per metric: {"metric", "baseline", "current", "change", "regression"}.
+    A regression is an increase above baseline * (1 + tolerance) that is also larger than
+    the metric's noise floor: its _MIN_DELTA amount, capped at _MIN_DELTA_FRACTION of the
+    baseline so that small metrics can still regress.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        base, cur = baseline[name], current[name]
+        change = (cur - base) / base if base else 0.0
+        floor = next((v for suffix, v in _MIN_DELTA.items() if name.endswith(suffix)), 0)
+        if base > 0:
+            floor = min(floor, base * _MIN_DELTA_FRACTION)
+        rows.append({
+            "metric": name,
+            "baseline": base,
+            "current": cur,
+            "change": change,
+            "regression": cur > base * (1 + tolerance) and cur - base > floor,
+        })
+    return rows
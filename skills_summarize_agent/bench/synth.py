@@ -0,0 +1,145 @@
+"""
+Synthetic agent logs shaped like the bundled samples, at any size from KB to GB.
+
+- "example1": JSONL of single agent runs (query, api_call_history, collected_info_sources),
+  like data/example1.
+- "example2": JSONL of multi-agent task transcripts (task, conversation with long,
+  repetitive planner prompts and tool outputs), like data/example2 but one task per line.
+
+Generation is deterministic for a given (shape, target_bytes, seed) and streams to disk, so
+memory use does not depend on the target size.
+"""
+import json
+import os
+import random
+from typing import Any, Dict
+
+SHAPES = ("example1", "example2")
+
+_WORDS = (
+    "rating film average douban list page score movie box office revenue director year "
+    "genre release top ranked calculate result source search query api endpoint data "
+    "value field response summary verify step answer total count decimal round table"
+).split()
+_ENDPOINTS = ("movie/search_movie", "movie/get_movie_info", "finance/get_price", "web/search", "music/get_artist")
+_ROLES = ("Orchestrator", "WebSurfer", "Coder", "ComputerTerminal", "FileSurfer")
+_TEAM = (
+    "To answer this request we have assembled the following team:\n\n"
+    "Assistant: An agent that provides assistance with ability to use tools.\n"
+    "WebSurfer: A helpful assistant with access to a web browser. Ask them to perform web searches, open pages, "
+    "and interact with content (e.g., clicking links, scrolling the viewport, filling in form fields, etc.).\n"
+    "FileSurfer: An agent that can handle local files.\n"
+    "Coder: A helpful and general-purpose AI assistant that has strong language skills, Python skills, and Linux "
+    "command line skills.\n"
+    "ComputerTerminal: A computer terminal that performs no other action than running Python scripts."
+)
+
+
+def parse_size(text: str) -> int:
+    """Parse "64KB", "16MB", "1GB" or a plain byte count."""
+    text = text.strip().upper()
+    for suffix, factor in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[: -len(suffix)]) * factor)
+    return int(text)
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n))
+
+
+def _example1_record(rng: random.Random, i: int) -> Dict[str, Any]:
+    query = f"What is the {_sentence(rng, 6)} of item {i % 997}?"
+    calls = rng.randint(2, 6)
+    history = []
+    sources = []
+    for k in range(calls):
+        endpoint = rng.choice(_ENDPOINTS)
+        params = {"query": _sentence(rng, 2)}
+        history.append({"iteration": k + 1, "endpoint": endpoint, "params": params})
+        sources.append({"source": endpoint, "params": params, "data_preview": _sentence(rng, 45)[:300]})
+    return {
+        "timestamp": f"2025-08-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00.000000",
+        "group_id": f"group-{i % 50:04d}",
+        "fact_question": query,
+        "mode": "procedural_memory_agent",
+        "procedural_key_mode": "task",
+        "memory_hits": [],
+        "procedural_memory_hits": [],
+        "crag_agent_log": {
+            "query": query,
+            "domain": None,
+            "procedural_guidance": None,
+            "api_call_history": history,
+            "collected_info_sources": sources,
+            "iterations_used": calls,
+            "info_sufficient": rng.random() > 0.2,
+            "confidence": round(rng.random(), 2),
+        },
+    }
+
+
+def _example2_record(rng: random.Random, i: int) -> Dict[str, Any]:
+    task = f"What is the {_sentence(rng, 8)} (task {i})? Please calculate to two decimal places."
+    conversation = [
+        {"timestamp": f"2025-08-25T00:{i % 60:02d}:00", "sender": "Unknown", "content": task, "role": "Unknown"},
+        {
+            "timestamp": f"2025-08-25T00:{i % 60:02d}:01",
+            "sender": "Unknown",
+            "content": f"\nWe are working to address the following user request:\n\n{task}\n\n{_TEAM}\n",
+            "role": "Unknown",
+        },
+    ]
+    for k in range(rng.randint(6, 14)):
+        role = rng.choice(_ROLES)
+        body = _sentence(rng, rng.choice((20, 40, 400)))
+        conversation.append({
+            "timestamp": f"2025-08-25T00:{i % 60:02d}:{k + 2:02d}",
+            "sender": role,
+            "content": f"{role} step {k + 1}: {body}",
+            "role": role,
+        })
+    return {
+        "task_id": f"task{i}",
+        "task_name": f"task{i}",
+        "task": task,
+        "repeat_index": 1 + i % 3,
+        "start_time": "2025-08-25T00:56:28.976857",
+        "conversation": conversation,
+        "status": "completed" if rng.random() > 0.1 else "failed",
+        "end_time": "2025-08-25T01:02:30.624839",
+        "final_result": f"{rng.random() * 10:.2f}",
+    }
+
+
+def generate_log(path: str, shape: str = "example1", target_bytes: int = 1 << 20, seed: int = 0) -> Dict[str, Any]:
+    """
+    Write a synthetic JSONL log of about target_bytes (at least one record) to path.
+
+    Returns:
+        {"path": str, "shape": str, "records": int, "bytes": int}
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown log shape: {shape} (use one of {', '.join(SHAPES)})")
+    make = _example1_record if shape == "example1" else _example2_record
+    rng = random.Random(f"{shape}:{seed}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+    records = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        while written < target_bytes or records == 0:
+            line = json.dumps(make(rng, records), ensure_ascii=False) + "\n"
+            f.write(line)
+            written += len(line.encode("utf-8"))
+            records += 1
+    os.replace(tmp_path, path)
+    return {"path": os.path.abspath(path), "shape": shape, "records": records, "bytes": written}
+
+
+def ensure_log(data_dir: str, shape: str, target_bytes: int, seed: int = 0) -> str:
+    """Path of the cached synthetic log for (shape, target_bytes, seed), generating it if missing."""
+    path = os.path.join(data_dir, f"{shape}-{target_bytes}-{seed}.jsonl")
+    if not os.path.isfile(path):
+        generate_log(path, shape=shape, target_bytes=target_bytes, seed=seed)
+    return path
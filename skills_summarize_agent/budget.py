@@ -0,0 +1,178 @@
+"""
+Per-run budgets for the agent loop: turns, wall-clock seconds, tokens and estimated cost.
+
+RunBudget is checked before every model request:
+- exhausted: a limit is reached; the loop stops and returns a partial result (the skills
+  written so far are kept) with the reason. A set cancel event also stops the loop, but
+  the run is then abandoned and its staged writes are dropped (e.g. a lost job lease).
+- closing: a limit is nudge_at used, or the next turn is projected to cross it (from the
+  time and tokens of the previous turn); the loop tells the model once to write what it
+  has and finish.
+
+Tokens are the provider-reported prompt + completion tokens, or estimates when a response
+carries no usage. Cost is estimated from per-million-token prices (BUDGET_CONFIG); it stays
+0 when no prices are set.
+
+Defaults come from BUDGET_CONFIG; configure_budget replaces them for the process (e.g. from
+CLI flags), and an agent's budget argument overrides them per agent.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .config import BUDGET_CONFIG
+
+NUDGE_MESSAGE = (
+    "Budget notice: this run is about to stop ({reason}). Do not explore further. Write the "
+    "SKILL.md files for the workflows you have already identified now (skip any you cannot "
+    "complete), then reply with a short summary."
+)
+
+
+class RunBudget:
+    """Limits and usage of one agent run; a limit of 0 or None is unlimited."""
+
+    def __init__(
+        self,
+        max_turns: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        input_price: Optional[float] = None,
+        output_price: Optional[float] = None,
+        nudge_at: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ):
+        """
+        Args:
+            max_turns: Model turns (counting turns of a resumed run).
+            max_seconds: Wall-clock seconds from start().
+            max_tokens: Prompt + completion tokens.
+            max_cost: Estimated cost, in the unit of the prices.
+            input_price / output_price: Price per million prompt / completion tokens;
+                default BUDGET_CONFIG.
+            nudge_at: Fraction of a budget after which the model is nudged to finish;
+                default BUDGET_CONFIG["nudge_at"].
+            cancel: Event that stops the run before its next turn ("cancelled").
+        """
+        self.max_turns = max_turns or 0
+        self.max_seconds = max_seconds or 0
+        self.max_tokens = max_tokens or 0
+        self.max_cost = max_cost or 0
+        self.input_price = input_price or 0
+        self.output_price = output_price or 0
+        self.nudge_at = BUDGET_CONFIG["nudge_at"] if nudge_at is None else nudge_at
+        self.cancel = cancel
+        self.start()
+
+    @classmethod
+    def from_defaults(
+        cls,
+        max_turns: Optional[int] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> "RunBudget":
+        """Budget from the process defaults (see configure_budget), with overrides (same keys) on top."""
+        with _defaults_lock:
+            limits = dict(_defaults)
+        limits.update((k, v) for k, v in (overrides or {}).items() if v is not None)
+        return cls(max_turns=max_turns, cancel=cancel, **limits)
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_turn_seconds = 0.0
+        self.last_turn_tokens = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self) -> float:
+        return (self.prompt_tokens * self.input_price + self.completion_tokens * self.output_price) / 1e6
+
+    def record(self, seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+        """Add one model turn (its duration includes the tool calls it made)."""
+        self.turns += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.last_turn_seconds = seconds
+        self.last_turn_tokens = prompt_tokens + completion_tokens
+
+    def _usage(self, turn: int):
+        """(name, used, limit, projected use after one more turn) of each set limit."""
+        last_cost = self.last_turn_tokens * max(self.input_price, self.output_price) / 1e6
+        limits = (
+            ("turns", turn, self.max_turns, turn + 1),
+            ("wall_clock", self.elapsed, self.max_seconds, self.elapsed + self.last_turn_seconds),
+            ("tokens", self.tokens, self.max_tokens, self.tokens + self.last_turn_tokens),
+            ("cost", self.cost, self.max_cost, self.cost + last_cost),
+        )
+        return [item for item in limits if item[2]]
+
+    def exhausted(self, turn: int) -> Optional[str]:
+        """Name of the first limit reached after turn completed turns ("cancelled" first), or None."""
+        if self.cancel is not None and self.cancel.is_set():
+            return "cancelled"
+        for name, used, limit, _ in self._usage(turn):
+            if used >= limit:
+                return name
+        return None
+
+    def closing(self, turn: int) -> Optional[str]:
+        """Why the run should wrap up before the next turn (e.g. "tokens 81% used"), or None."""
+        for name, used, limit, projected in self._usage(turn):
+            if name == "turns":
+                if projected >= limit:
+                    return "last turn"
+            elif used >= self.nudge_at * limit:
+                return f"{name.replace('_', '-')} budget {used / limit:.0%} used"
+            elif projected >= limit:
+                return f"{name.replace('_', '-')} budget would run out during the next turn"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Usage and limits, for the run result."""
+        return {
+            "turns": self.turns,
+            "seconds": round(self.elapsed, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(self.cost, 6),
+            "limits": {
+                "turns": self.max_turns or None,
+                "seconds": self.max_seconds or None,
+                "tokens": self.max_tokens or None,
+                "cost": self.max_cost or None,
+            },
+        }
+
+
+_defaults_lock = threading.Lock()
+_defaults: Dict[str, Any] = dict(BUDGET_CONFIG)
+
+
+def configure_budget(**limits: Optional[float]) -> Dict[str, Any]:
+    """
+    Set process-wide budget defaults for later runs (e.g. from CLI flags).
+
+    Args:
+        limits: BUDGET_CONFIG keys (max_seconds, max_tokens, max_cost, input_price,
+            output_price, nudge_at); None values are left unchanged.
+
+    Returns:
+        The new defaults.
+    """
+    unknown = set(limits) - set(BUDGET_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown budget setting(s): {', '.join(sorted(unknown))}")
+    with _defaults_lock:
+        _defaults.update((k, v) for k, v in limits.items() if v is not None)
+        return dict(_defaults)
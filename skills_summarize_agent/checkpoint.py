@@ -0,0 +1,189 @@
+"""
+Per-log checkpoints for incremental summarization.
+
+A checkpoint records how far a log has been summarized: the byte offset, a file identity
+(device, inode) and a fingerprint of the processed prefix (SHA-256 of its first and last
+FINGERPRINT_WINDOW bytes), so resuming needs no re-read of already processed records.
+
+resolve_resume detects appends, truncation and rotation (new inode at the same path); on
+rotation it looks for the old file under a rotated name (e.g. log.1) so its unprocessed
+tail is not lost. Offsets of a compressed log are positions in its decompressed content.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from .compressed import detect_codec, log_size, open_log
+from .config import DEFAULT_CHECKPOINT_DIR
+
+FINGERPRINT_WINDOW = 4096
+
+
+def _window_hash(f, start: int, end: int) -> str:
+    f.seek(start)
+    return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def fingerprint(path: str, offset: int) -> Dict[str, Any]:
+    """
+    Identity and prefix fingerprint of path processed up to byte offset (of the
+    decompressed content, for a compressed log).
+
+    Returns:
+        {"device", "inode", "size", "offset", "head_hash", "tail_hash"}
+    """
+    st = os.stat(path)
+    head_end = min(offset, FINGERPRINT_WINDOW)
+    with open_log(path) as f:
+        head_hash = _window_hash(f, 0, head_end)
+        tail_hash = _window_hash(f, max(0, offset - FINGERPRINT_WINDOW), offset)
+    return {
+        "device": st.st_dev,
+        "inode": st.st_ino,
+        "size": st.st_size,
+        "offset": offset,
+        "head_hash": head_hash,
+        "tail_hash": tail_hash,
+    }
+
+
+def matches_prefix(path: str, checkpoint: Dict[str, Any]) -> bool:
+    """True when path still starts with the prefix described by checkpoint."""
+    offset = checkpoint["offset"]
+    try:
+        if log_size(path) < offset:
+            return False
+        current = fingerprint(path, offset)
+    except OSError:
+        return False
+    return current["head_hash"] == checkpoint["head_hash"] and current["tail_hash"] == checkpoint["tail_hash"]
+
+
+def find_rotated(path: str, checkpoint: Dict[str, Any]) -> Optional[str]:
+    """
+    Find the checkpointed file under a rotated name in its directory: same inode (e.g.
+    path.1), or a compressed copy whose content starts with the checkpointed prefix (e.g.
+    path.1.gz written by logrotate's compress).
+    """
+    directory = os.path.dirname(path) or "."
+    base = os.path.basename(path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return None
+    compressed = []
+    for name in sorted(names):
+        if name == base or not name.startswith(base + "."):
+            continue
+        candidate = os.path.join(directory, name)
+        try:
+            st = os.stat(candidate)
+            codec = detect_codec(candidate)
+        except OSError:
+            continue
+        if st.st_ino == checkpoint["inode"] and st.st_dev == checkpoint["device"]:
+            return candidate
+        if codec is not None:
+            compressed.append(candidate)
+    for candidate in compressed:
+        if matches_prefix(candidate, checkpoint):
+            return candidate
+    return None
+
+
+def resolve_resume(path: str, checkpoint: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Decide where to resume reading path.
+
+    Returns:
+        {"status": "new" | "resumed" | "truncated" | "rotated", "offset": int,
+         "rotated_path": str | None, "rotated_offset": int}
+        For "rotated", the unprocessed tail of rotated_path (from rotated_offset) should be
+        processed before path from offset 0.
+    """
+    result = {"status": "new", "offset": 0, "rotated_path": None, "rotated_offset": 0}
+    if not checkpoint:
+        return result
+    st = os.stat(path)
+    same_file = st.st_ino == checkpoint["inode"] and st.st_dev == checkpoint["device"]
+    if same_file and matches_prefix(path, checkpoint):
+        return dict(result, status="resumed", offset=checkpoint["offset"])
+    if same_file:
+        return dict(result, status="truncated")
+    rotated = find_rotated(path, checkpoint)
+    if rotated and matches_prefix(rotated, checkpoint):
+        return dict(result, status="rotated", rotated_path=rotated, rotated_offset=checkpoint["offset"])
+    if matches_prefix(path, checkpoint):
+        # Same content under a new inode (e.g. copied or rewritten in place by an editor).
+        return dict(result, status="resumed", offset=checkpoint["offset"])
+    return dict(result, status="rotated")
+
+
+class CheckpointStore:
+    """JSON checkpoint files, one per absolute log path, under a store directory."""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Store directory; default DEFAULT_CHECKPOINT_DIR (SKILL_SUMMARIZER_CHECKPOINT_DIR).
+        """
+        self.root = os.path.abspath(root or DEFAULT_CHECKPOINT_DIR)
+
+    def _path(self, log_path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(log_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key + ".json")
+
+    def load(self, log_path: str) -> Optional[Dict[str, Any]]:
+        """Return the checkpoint for log_path, or None if there is none."""
+        try:
+            with open(self._path(log_path), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(
+        self,
+        log_path: str,
+        offset: int,
+        lines: int = 0,
+        source: Optional[str] = None,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """
+        Fingerprint log_path up to offset and persist it atomically; returns the checkpoint.
+
+        source fingerprints a different file under log_path's key (the rotated copy of the
+        log while its tail is being drained).
+        """
+        checkpoint = fingerprint(source or log_path, offset)
+        checkpoint.update(extra, log_path=os.path.abspath(log_path), lines=lines, updated=time.time())
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=self.root)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, indent=1)
+        os.replace(tmp_path, self._path(log_path))
+        return checkpoint
+
+    def clear(self, log_path: str) -> None:
+        """Forget the checkpoint for log_path."""
+        try:
+            os.remove(self._path(log_path))
+        except FileNotFoundError:
+            pass
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All stored checkpoints."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.root, name), "r", encoding="utf-8") as f:
+                        out.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return out
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Thin client for the summarizer daemon (see daemon.py). Standard library only, so a job
+is submitted without loading the OpenAI SDK or the agent.
+
+Usage:
+  python -m skills_summarize_agent.client submit --log_path agent.jsonl
+  python -m skills_summarize_agent.client submit --log_path agent.jsonl --mode incremental --wait
+  python -m skills_summarize_agent.client status <job_id>
+  python -m skills_summarize_agent.client list
+  python -m skills_summarize_agent.client health
+  python -m skills_summarize_agent.client drain
+
+The daemon address comes from --socket / --port, else SKILL_SUMMARIZER_DAEMON_PORT (HTTP on
+127.0.0.1) or SKILL_SUMMARIZER_DAEMON_SOCKET (Unix socket; default: default_socket_path()).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+JOB_MODES = ("log", "incremental", "map_reduce")
+
+
+def default_socket_path() -> str:
+    """Per-user Unix socket path in the temp directory."""
+    uid = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+    return os.path.join(tempfile.gettempdir(), f"skill-summarizer-{uid}.sock")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """JSON-over-HTTP client for the daemon's job API (Unix socket or localhost TCP)."""
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None, timeout: float = 30.0):
+        env_port = int(os.getenv("SKILL_SUMMARIZER_DAEMON_PORT") or 0)
+        self.port = port if port is not None else env_port
+        self.socket_path = socket_path or os.getenv("SKILL_SUMMARIZER_DAEMON_SOCKET") or default_socket_path()
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if self.port:
+            conn: http.client.HTTPConnection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout)
+        else:
+            conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload is not None else {}
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise RuntimeError(data.get("error") or f"HTTP {response.status}")
+        return data
+
+    def submit(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job ({"log_path", "mode", ...}); returns {"id", "status", ...}."""
+        return self._request("POST", "/jobs", job)
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self) -> Dict[str, Any]:
+        return self._request("GET", "/jobs")
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/health")
+
+    def drain(self) -> Dict[str, Any]:
+        """Stop accepting jobs; the daemon exits once queued and running jobs are done."""
+        return self._request("POST", "/drain")
+
+    def wait(self, job_id: str, poll_interval: float = 0.5, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Poll status until the job is done, partial, failed or cancelled."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job["status"] in ("done", "partial", "failed", "cancelled"):
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                return job
+            time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit jobs to and query the skill summarizer daemon.")
+    parser.add_argument("--socket", type=str, default=None, help="Daemon Unix socket path.")
+    parser.add_argument("--port", type=int, default=None, help="Daemon HTTP port on 127.0.0.1 (instead of the socket).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", help="Queue a summarization job.")
+    submit.add_argument("--log_path", type=str, required=True, help="Log file (relative to --project_root or absolute).")
+    submit.add_argument("--project_root", type=str, default=None, help="Root for reading; default: current directory.")
+    submit.add_argument("--output_dir", type=str, default=None, help="Root for generated SKILLs; default: daemon default.")
+    submit.add_argument("--mode", type=str, choices=JOB_MODES, default="log", help="Job type; default: log.")
+    submit.add_argument("--last", type=int, default=None, help="Use only the last N lines (mode log / map_reduce).")
+    submit.add_argument("--digest", action="store_true", help="Send a compact pre-digested log.")
+    submit.add_argument("--priority", type=int, default=0, help="Lower runs first; default: 0.")
+    submit.add_argument("--wait", action="store_true", help="Wait for the job to finish and print its result.")
+
+    status = sub.add_parser("status", help="Show a job.")
+    status.add_argument("job_id", type=str)
+    sub.add_parser("list", help="List jobs.")
+    sub.add_parser("health", help="Daemon status and queue depth.")
+    sub.add_parser("drain", help="Finish queued jobs, then stop the daemon.")
+    args = parser.parse_args()
+
+    client = DaemonClient(socket_path=args.socket, port=args.port)
+    try:
+        if args.command == "submit":
+            job = client.submit({
+                "log_path": args.log_path,
+                "project_root": os.path.abspath(args.project_root or os.getcwd()),
+                "output_root": os.path.abspath(args.output_dir) if args.output_dir else None,
+                "mode": args.mode,
+                "last_n": args.last,
+                "digest": args.digest,
+                "priority": args.priority,
+            })
+            if args.wait:
+                job = client.wait(job["id"])
+        elif args.command == "status":
+            job = client.status(args.job_id)
+        elif args.command == "list":
+            job = client.jobs()
+        elif args.command == "health":
+            job = client.health()
+        else:
+            job = client.drain()
+    except (OSError, RuntimeError) as e:
+        print(f"[FAIL] {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(job, ensure_ascii=False, indent=1))
+    return 1 if job.get("status") == "failed" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
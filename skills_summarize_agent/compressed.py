@@ -0,0 +1,247 @@
+"""
+Transparent reading of compressed logs (gzip, xz, zstd).
+
+The codec is detected from the magic bytes at the start of the file, not from its name.
+- detect_codec: "gzip" | "xz" | "zstd" | None for plain files.
+- open_log: binary reader positioned at a byte offset; plain files are opened as-is,
+  compressed ones are decompressed as they are read. Nothing is written to disk.
+- log_size: size of the (decompressed) content.
+
+All offsets (record offsets, --last, read_file ranges, checkpoints) are positions in the
+decompressed stream. Archives made of several members or frames (bgzip, pzstd,
+concatenated .gz / .xz files) are indexed as they are read: the index maps member starts
+to compressed offsets and is kept per process, so a later seek (e.g. to the tail for
+--last, or a ranged read_file) decompresses from the nearest member instead of from the
+start of the file. Single-member archives have to be decompressed from the start.
+
+zstd needs the optional zstandard package (pip install zstandard), or Python 3.14+.
+"""
+import bisect
+import io
+import lzma
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+_CHUNK_SIZE = 64 * 1024
+_MAX_INDEXES = 256
+
+
+def detect_codec(path: str) -> Optional[str]:
+    """Codec of path from its magic bytes ("gzip", "xz", "zstd"), or None for a plain file."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, codec in _MAGIC:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _decompressor(codec: str) -> Callable[[], object]:
+    """Factory of one-member decompressors (objects with decompress, eof, unused_data)."""
+    if codec == "gzip":
+        return lambda: zlib.decompressobj(wbits=31)
+    if codec == "xz":
+        return lambda: lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    if _zstd is None:
+        raise OSError("zstd-compressed log: install the zstandard package to read it")
+    if _zstd.__name__ == "zstandard":
+        return lambda: _zstd.ZstdDecompressor().decompressobj()
+    return _zstd.ZstdDecompressor
+
+
+class _MemberIndex:
+    """Decompressed start -> compressed start of each member found so far, plus the total size once known."""
+
+    def __init__(self, stamp: Tuple[int, int]):
+        self.stamp = stamp
+        self.starts: List[int] = [0]
+        self.offsets: List[int] = [0]
+        self.size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def add(self, start: int, offset: int) -> None:
+        with self._lock:
+            if start > self.starts[-1]:
+                self.starts.append(start)
+                self.offsets.append(offset)
+
+    def nearest(self, target: int) -> Tuple[int, int]:
+        """(decompressed start, compressed offset) of the last known member starting at or before target."""
+        with self._lock:
+            i = bisect.bisect_right(self.starts, target) - 1
+            return self.starts[i], self.offsets[i]
+
+
+_indexes_lock = threading.Lock()
+_indexes: "OrderedDict[str, _MemberIndex]" = OrderedDict()
+
+
+def _member_index(path: str) -> _MemberIndex:
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None or index.stamp != stamp:
+            index = _MemberIndex(stamp)
+            _indexes[path] = index
+            if len(_indexes) > _MAX_INDEXES:
+                _indexes.popitem(last=False)
+        _indexes.move_to_end(path)
+        return index
+
+
+class _DecompressingReader(io.RawIOBase):
+    """Raw reader over the decompressed stream of a (possibly multi-member) archive."""
+
+    def __init__(self, path: str, codec: str):
+        self._file = open(path, "rb")
+        self._new = _decompressor(codec)
+        self._index = _member_index(path)
+        self._start_at(0, 0)
+
+    def _start_at(self, start: int, offset: int) -> None:
+        self._file.seek(offset)
+        self._cpos = offset
+        self._pos = start
+        self._buf = b""
+        self._bufpos = 0
+        self._dec = None
+        self._done = False
+
+    def _fill(self) -> None:
+        """Decompress the next chunk into _buf; sets _done at the end of the file."""
+        produced = self._pos + len(self._buf) - self._bufpos
+        out: List[bytes] = []
+        data = self._file.read(_CHUNK_SIZE)
+        if not data:
+            if self._dec is not None:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            self._done = True
+            self._index.size = produced
+            return
+        self._cpos += len(data)
+        while data:
+            if self._dec is None:
+                # Members may be separated by zero padding.
+                data = data.lstrip(b"\x00")
+                if not data:
+                    break
+                self._index.add(produced, self._cpos - len(data))
+                self._dec = self._new()
+            chunk = self._dec.decompress(data)
+            out.append(chunk)
+            produced += len(chunk)
+            data = b""
+            if self._dec.eof:
+                data = self._dec.unused_data
+                self._dec = None
+        self._buf = self._buf[self._bufpos:] + b"".join(out)
+        self._bufpos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while self._bufpos >= len(self._buf) and not self._done:
+            self._fill()
+        n = min(len(b), len(self._buf) - self._bufpos)
+        b[:n] = self._buf[self._bufpos:self._bufpos + n]
+        self._bufpos += n
+        self._pos += n
+        return n
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            if self._index.size is None:
+                self._skip(None)
+            offset += self._index.size
+        offset = max(0, offset)
+        start, compressed = self._index.nearest(offset)
+        if offset < self._pos or start > self._pos:
+            self._start_at(start, compressed)
+        self._skip(offset - self._pos)
+        return self._pos
+
+    def _skip(self, n: Optional[int]) -> None:
+        """Discard n decompressed bytes (None: up to the end of the file)."""
+        while n is None or n > 0:
+            if self._bufpos >= len(self._buf):
+                if self._done:
+                    return
+                self._fill()
+                continue
+            step = len(self._buf) - self._bufpos if n is None else min(n, len(self._buf) - self._bufpos)
+            self._bufpos += step
+            self._pos += step
+            if n is not None:
+                n -= step
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def open_log(path: str, start: int = 0) -> BinaryIO:
+    """
+    Open path for binary reading at byte offset start of its decompressed content.
+
+    Plain files are opened directly; compressed ones (see detect_codec) return a buffered,
+    seekable reader that decompresses on the fly.
+    """
+    codec = detect_codec(path)
+    if codec is None:
+        f = open(path, "rb")
+    else:
+        f = io.BufferedReader(_DecompressingReader(os.path.abspath(path), codec), _CHUNK_SIZE)
+    if start:
+        f.seek(start)
+    return f
+
+
+def log_size(path: str) -> int:
+    """Size of the decompressed content of path (its file size when plain)."""
+    if detect_codec(path) is None:
+        return os.path.getsize(path)
+    index = _member_index(os.path.abspath(path))
+    if index.size is None:
+        with open_log(path) as f:
+            f.seek(0, os.SEEK_END)
+    return index.size
+
+
+def codecs_in(dir_path: str, names: List[str]) -> Dict[str, str]:
+    """{name: codec} for the regular files among names in dir_path that are compressed."""
+    found: Dict[str, str] = {}
+    for name in names:
+        path = os.path.join(dir_path, name)
+        try:
+            codec = detect_codec(path) if os.path.isfile(path) else None
+        except OSError:
+            continue
+        if codec:
+            found[name] = codec
+    return found
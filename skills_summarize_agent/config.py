@@ -21,7 +21,129 @@ OPENAI_CONFIG = {
     "model": os.getenv("SKILL_SUMMARIZER_OPENAI_MODEL") or os.getenv("OPENAI_MODEL", "gpt-5.2"),
     "temperature": float(os.getenv("SKILL_SUMMARIZER_TEMPERATURE", "0.3")),
     "max_tokens": int(os.getenv("SKILL_SUMMARIZER_MAX_TOKENS", "4096")),
+    "stream": os.getenv("SKILL_SUMMARIZER_STREAM", "").lower() in ("1", "true", "yes"),
 }
 
 DEFAULT_PROJECT_ROOT = os.getenv("SKILL_SUMMARIZER_PROJECT_ROOT", "")
 DEFAULT_OUTPUT_DIR = str(_REPO_ROOT / "output")
+DEFAULT_CHECKPOINT_DIR = os.getenv("SKILL_SUMMARIZER_CHECKPOINT_DIR") or str(_REPO_ROOT / ".checkpoints")
+
+# Map-reduce mode for logs larger than the model context
+MAP_REDUCE_CONFIG = {
+    "shard_tokens": int(os.getenv("SKILL_SUMMARIZER_SHARD_TOKENS", "24000")),
+    "concurrency": int(os.getenv("SKILL_SUMMARIZER_MAP_CONCURRENCY", "4")),
+}
+
+# On-disk LLM completion cache (disabled unless a directory is set)
+LLM_CACHE_CONFIG = {
+    "dir": os.getenv("SKILL_SUMMARIZER_LLM_CACHE_DIR", ""),
+    "mode": os.getenv("SKILL_SUMMARIZER_LLM_CACHE_MODE", "read-write"),
+    "max_bytes": int(os.getenv("SKILL_SUMMARIZER_LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+    "max_age": float(os.getenv("SKILL_SUMMARIZER_LLM_CACHE_MAX_AGE", "0")),
+}
+
+# Incremental / follow mode: lines per agent run, max wait for a partial batch, poll period
+INCREMENTAL_CONFIG = {
+    "batch_records": int(os.getenv("SKILL_SUMMARIZER_BATCH_RECORDS", "500")),
+    "window_seconds": float(os.getenv("SKILL_SUMMARIZER_BATCH_WINDOW", "300")),
+    "poll_interval": float(os.getenv("SKILL_SUMMARIZER_POLL_INTERVAL", "5")),
+}
+
+# Agent context window: history policy (full | stub | summarize), compaction threshold in
+# estimated tokens, and the most recent turns always kept verbatim
+HISTORY_CONFIG = {
+    "policy": os.getenv("SKILL_SUMMARIZER_HISTORY_POLICY", "stub"),
+    "budget_tokens": int(os.getenv("SKILL_SUMMARIZER_HISTORY_BUDGET", "24000")),
+    "keep_turns": int(os.getenv("SKILL_SUMMARIZER_HISTORY_KEEP_TURNS", "2")),
+}
+
+# Tool calls of one assistant turn run on a worker pool; calls on the same path are
+# serialized. Timeouts in seconds, with per-tool overrides as "read_file=30,write_file=60".
+# staged_writes: write_file stages a run's files and commits them when the run succeeds
+# (unchanged files skipped; see staging.py); off = write in place immediately.
+# staging_max_age: seconds after which a crashed run's staging area is removed when its
+# owner process cannot be checked (other host); 0 = never
+TOOL_CONFIG = {
+    "workers": int(os.getenv("SKILL_SUMMARIZER_TOOL_WORKERS", "4")),
+    "staged_writes": os.getenv("SKILL_SUMMARIZER_STAGED_WRITES", "true").lower() not in ("0", "false", "no"),
+    "staging_max_age": float(os.getenv("SKILL_SUMMARIZER_STAGING_MAX_AGE", "86400")),
+    "timeout": float(os.getenv("SKILL_SUMMARIZER_TOOL_TIMEOUT", "60")),
+    "timeouts": {
+        name.strip(): float(seconds)
+        for name, _, seconds in (
+            item.partition("=") for item in os.getenv("SKILL_SUMMARIZER_TOOL_TIMEOUTS", "").split(",") if "=" in item
+        )
+    },
+}
+
+# Local pre-triage before any LLM call (see triage.py): logs scoring below min_score are
+# skipped; only the first max_records records of a log are inspected
+TRIAGE_CONFIG = {
+    "enabled": os.getenv("SKILL_SUMMARIZER_TRIAGE", "").lower() in ("1", "true", "yes"),
+    "min_score": float(os.getenv("SKILL_SUMMARIZER_TRIAGE_MIN_SCORE", "0.5")),
+    "max_records": int(os.getenv("SKILL_SUMMARIZER_TRIAGE_MAX_RECORDS", "200")),
+}
+
+# Cross-log workflow mining (see mining.py): pattern support as a run count (>= 1) or a
+# fraction of runs (< 1), cluster similarity (Jaccard of action bigrams), longest pattern,
+# and the smallest cluster worth an agent run
+MINING_CONFIG = {
+    "min_support": float(os.getenv("SKILL_SUMMARIZER_MINING_MIN_SUPPORT", "0.1")),
+    "similarity": float(os.getenv("SKILL_SUMMARIZER_MINING_SIMILARITY", "0.5")),
+    "max_pattern_length": int(os.getenv("SKILL_SUMMARIZER_MINING_MAX_PATTERN", "8")),
+    "min_cluster_runs": int(os.getenv("SKILL_SUMMARIZER_MINING_MIN_CLUSTER_RUNS", "2")),
+}
+
+# Single-shot structured mode: one JSON-schema request instead of the tool loop, used when
+# the prompt (skill listing + digested log) fits max_prompt_tokens (estimated)
+STRUCTURED_CONFIG = {
+    "enabled": os.getenv("SKILL_SUMMARIZER_STRUCTURED", "").lower() in ("1", "true", "yes"),
+    "max_prompt_tokens": int(os.getenv("SKILL_SUMMARIZER_STRUCTURED_MAX_PROMPT_TOKENS", "48000")),
+    "max_completion_tokens": int(os.getenv("SKILL_SUMMARIZER_STRUCTURED_MAX_TOKENS", "16000")),
+}
+
+# Per-run performance trace attached to agent results (see trace.py)
+TRACE_CONFIG = {
+    "enabled": os.getenv("SKILL_SUMMARIZER_TRACE", "").lower() in ("1", "true", "yes"),
+}
+
+# Shared LLM request scheduler (see ratelimit.py): requests / estimated tokens per minute
+# (0 = unlimited), retries with jittered exponential backoff (seconds), and the bucket file
+# shared by all processes on the host (default: a per-user, per-endpoint temp file)
+RATE_LIMIT_CONFIG = {
+    "rpm": float(os.getenv("SKILL_SUMMARIZER_RPM", "0")),
+    "tpm": float(os.getenv("SKILL_SUMMARIZER_TPM", "0")),
+    "max_retries": int(os.getenv("SKILL_SUMMARIZER_MAX_RETRIES", "6")),
+    "backoff_base": float(os.getenv("SKILL_SUMMARIZER_BACKOFF_BASE", "1")),
+    "backoff_max": float(os.getenv("SKILL_SUMMARIZER_BACKOFF_MAX", "60")),
+    "state_file": os.getenv("SKILL_SUMMARIZER_RATE_LIMIT_FILE", ""),
+}
+
+# Per-run budgets of the agent loop (see budget.py; 0 = unlimited): wall-clock seconds,
+# prompt + completion tokens, estimated cost from prices per million prompt / completion
+# tokens; the model is told to wrap up once nudge_at of a budget is used
+BUDGET_CONFIG = {
+    "max_seconds": float(os.getenv("SKILL_SUMMARIZER_BUDGET_SECONDS", "0")),
+    "max_tokens": int(os.getenv("SKILL_SUMMARIZER_BUDGET_TOKENS", "0")),
+    "max_cost": float(os.getenv("SKILL_SUMMARIZER_BUDGET_COST", "0")),
+    "input_price": float(os.getenv("SKILL_SUMMARIZER_PRICE_INPUT", "0")),
+    "output_price": float(os.getenv("SKILL_SUMMARIZER_PRICE_OUTPUT", "0")),
+    "nudge_at": float(os.getenv("SKILL_SUMMARIZER_BUDGET_NUDGE_AT", "0.8")),
+}
+
+# Lease-based job queue (python -m skills_summarize_agent.jobqueue): database, lease length
+# (renewed every third of it while a job runs), attempts per job, idle poll period
+JOB_QUEUE_CONFIG = {
+    "db": os.getenv("SKILL_SUMMARIZER_QUEUE_DB") or str(_REPO_ROOT / ".queue" / "jobs.db"),
+    "lease_seconds": float(os.getenv("SKILL_SUMMARIZER_QUEUE_LEASE", "300")),
+    "max_attempts": int(os.getenv("SKILL_SUMMARIZER_QUEUE_MAX_ATTEMPTS", "3")),
+    "poll_interval": float(os.getenv("SKILL_SUMMARIZER_QUEUE_POLL", "5")),
+}
+
+# Daemon (python -m skills_summarize_agent.daemon): parallel jobs; HTTP port on 127.0.0.1
+# (0 = serve on the Unix socket, default: a per-user path in the temp directory)
+DAEMON_CONFIG = {
+    "workers": int(os.getenv("SKILL_SUMMARIZER_DAEMON_WORKERS", "2")),
+    "port": int(os.getenv("SKILL_SUMMARIZER_DAEMON_PORT", "0")),
+    "socket": os.getenv("SKILL_SUMMARIZER_DAEMON_SOCKET", ""),
+}
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Long-running summarizer daemon with a local job API.
+
+The daemon keeps in memory everything a one-shot CLI run would rebuild:
+- the OpenAI client, with its pooled keep-alive HTTP connections;
+- the package SKILL.md spec;
+- one SkillIndex per output root.
+
+It accepts jobs as JSON over HTTP, on a Unix socket (default) or on 127.0.0.1:<port>:
+- POST /jobs   {"log_path", "project_root", "output_root", "mode", "last_n", "digest", "priority"}
+- GET  /jobs, GET /jobs/<id>: job status (queued, running, done, partial, failed) and result
+  summary; partial = stopped by its budget with the skills written so far committed
+- GET  /health: status (running or draining) and queue depth
+- POST /drain: stop accepting jobs, finish queued and running ones, then exit (SIGTERM too)
+
+Jobs are queued by (priority, arrival) and run by a fixed number of worker threads.
+Submit with the thin client: python -m skills_summarize_agent.client submit --log_path ...
+
+Usage:
+  python -m skills_summarize_agent.daemon
+  python -m skills_summarize_agent.daemon --port 8765 --workers 4 --output_dir /path/to/output
+"""
+import argparse
+import http.server
+import itertools
+import json
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from .client import JOB_MODES, default_socket_path
+from .config import DAEMON_CONFIG, DEFAULT_OUTPUT_DIR
+from .incremental import summarize_incremental
+from .mapreduce import summarize_skills_map_reduce
+from .skill_index import SkillIndex
+from .skill_summarizer_agent import (
+    SkillSummarizerAgent,
+    build_openai_client,
+    load_skill_context,
+    summarize_skills_from_log,
+)
+
+# Finished jobs kept for status polling; older ones are forgotten first.
+MAX_FINISHED_JOBS = 1000
+
+
+def _summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Job result without the bulky per-call tool results."""
+    out = {k: v for k, v in result.items() if k not in ("tool_calls", "message", "candidates")}
+    out["tool_calls"] = len(result.get("tool_calls", []))
+    return out
+
+
+class SummarizerDaemon:
+    """Job queue, worker threads and warm shared state; serve() runs the API server."""
+
+    def __init__(
+        self,
+        output_root: Optional[str] = None,
+        workers: Optional[int] = None,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None,
+        llm_client: Any = None,
+    ):
+        """
+        Args:
+            output_root: Default root for generated SKILLs (jobs may override it).
+            workers: Jobs run in parallel; default DAEMON_CONFIG["workers"].
+            socket_path: Unix socket to listen on; default client.default_socket_path().
+            port: Listen on 127.0.0.1:port instead of a Unix socket when set.
+            llm_client: OpenAI-compatible client shared by all jobs; built once if None.
+        """
+        self.output_root = os.path.abspath(output_root or DEFAULT_OUTPUT_DIR)
+        self.workers = max(1, workers or DAEMON_CONFIG["workers"])
+        self.port = port if port is not None else DAEMON_CONFIG["port"]
+        self.socket_path = socket_path or DAEMON_CONFIG["socket"] or default_socket_path()
+        self.llm_client = llm_client if llm_client is not None else build_openai_client()
+        # Warm the SKILL.md cache used by every agent.
+        load_skill_context(os.path.join(os.path.dirname(__file__), "SKILL.md"))
+        self.started = time.time()
+        self.draining = False
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, SkillIndex] = {}
+        self._running = 0
+        self._idle = threading.Condition(self._lock)
+        self._threads = []
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def skill_index(self, output_root: str) -> SkillIndex:
+        """Warm SkillIndex for output_root (shared by all jobs writing there)."""
+        with self._lock:
+            index = self._indexes.get(output_root)
+            if index is None:
+                index = self._indexes[output_root] = SkillIndex(output_root)
+            return index
+
+    def submit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and queue a job; returns the job record."""
+        if not isinstance(spec, dict):
+            raise ValueError("Job spec must be a JSON object.")
+        if not spec.get("log_path"):
+            raise ValueError("log_path is required.")
+        mode = spec.get("mode") or "log"
+        if mode not in JOB_MODES:
+            raise ValueError(f"Unknown mode: {mode} (use one of {', '.join(JOB_MODES)})")
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "queued",
+            "mode": mode,
+            "log_path": spec["log_path"],
+            "project_root": os.path.abspath(spec.get("project_root") or os.getcwd()),
+            "output_root": os.path.abspath(spec.get("output_root") or self.output_root),
+            "last_n": spec.get("last_n"),
+            "digest": bool(spec.get("digest")),
+            "priority": int(spec.get("priority") or 0),
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            # Checked under the lock drain() sets it with, so no job is queued after draining starts.
+            if self.draining:
+                raise RuntimeError("Daemon is draining; not accepting jobs.")
+            self.jobs[job["id"]] = job
+            self._forget_old_jobs()
+            self._queue.put((job["priority"], next(self._seq), job["id"]))
+        return dict(job)
+
+    def _forget_old_jobs(self) -> None:
+        finished = [j for j in self.jobs.values() if j["finished"] is not None]
+        if len(finished) > MAX_FINISHED_JOBS:
+            finished.sort(key=lambda j: j["finished"])
+            for job in finished[: len(finished) - MAX_FINISHED_JOBS]:
+                del self.jobs[job["id"]]
+
+    def _execute(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        output_root = job["output_root"]
+        if job["mode"] == "map_reduce":
+            return summarize_skills_map_reduce(
+                job["log_path"], project_root=job["project_root"], output_root=output_root,
+                last_n=job["last_n"], llm_client=self.llm_client,
+            )
+        agent = SkillSummarizerAgent(
+            project_root=job["project_root"],
+            output_root=output_root,
+            llm_client=self.llm_client,
+            skill_index=self.skill_index(output_root),
+            priority=job["priority"],
+        )
+        if job["mode"] == "incremental":
+            return summarize_incremental(
+                job["log_path"], project_root=job["project_root"], output_root=output_root,
+                digest=job["digest"], agent=agent,
+            )
+        return summarize_skills_from_log(
+            job["log_path"], project_root=job["project_root"], output_root=output_root,
+            last_n=job["last_n"], digest=job["digest"], agent=agent,
+        )
+
+    def _worker(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self.jobs[job_id]
+                job["status"] = "running"
+                job["started"] = time.time()
+                self._running += 1
+            try:
+                result = self._execute(job)
+                status = "done" if result.get("success") else ("partial" if result.get("partial") else "failed")
+                error = None
+                summary = _summary(result)
+            except Exception as e:
+                status, error, summary = "failed", f"{type(e).__name__}: {e}", None
+            with self._lock:
+                job.update(status=status, error=error, result=summary, finished=time.time())
+                self._running -= 1
+                self._idle.notify_all()
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": "draining" if self.draining else "running",
+                "queued": sum(1 for j in self.jobs.values() if j["status"] == "queued"),
+                "running": self._running,
+                "workers": self.workers,
+                "uptime": round(time.time() - self.started, 3),
+                "pid": os.getpid(),
+            }
+
+    def drain(self) -> None:
+        """Stop accepting jobs; in the background, wait for the queue to empty and shut down."""
+        with self._lock:
+            if self.draining:
+                return
+            self.draining = True
+        threading.Thread(target=self._drain_and_stop, name="skill-daemon-drain", daemon=True).start()
+
+    def _drain_and_stop(self) -> None:
+        with self._lock:
+            while self._running or any(j["status"] == "queued" for j in self.jobs.values()):
+                self._idle.wait()
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._seq), None))
+        for thread in self._threads:
+            thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _make_server(self) -> socketserver.BaseServer:
+        handler = _make_handler(self)
+        if self.port:
+            return http.server.ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = _UnixHTTPServer(self.socket_path, handler)
+        os.chmod(self.socket_path, 0o600)
+        return server
+
+    def serve(self) -> None:
+        """Start workers and serve the job API until drained."""
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"skill-daemon-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._server = self._make_server()
+        try:
+            self._server.serve_forever(poll_interval=0.2)
+        finally:
+            self._server.server_close()
+            if not self.port and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    @property
+    def address(self) -> str:
+        return f"http://127.0.0.1:{self.port}" if self.port else f"unix:{self.socket_path}"
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def _make_handler(daemon: SummarizerDaemon):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def address_string(self) -> str:
+            return "local" if not isinstance(self.client_address, tuple) else self.client_address[0]
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send(self, status: int, data: Dict[str, Any]) -> None:
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            path = self.path.rstrip("/")
+            if path == "/health":
+                return self._send(200, daemon.health())
+            if path == "/jobs":
+                with daemon._lock:
+                    jobs = [dict(j) for j in daemon.jobs.values()]
+                return self._send(200, {"jobs": jobs})
+            if path.startswith("/jobs/"):
+                with daemon._lock:
+                    job = daemon.jobs.get(path[len("/jobs/"):])
+                    job = dict(job) if job else None
+                if job is None:
+                    return self._send(404, {"error": "Unknown job."})
+                return self._send(200, job)
+            return self._send(404, {"error": "Not found."})
+
+        def do_POST(self) -> None:
+            path = self.path.rstrip("/")
+            if path == "/drain":
+                daemon.drain()
+                return self._send(202, daemon.health())
+            if path != "/jobs":
+                return self._send(404, {"error": "Not found."})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                spec = json.loads(self.rfile.read(length) or b"{}")
+                return self._send(202, daemon.submit(spec))
+            except RuntimeError as e:
+                return self._send(503, {"error": str(e)})
+            except (ValueError, TypeError) as e:
+                return self._send(400, {"error": str(e)})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the skill summarizer daemon (local job API).")
+    parser.add_argument("--socket", type=str, default=None, help="Unix socket path; default: SKILL_SUMMARIZER_DAEMON_SOCKET or a per-user temp path.")
+    parser.add_argument("--port", type=int, default=None, help="Serve HTTP on 127.0.0.1:PORT instead of a Unix socket.")
+    parser.add_argument("--workers", type=int, default=None, help="Jobs run in parallel; default: SKILL_SUMMARIZER_DAEMON_WORKERS or 2.")
+    parser.add_argument("--output_dir", type=str, default=None, help="Default root for generated SKILLs; default: package default.")
+    args = parser.parse_args()
+
+    daemon = SummarizerDaemon(output_root=args.output_dir, workers=args.workers, socket_path=args.socket, port=args.port)
+
+    def on_signal(signum, frame):
+        print("[INFO] Draining: finishing queued jobs before exit.", flush=True)
+        daemon.drain()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    print(f"[INFO] Skill summarizer daemon on {daemon.address} ({daemon.workers} worker(s))", flush=True)
+    daemon.serve()
+    print("[INFO] Daemon stopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Log pre-digestion for the Skill Summarizer Agent: compact records before they reach the LLM.
+
+Pipeline:
+- flatten_record: split each parsed record into entries (record header + one entry per
+  element of list-of-object fields such as conversation, api_call_history).
+- stages: pluggable entry transformers (drop_noise, dedupe_content, truncate_fields).
+- digest_log: run the pipeline over a log and render a compact digest under a byte budget.
+- estimate_tokens: cheap character-based token estimate for budgeting.
+
+Every entry carries a ref (e.g. "r0.conversation[3]") that the returned index maps back to
+the original record's byte offset, line and JSON path; expand_ref recovers the raw value.
+"""
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .compressed import log_size
+from .ingest import iter_json_records
+
+Entry = Dict[str, Any]
+Stage = Callable[[Iterable[Entry]], Iterator[Entry]]
+
+DEFAULT_DIGEST_BYTES = 32 * 1024
+DEFAULT_FIELD_BYTES = 1500
+DEFAULT_DEDUPE_MIN_CHARS = 120
+DEFAULT_NOISE_KEYS = ("timestamp", "start_time", "end_time")
+DEFAULT_NOISE_VALUES = ("Unknown", "", None)
+
+
+def _is_object_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+
+def _walk(obj: Dict[str, Any], ref: str, path: str, base: Entry) -> Iterator[Entry]:
+    fields: Dict[str, Any] = {}
+    children: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    def collect(node: Dict[str, Any], prefix: str) -> None:
+        for key, value in node.items():
+            name = f"{prefix}{key}"
+            if _is_object_list(value):
+                for i, item in enumerate(value):
+                    child_path = f"{path}.{name}[{i}]" if path else f"{name}[{i}]"
+                    children.append((f"{ref}.{name}[{i}]", child_path, item))
+            elif isinstance(value, dict):
+                collect(value, name + ".")
+            else:
+                fields[name] = value
+
+    collect(obj, "")
+    yield dict(base, ref=ref, path=path, fields=fields)
+    for child_ref, child_path, item in children:
+        yield from _walk(item, child_ref, child_path, base)
+
+
+def flatten_record(index: int, offset: int, line: int, value: Any) -> Iterator[Entry]:
+    """
+    Split one parsed record into entries.
+
+    Each entry: {"ref": str, "record": int, "offset": int, "line": int, "path": str,
+    "fields": dict}. Non-object records become a single entry with a "text" field.
+    """
+    base = {"record": index, "offset": offset, "line": line}
+    ref = f"r{index}"
+    if not isinstance(value, dict):
+        yield dict(base, ref=ref, path="", fields={"text": value})
+        return
+    yield from _walk(value, ref, "", base)
+
+
+def drop_noise(
+    keys: Sequence[str] = DEFAULT_NOISE_KEYS,
+    values: Sequence[Any] = DEFAULT_NOISE_VALUES,
+) -> Stage:
+    """Stage: drop timestamp-like keys and fields whose value is a placeholder (e.g. sender "Unknown")."""
+    noisy_keys = set(keys)
+
+    def stage(entries: Iterable[Entry]) -> Iterator[Entry]:
+        for entry in entries:
+            entry["fields"] = {
+                k: v
+                for k, v in entry["fields"].items()
+                if k.rsplit(".", 1)[-1] not in noisy_keys and v not in values and v != []
+            }
+            yield entry
+
+    return stage
+
+
+def _split_paragraphs(text: str) -> List[str]:
+    return text.split("\n\n")
+
+
+def dedupe_content(min_chars: int = DEFAULT_DEDUPE_MIN_CHARS) -> Stage:
+    """
+    Stage: replace repeated text by a reference to its first occurrence.
+
+    Strings (and paragraphs within strings) of at least min_chars are hashed; later copies
+    become "<dup ref:sha>" markers, which catches task prompts and team descriptions that
+    agents repeat in many messages.
+    """
+    seen: Dict[str, str] = {}
+
+    def replace(text: str, ref: str) -> str:
+        if len(text) < min_chars:
+            return text
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+        if digest in seen:
+            return f"<dup {seen[digest]}:{digest}>"
+        seen[digest] = ref
+        parts = _split_paragraphs(text)
+        if len(parts) == 1:
+            return text
+        out = []
+        for part in parts:
+            if len(part) < min_chars:
+                out.append(part)
+                continue
+            part_digest = hashlib.sha1(part.encode("utf-8")).hexdigest()[:10]
+            if part_digest in seen:
+                out.append(f"<dup {seen[part_digest]}:{part_digest}>")
+            else:
+                seen[part_digest] = ref
+                out.append(part)
+        return "\n\n".join(out)
+
+    def stage(entries: Iterable[Entry]) -> Iterator[Entry]:
+        for entry in entries:
+            entry["fields"] = {
+                k: replace(v, entry["ref"]) if isinstance(v, str) else v
+                for k, v in entry["fields"].items()
+            }
+            yield entry
+
+    return stage
+
+
+def truncate_fields(max_bytes: int = DEFAULT_FIELD_BYTES) -> Stage:
+    """Stage: cut string fields larger than max_bytes to head + tail with an elision marker."""
+    half = max(max_bytes // 2, 1)
+
+    def cut(text: str) -> str:
+        raw = text.encode("utf-8")
+        if len(raw) <= max_bytes:
+            return text
+        head = raw[:half].decode("utf-8", errors="ignore")
+        tail = raw[-half:].decode("utf-8", errors="ignore")
+        return f"{head} [... {len(raw) - 2 * half} bytes elided ...] {tail}"
+
+    def stage(entries: Iterable[Entry]) -> Iterator[Entry]:
+        for entry in entries:
+            entry["fields"] = {
+                k: cut(v) if isinstance(v, str) else v for k, v in entry["fields"].items()
+            }
+            yield entry
+
+    return stage
+
+
+def default_stages() -> List[Stage]:
+    """Default pipeline: drop noise, dedupe repeated text, then truncate oversized fields."""
+    return [drop_noise(), dedupe_content(), truncate_fields()]
+
+
+def render_entry(entry: Entry) -> str:
+    """Render one entry as a single "[ref] {json}" line."""
+    body = json.dumps(entry["fields"], ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"[{entry['ref']}] {body}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about 4 characters per token); no tokenizer dependency."""
+    return len(text) // 4 + 1
+
+
+def digest_log(
+    path: str,
+    start: int = 0,
+    stages: Optional[List[Stage]] = None,
+    max_bytes: int = DEFAULT_DIGEST_BYTES,
+    end: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run the pre-digestion pipeline over a log file from byte offset start (up to end).
+
+    Records are streamed through iter_json_records; rendering stops once max_bytes of
+    digest text have been produced (the remaining records are only counted).
+
+    Returns:
+        {"text": str, "index": dict[ref, {"offset", "line", "path"}],
+         "stats": {"input_bytes", "output_bytes", "records", "entries", "truncated"}}
+    """
+    stages = default_stages() if stages is None else stages
+    stats = {"input_bytes": 0, "output_bytes": 0, "records": 0, "entries": 0, "truncated": False}
+    index: Dict[str, Dict[str, Any]] = {}
+    lines: List[str] = []
+
+    def entries() -> Iterator[Entry]:
+        for i, record in enumerate(iter_json_records(path, start=start, end=end)):
+            stats["records"] += 1
+            yield from flatten_record(i, record.offset, record.line, record.value)
+
+    stream: Iterable[Entry] = entries()
+    for stage in stages:
+        stream = stage(stream)
+
+    for entry in stream:
+        stats["entries"] += 1
+        if stats["truncated"]:
+            continue
+        if not entry["fields"] and entry["path"]:
+            continue
+        line = render_entry(entry)
+        size = len(line.encode("utf-8")) + 1
+        if stats["output_bytes"] + size > max_bytes:
+            stats["truncated"] = True
+            continue
+        lines.append(line)
+        stats["output_bytes"] += size
+        index[entry["ref"]] = {"offset": entry["offset"], "line": entry["line"], "path": entry["path"]}
+
+    stats["input_bytes"] = (log_size(path) if end is None else end) - start
+    if stats["truncated"]:
+        lines.append(f"... (digest truncated at {max_bytes} bytes; use read_file for the rest)")
+    return {"text": "\n".join(lines), "index": index, "stats": stats}
+
+
+def expand_ref(path: str, index: Dict[str, Dict[str, Any]], ref: str) -> Any:
+    """Re-read the original (un-digested) value for a digest ref from the log file."""
+    loc = index[ref]
+    record = next(iter_json_records(path, start=loc["offset"], first_line=loc["line"]))
+    value = record.value
+    for part in filter(None, loc["path"].split(".")):
+        if "[" in part:
+            key, _, pos = part.partition("[")
+            value = value[key][int(pos.rstrip("]"))]
+        else:
+            value = value[part]
+    return value
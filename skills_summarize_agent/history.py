@@ -0,0 +1,265 @@
+"""
+Context-window management for the agent's tool loop.
+
+SkillSummarizerAgent keeps the full transcript of a run, but sends the model the view
+produced by a HistoryPolicy. The view grows append-only, so provider-side prefix caching
+keeps working. Once its estimated size exceeds budget_tokens, the policy compacts
+everything older than the last keep_turns turns in one step. The next compaction only
+happens when the budget is exceeded again, so the prefix is rewritten rarely. The system
+message and the task message are never changed.
+
+Policies:
+- "full": send everything (the previous behaviour; the baseline for measurements).
+- "stub": replace stale tool results, and the content argument of earlier write_file
+  calls, with short stubs (tool, status, path, size). The model can call the tool again
+  if it needs the data.
+- "summarize": collapse earlier turns into one summary message listing the calls made
+  and their outcomes.
+
+Every policy records, per run, the estimated tokens it sent and what the full history
+would have cost, so policies can be compared from measurements.
+"""
+import copy
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from .config import HISTORY_CONFIG
+from .digest import estimate_tokens
+
+_STUB_PREVIEW_CHARS = 160
+_SUMMARY_ARG_CHARS = 80
+
+
+def _message_tokens(message: Dict[str, Any]) -> int:
+    return estimate_tokens(json.dumps(message, ensure_ascii=False))
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _parse_result(content: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _outcome(result: Dict[str, Any], size: int) -> str:
+    """One-line description of a tool result (status, path, size, error)."""
+    if not result:
+        return f"{size} chars"
+    if not result.get("success", True):
+        return f"failed: {_shorten(result.get('error') or 'unknown error', _STUB_PREVIEW_CHARS)}"
+    parts = ["ok"]
+    if result.get("path"):
+        parts.append(str(result["path"]))
+    for key in ("offset", "next_offset", "eof", "total_skills"):
+        if result.get(key) is not None:
+            parts.append(f"{key}={result[key]}")
+    for key in ("matches", "entries"):
+        if isinstance(result.get(key), list):
+            parts.append(f"{len(result[key])} {key}")
+    parts.append(f"{size} chars")
+    return ", ".join(parts)
+
+
+class HistoryPolicy:
+    """
+    Base policy ("full"): sends the transcript unchanged and only records token stats.
+
+    Subclasses override compact(). The agent calls reset() at the start of each run and
+    view() before every model call.
+    """
+
+    name = "full"
+
+    def __init__(self, budget_tokens: Optional[int] = None, keep_turns: Optional[int] = None):
+        """
+        Args:
+            budget_tokens: Compact when the view's estimated tokens exceed this; default
+                HISTORY_CONFIG["budget_tokens"].
+            keep_turns: Most recent assistant turns (with their tool results) kept verbatim;
+                default HISTORY_CONFIG["keep_turns"].
+        """
+        self.budget_tokens = HISTORY_CONFIG["budget_tokens"] if budget_tokens is None else budget_tokens
+        self.keep_turns = HISTORY_CONFIG["keep_turns"] if keep_turns is None else keep_turns
+        self.reset()
+
+    def fresh(self) -> "HistoryPolicy":
+        """New instance with the same settings (policies hold per-run state)."""
+        return type(self)(budget_tokens=self.budget_tokens, keep_turns=self.keep_turns)
+
+    def reset(self) -> None:
+        self._view: List[Dict[str, Any]] = []
+        self._view_tokens: List[int] = []
+        self._seen = 0
+        self._full_tokens = 0
+        self._pinned = 0
+        self.stats: Dict[str, Any] = {
+            "policy": self.name,
+            "calls": 0,
+            "tokens_full": 0,
+            "tokens_sent": 0,
+            "tokens_saved": 0,
+            "compactions": 0,
+            "prompt_tokens": 0,
+        }
+
+    def pin(self, count: int) -> None:
+        """Never compact the first count messages (system, initial and task messages)."""
+        self._pinned = count
+
+    def view(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Messages to send for this model call; messages is the full transcript so far."""
+        for message in messages[self._seen:]:
+            tokens = _message_tokens(message)
+            self._full_tokens += tokens
+            self._view.append(message)
+            self._view_tokens.append(tokens)
+        self._seen = len(messages)
+        if self.budget_tokens and sum(self._view_tokens) > self.budget_tokens:
+            compacted = self.compact(self._view)
+            if compacted is not self._view:
+                self._view = compacted
+                self._view_tokens = [_message_tokens(m) for m in compacted]
+                self.stats["compactions"] += 1
+        sent = sum(self._view_tokens)
+        self.stats["calls"] += 1
+        self.stats["tokens_full"] += self._full_tokens
+        self.stats["tokens_sent"] += sent
+        self.stats["tokens_saved"] = self.stats["tokens_full"] - self.stats["tokens_sent"]
+        return self._view
+
+    def record_usage(self, usage: Any) -> None:
+        """Add the provider-reported prompt tokens of a response (if any) to the stats."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) if usage is not None else None
+        if isinstance(prompt_tokens, int):
+            self.stats["prompt_tokens"] += prompt_tokens
+
+    def compact(self, view: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return a smaller view, or view itself if nothing can be compacted."""
+        return view
+
+    def _stale_end(self, view: List[Dict[str, Any]]) -> int:
+        """Index where the last keep_turns assistant turns start (messages before it are stale)."""
+        starts = [i for i, m in enumerate(view) if i >= self._pinned and m.get("role") == "assistant"]
+        if len(starts) <= self.keep_turns:
+            return self._pinned
+        return starts[-self.keep_turns] if self.keep_turns else len(view)
+
+
+class StubToolResultsPolicy(HistoryPolicy):
+    """Replace stale tool results and write_file contents with short stubs."""
+
+    name = "stub"
+
+    def compact(self, view: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        end = self._stale_end(view)
+        names: Dict[str, str] = {}
+        out = list(view)
+        changed = False
+        for i in range(self._pinned, end):
+            message = view[i]
+            if message.get("role") == "assistant" and message.get("tool_calls"):
+                stubbed = self._stub_calls(message, names)
+                if stubbed is not message:
+                    out[i] = stubbed
+                    changed = True
+            elif message.get("role") == "tool" and not message.get("_stub"):
+                content = message.get("content") or ""
+                name = names.get(message.get("tool_call_id"), "tool")
+                stub = (
+                    f"[{name} result elided to save context: {_outcome(_parse_result(content), len(content))}. "
+                    f"Call {name} again if you need it.]"
+                )
+                if len(stub) < len(content):
+                    out[i] = {"role": "tool", "tool_call_id": message.get("tool_call_id"), "content": stub, "_stub": True}
+                    changed = True
+        return out if changed else view
+
+    @staticmethod
+    def _stub_calls(message: Dict[str, Any], names: Dict[str, str]) -> Dict[str, Any]:
+        calls = []
+        changed = False
+        for tc in message["tool_calls"]:
+            names[tc["id"]] = tc["function"]["name"]
+            if tc["function"]["name"] == "write_file":
+                args = _parse_result(tc["function"]["arguments"])
+                content = args.get("content")
+                if isinstance(content, str) and len(content) > _STUB_PREVIEW_CHARS:
+                    args["content"] = f"<{len(content)} chars elided>"
+                    tc = copy.deepcopy(tc)
+                    tc["function"]["arguments"] = json.dumps(args, ensure_ascii=False)
+                    changed = True
+            calls.append(tc)
+        return dict(message, tool_calls=calls) if changed else message
+
+
+class SummarizeTurnsPolicy(HistoryPolicy):
+    """Collapse stale turns into a single summary message placed after the pinned prefix."""
+
+    name = "summarize"
+
+    def compact(self, view: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        end = self._stale_end(view)
+        if end <= self._pinned:
+            return view
+        lines: List[str] = []
+        results: Dict[str, str] = {}
+        for message in view[self._pinned:end]:
+            if message.get("_summary"):
+                lines.extend(message["content"].splitlines()[1:])
+            elif message.get("role") == "tool":
+                results[message.get("tool_call_id")] = message.get("content") or ""
+        for message in view[self._pinned:end]:
+            if message.get("role") != "assistant":
+                continue
+            if message.get("content"):
+                lines.append(f"- note: {_shorten(message['content'], _STUB_PREVIEW_CHARS)}")
+            for tc in message.get("tool_calls") or []:
+                args = _parse_result(tc["function"]["arguments"])
+                shown = ", ".join(f"{k}={_shorten(json.dumps(v, ensure_ascii=False), _SUMMARY_ARG_CHARS)}" for k, v in args.items())
+                content = results.get(tc["id"], "")
+                lines.append(f"- {tc['function']['name']}({shown}) -> {_outcome(_parse_result(content), len(content))}")
+        summary = {
+            "role": "user",
+            "content": "Summary of earlier turns (details elided to save context; repeat a call if you need its output):\n"
+            + "\n".join(lines),
+            "_summary": True,
+        }
+        return view[:self._pinned] + [summary] + view[end:]
+
+
+HISTORY_POLICIES = {
+    HistoryPolicy.name: HistoryPolicy,
+    StubToolResultsPolicy.name: StubToolResultsPolicy,
+    SummarizeTurnsPolicy.name: SummarizeTurnsPolicy,
+}
+
+
+def make_policy(
+    policy: Union[str, HistoryPolicy, None] = None,
+    budget_tokens: Optional[int] = None,
+    keep_turns: Optional[int] = None,
+) -> HistoryPolicy:
+    """
+    Build a history policy by name ("full", "stub", "summarize"; default
+    HISTORY_CONFIG["policy"]), or return a fresh copy of a given policy instance.
+    """
+    if isinstance(policy, HistoryPolicy):
+        return policy.fresh()
+    name = policy or HISTORY_CONFIG["policy"]
+    if name not in HISTORY_POLICIES:
+        raise ValueError(f"Unknown history policy: {name} (use one of {', '.join(HISTORY_POLICIES)})")
+    return HISTORY_POLICIES[name](budget_tokens=budget_tokens, keep_turns=keep_turns)
+
+
+def to_api(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop policy bookkeeping keys (leading underscore) before sending messages."""
+    return [
+        {k: v for k, v in m.items() if not k.startswith("_")} if any(k.startswith("_") for k in m) else m
+        for m in messages
+    ]
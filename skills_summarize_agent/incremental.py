@@ -0,0 +1,312 @@
+"""
+Incremental / tail mode: summarize only the records appended since the last run.
+
+- summarize_incremental: resume from the log's checkpoint (see checkpoint.py), split the
+  new complete lines into batches of batch_records, run the agent on each batch only, and
+  advance the checkpoint after every successful batch.
+- follow_log: poll the log and call summarize_incremental whenever batch_records new
+  lines are pending or the oldest pending line has waited window_seconds.
+
+Only complete lines (terminated by a newline) are consumed, so a record that is still
+being written is picked up on the next run. Records are non-blank JSONL lines. Offsets of
+a compressed log (e.g. a rotated log.1.gz) are positions in its decompressed content.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from openai import OpenAI
+
+from .checkpoint import CheckpointStore, resolve_resume
+from .compressed import log_size, open_log
+from .config import DEFAULT_OUTPUT_DIR, INCREMENTAL_CONFIG
+from .history import HistoryPolicy
+from .ingest import DEFAULT_BLOCK_SIZE, log_window
+from .skill_summarizer_agent import SkillSummarizerAgent, build_user_message
+
+
+def complete_end(path: str, start: int, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """Byte offset just after the last newline at or after start (start if there is none)."""
+    with open_log(path) as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        while pos > start:
+            size = min(block_size, pos - start)
+            pos -= size
+            f.seek(pos)
+            nl = f.read(size).rfind(b"\n")
+            if nl >= 0:
+                return pos + nl + 1
+    return start
+
+
+def iter_batches(path: str, start: int, end: int, batch_records: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (batch_start, batch_end, lines) spans of up to batch_records non-blank lines in [start, end)."""
+    with open_log(path, start) as f:
+        pos = batch_start = start
+        count = 0
+        while pos < end:
+            raw = f.readline()
+            if not raw:
+                break
+            pos += len(raw)
+            if raw.strip():
+                count += 1
+            if count >= batch_records:
+                yield batch_start, pos, count
+                batch_start, count = pos, 0
+        if count:
+            yield batch_start, min(pos, end), count
+
+
+def _delta_note(start: int, end: int, lines_before: int, status: str) -> str:
+    resumed = f"{lines_before} earlier line(s) were summarized in previous runs" if lines_before else "first run on this log"
+    return (
+        f"Incremental run ({status}; {resumed}). Only the new records at bytes {start}-{end} are shown. "
+        f'For detail use read_file with unit="bytes", offset={start}, limit={end - start}; do not re-read earlier parts of the log.'
+    )
+
+
+def _run_span(
+    agent: SkillSummarizerAgent,
+    log_path: str,
+    abs_log: str,
+    start: int,
+    end: int,
+    batch_records: int,
+    digest: bool,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]],
+    advance: Callable[[int, int], None],
+    lines_before: int,
+    status: str,
+    tool_calls_log: list,
+) -> Tuple[bool, list, int]:
+    """
+    Run the agent on each batch in [start, end); returns (ok, batch results, lines processed).
+
+    Tool calls of every batch are appended to tool_calls_log. A batch stopped by its
+    budget (result "partial") has its skills committed, so it counts as processed and the
+    checkpoint moves past it.
+    """
+    batches = []
+    processed = 0
+    for b_start, b_end, lines in iter_batches(abs_log, start, end, batch_records):
+        window = log_window(abs_log, start=b_start, end=b_end)
+        note = _delta_note(b_start, b_end, lines_before + processed, status)
+        message = build_user_message(log_path, abs_log, agent.output_root, window, digest=digest, note=note)
+        result = agent.run(message)
+        tool_calls_log.extend(result.get("tool_calls", []))
+        item = {
+            "log_path": abs_log,
+            "start_offset": b_start,
+            "end_offset": b_end,
+            "lines": lines,
+            "success": result["success"],
+            "stopped": result.get("stopped"),
+            "tool_calls": len(result.get("tool_calls", [])),
+            "final_response": result.get("final_response"),
+        }
+        batches.append(item)
+        if on_batch is not None:
+            on_batch(item)
+        if not (result["success"] or result.get("partial")):
+            return False, batches, processed
+        processed += lines
+        advance(b_end, lines_before + processed)
+    return True, batches, processed
+
+
+def summarize_incremental(
+    log_path: str,
+    project_root: Optional[str] = None,
+    output_root: Optional[str] = None,
+    digest: bool = False,
+    batch_records: Optional[int] = None,
+    checkpoint_dir: Optional[str] = None,
+    llm_client: Optional[OpenAI] = None,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+    agent: Optional[SkillSummarizerAgent] = None,
+    history_policy: Union[str, HistoryPolicy, None] = None,
+) -> Dict[str, Any]:
+    """
+    SDK entry point: summarize only the lines appended to log_path since its checkpoint.
+
+    Args:
+        log_path: Path to the log file (relative to project_root or absolute).
+        project_root: Root for reading; defaults to current working directory.
+        output_root: Root for writing generated SKILLs; defaults to package default.
+        digest: Send pre-digested batches instead of raw lines (see digest.py).
+        batch_records: Lines per agent run; default INCREMENTAL_CONFIG["batch_records"].
+        checkpoint_dir: Checkpoint store directory; default DEFAULT_CHECKPOINT_DIR.
+        llm_client: OpenAI-compatible client; built from OPENAI_CONFIG if None.
+        on_batch: Optional callback with each batch result.
+        agent: Agent to reuse across calls (follow mode); built from the other args if None.
+        history_policy: Context-window policy for each agent run (see history.py); ignored
+            with a pre-built agent.
+
+    Returns:
+        {"success": bool, "status": "new" | "resumed" | "truncated" | "rotated",
+         "start_offset": int, "end_offset": int, "lines": int, "batches": list[dict],
+         "tool_calls": list, "final_response": str | None}
+    """
+    project_root = os.path.abspath(project_root or os.getcwd())
+    output_root = os.path.abspath(output_root or DEFAULT_OUTPUT_DIR)
+    abs_log = log_path if os.path.isabs(log_path) else os.path.join(project_root, log_path)
+    if not os.path.isfile(abs_log):
+        return {
+            "success": False,
+            "status": "missing",
+            "start_offset": 0,
+            "end_offset": 0,
+            "lines": 0,
+            "batches": [],
+            "tool_calls": [],
+            "final_response": f"Log file not found: {abs_log}",
+        }
+
+    store = CheckpointStore(checkpoint_dir)
+    batch_records = batch_records or INCREMENTAL_CONFIG["batch_records"]
+    checkpoint = store.load(abs_log)
+    resume = resolve_resume(abs_log, checkpoint)
+    lines_before = checkpoint.get("lines", 0) if checkpoint and resume["status"] == "resumed" else 0
+    if agent is None:
+        agent = SkillSummarizerAgent(
+            project_root=project_root, output_root=output_root, llm_client=llm_client, history_policy=history_policy
+        )
+
+    batches = []
+    tool_calls: list = []
+    if resume["rotated_path"]:
+        rotated = resume["rotated_path"]
+        rotated_end = log_size(rotated)
+        ok, done, _ = _run_span(
+            agent, rotated, rotated, resume["rotated_offset"], rotated_end, batch_records, digest,
+            on_batch, lambda offset, lines: store.save(abs_log, offset, lines=lines, source=rotated),
+            checkpoint.get("lines", 0), "rotated", tool_calls,
+        )
+        batches.extend(done)
+        if not ok:
+            return {
+                "success": False,
+                "status": resume["status"],
+                "start_offset": resume["rotated_offset"],
+                "end_offset": resume["rotated_offset"],
+                "lines": 0,
+                "batches": batches,
+                "tool_calls": tool_calls,
+                "final_response": done[-1]["final_response"] if done else None,
+            }
+
+    start = resume["offset"]
+    end = complete_end(abs_log, start)
+    if resume["status"] != "resumed":
+        store.save(abs_log, start, lines=lines_before)
+
+    ok, done, processed = _run_span(
+        agent, log_path, abs_log, start, end, batch_records, digest, on_batch,
+        lambda offset, lines: store.save(abs_log, offset, lines=lines),
+        lines_before, resume["status"], tool_calls,
+    )
+    batches.extend(done)
+    reached = start
+    if done:
+        reached = done[-1]["end_offset"] if ok else done[-1]["start_offset"]
+    return {
+        "success": ok,
+        "status": resume["status"],
+        "start_offset": start,
+        "end_offset": reached,
+        "lines": processed,
+        "batches": batches,
+        "tool_calls": tool_calls,
+        "final_response": done[-1]["final_response"] if done else None,
+    }
+
+
+def _pending_lines(path: str, start: int, end: int) -> int:
+    count = 0
+    with open_log(path, start) as f:
+        pos = start
+        while pos < end:
+            raw = f.readline()
+            if not raw:
+                break
+            pos += len(raw)
+            if raw.strip():
+                count += 1
+    return count
+
+
+def follow_log(
+    log_path: str,
+    project_root: Optional[str] = None,
+    output_root: Optional[str] = None,
+    digest: bool = False,
+    batch_records: Optional[int] = None,
+    window_seconds: Optional[float] = None,
+    poll_interval: Optional[float] = None,
+    checkpoint_dir: Optional[str] = None,
+    llm_client: Optional[OpenAI] = None,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+    history_policy: Union[str, HistoryPolicy, None] = None,
+) -> None:
+    """
+    Follow a growing log until stop_event is set, summarizing new lines in batches.
+
+    A batch is flushed once batch_records complete lines are pending, or when the oldest
+    pending line has waited window_seconds. Rotation and truncation are handled by the
+    checkpoint logic in summarize_incremental. history_policy applies to each agent run
+    (see history.py).
+    """
+    project_root = os.path.abspath(project_root or os.getcwd())
+    output_root = os.path.abspath(output_root or DEFAULT_OUTPUT_DIR)
+    abs_log = log_path if os.path.isabs(log_path) else os.path.join(project_root, log_path)
+    batch_records = batch_records or INCREMENTAL_CONFIG["batch_records"]
+    window_seconds = INCREMENTAL_CONFIG["window_seconds"] if window_seconds is None else window_seconds
+    poll_interval = INCREMENTAL_CONFIG["poll_interval"] if poll_interval is None else poll_interval
+    stop_event = stop_event or threading.Event()
+    store = CheckpointStore(checkpoint_dir)
+    agent = SkillSummarizerAgent(
+        project_root=project_root, output_root=output_root, llm_client=llm_client, history_policy=history_policy
+    )
+    pending_since: Optional[float] = None
+    last_seen: Optional[Tuple[int, int, int]] = None
+    pending = 0
+
+    while not stop_event.is_set():
+        try:
+            st = os.stat(abs_log)
+        except FileNotFoundError:
+            stop_event.wait(poll_interval)
+            continue
+        seen = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if seen != last_seen:
+            last_seen = seen
+            resume = resolve_resume(abs_log, store.load(abs_log))
+            if resume["rotated_path"]:
+                pending = batch_records
+            else:
+                start = resume["offset"]
+                pending = _pending_lines(abs_log, start, complete_end(abs_log, start))
+        now = time.monotonic()
+        if pending and pending_since is None:
+            pending_since = now
+        due = pending >= batch_records or (pending and now - pending_since >= window_seconds)
+        if due:
+            result = summarize_incremental(
+                abs_log,
+                project_root=project_root,
+                output_root=output_root,
+                digest=digest,
+                batch_records=batch_records,
+                checkpoint_dir=checkpoint_dir,
+                on_batch=on_batch,
+                agent=agent,
+            )
+            pending, pending_since, last_seen = 0, None, None
+            if not result["success"]:
+                # Back off before retrying the batch that failed; its records stay pending.
+                stop_event.wait(window_seconds)
+        stop_event.wait(poll_interval)
@@ -0,0 +1,229 @@
+"""
+Streaming, bounded-memory log ingestion for the Skill Summarizer Agent.
+
+- iter_lines: stream non-blank lines from a byte offset.
+- seek_last_lines: seek backwards from EOF in blocks to where the last N lines start.
+- count_lines: count non-blank lines without keeping them.
+- iter_json_records: incremental JSON decoder; yields whole records from JSONL or
+  pretty-printed multi-line JSON (e.g. data/example2).
+- log_window: total-lines count and preview used to build the summarizer user message.
+
+Memory stays proportional to the longest line / largest record, never to the file size.
+Compressed logs (gzip, xz, zstd; see compressed.py) are decompressed while streaming;
+offsets are then positions in the decompressed content.
+"""
+import codecs
+import json
+import os
+import re
+from collections import deque
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from .compressed import detect_codec, log_size, open_log
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_MAX_RECORD_BYTES = 64 * 1024 * 1024
+
+_JSON_START = ("{", "[")
+_WHITESPACE = re.compile(r"\s*")
+
+
+class LogRecord(NamedTuple):
+    """One record from a log: byte offset, 1-based line number and decoded value.
+
+    value is the parsed JSON object, or the stripped line text when the line is not JSON.
+    """
+
+    offset: int
+    line: int
+    value: Any
+
+
+def iter_lines(
+    path: str,
+    start: int = 0,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    """Yield stripped, non-blank lines from path starting at byte offset start."""
+    with open_log(path, start) as f:
+        for raw in f:
+            line = raw.decode(encoding).strip()
+            if line:
+                yield line
+
+
+def seek_last_lines(
+    path: str,
+    n: int,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> int:
+    """
+    Return the byte offset where the last n non-blank lines of path start.
+
+    Reads backwards from EOF in blocks of block_size; only the partial line that spans a
+    block boundary is carried over, so memory is bounded by the longest line.
+    Compressed logs cannot be read backwards; they are streamed once, keeping only the
+    offsets of the last n lines.
+    Returns 0 when the file has n or fewer non-blank lines.
+    """
+    if n <= 0:
+        return log_size(path)
+    if detect_codec(path) is not None:
+        starts: "deque[int]" = deque(maxlen=n)
+        pos = 0
+        with open_log(path) as f:
+            for raw in f:
+                if raw.strip():
+                    starts.append(pos)
+                pos += len(raw)
+        return starts[0] if len(starts) == n else 0
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        found = 0
+        carry = b""
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            buf = f.read(size) + carry
+            parts = buf.split(b"\n")
+            cursor = pos + len(buf)
+            for part in reversed(parts[1:]):
+                line_start = cursor - len(part)
+                if part.strip():
+                    found += 1
+                    if found == n:
+                        return line_start
+                cursor = line_start - 1
+            carry = parts[0]
+        return 0
+
+
+def count_lines(path: str, start: int = 0) -> int:
+    """Count non-blank lines in path from byte offset start, without keeping them."""
+    total = 0
+    with open_log(path, start) as f:
+        for raw in f:
+            if raw.strip():
+                total += 1
+    return total
+
+
+def iter_json_records(
+    path: str,
+    start: int = 0,
+    encoding: str = "utf-8",
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    max_record_bytes: int = DEFAULT_MAX_RECORD_BYTES,
+    first_line: int = 1,
+    end: Optional[int] = None,
+) -> Iterator[LogRecord]:
+    """
+    Incrementally decode JSON values from path, one LogRecord per top-level value.
+
+    Handles JSONL (one object per line), pretty-printed objects spanning many lines, and
+    several concatenated objects. Lines that are not JSON (plain-text logs) are yielded as
+    their stripped text. Only the record being decoded is held in memory; a record larger
+    than max_record_bytes is treated as text and skipped line by line.
+    Line numbers count from first_line at byte offset start. When end is set, records
+    starting at or after byte offset end are not yielded.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    buf = ""
+    pos = 0
+    offset = start
+    line_no = first_line
+    eof = False
+    want = block_size
+
+    with open_log(path, start) as f:
+
+        def fill(size: int) -> bool:
+            """Append up to size bytes; the consumed prefix of buf is dropped first."""
+            nonlocal buf, pos
+            chunk = f.read(size)
+            buf = buf[pos:] + text_decoder.decode(chunk, final=not chunk)
+            pos = 0
+            return bool(chunk)
+
+        def advance(stop: int) -> None:
+            nonlocal pos, offset, line_no
+            consumed = buf[pos:stop]
+            offset += len(consumed.encode(encoding))
+            line_no += consumed.count("\n")
+            pos = stop
+
+        while True:
+            advance(_WHITESPACE.match(buf, pos).end())
+            if pos == len(buf):
+                if eof:
+                    return
+                eof = not fill(block_size)
+                continue
+            if end is not None and offset >= end:
+                return
+
+            if buf[pos] in _JSON_START:
+                try:
+                    value, stop = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    # Input that stops mid-value fails at the end of the buffer (or inside a
+                    # string running up to it): read more. An error before that is not JSON.
+                    incomplete = e.pos >= len(buf) or e.msg.startswith("Unterminated string")
+                    if incomplete and not eof and len(buf) - pos < max_record_bytes:
+                        eof = not fill(want)
+                        want = min(want * 2, max_record_bytes)
+                        continue
+                else:
+                    yield LogRecord(offset, line_no, value)
+                    advance(stop)
+                    want = block_size
+                    continue
+
+            newline = buf.find("\n", pos)
+            while newline < 0 and not eof:
+                searched = len(buf) - pos
+                eof = not fill(max(block_size, searched))
+                newline = buf.find("\n", pos + searched)
+            stop = len(buf) if newline < 0 else newline + 1
+            yield LogRecord(offset, line_no, buf[pos:stop].strip())
+            advance(stop)
+            want = block_size
+
+
+def log_window(
+    path: str,
+    last_n: Optional[int] = None,
+    preview_lines: int = 50,
+    encoding: str = "utf-8",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Describe the slice of the log the summarizer will look at.
+
+    The window starts at start when given, else at seek_last_lines(path, last_n) when
+    last_n is set, else at 0; it ends at byte offset end (default EOF). Only the preview
+    lines are kept in memory; the rest of the window is counted.
+
+    Returns:
+        {"start_offset": int, "end_offset": int | None, "total_lines": int, "preview": list[str]}
+    """
+    if start is None:
+        start = seek_last_lines(path, last_n) if last_n is not None and last_n > 0 else 0
+    preview: List[str] = []
+    total = 0
+    pos = start
+    with open_log(path, start) as f:
+        for raw in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(raw)
+            if not raw.strip():
+                continue
+            if total < preview_lines:
+                preview.append(raw.decode(encoding).strip())
+            total += 1
+    return {"start_offset": start, "end_offset": end, "total_lines": total, "preview": preview}
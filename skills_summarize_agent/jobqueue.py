@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Lease-based job queue for summarizing a shared log corpus from several workers or hosts.
+
+JobQueue is the backend interface. SQLiteJobQueue stores jobs in one SQLite database
+(WAL mode; every state change is a short BEGIN IMMEDIATE transaction). Each job records:
+- the log path and its content hash; a log whose content is already queued is not added
+  again;
+- the job options;
+- the lease owner and expiry, the last heartbeat, the attempt count and the result or
+  error.
+
+Leases:
+- A worker claims a job under a lease and renews it from a heartbeat thread while the
+  agent runs.
+- On success it completes the job; on failure the job is retried until max_attempts.
+- A worker that crashes stops renewing. Its lease expires and the job is claimed again
+  by another worker.
+- A worker whose lease is lost (renewal refused, or the database unreachable until the
+  lease expired) abandons the run before its next turn and drops its staged writes, so
+  only the worker that now holds the job commits skills for it.
+
+Usage:
+  python -m skills_summarize_agent.jobqueue coordinator --log_dir logs --glob "*.jsonl" --recursive --wait
+  python -m skills_summarize_agent.jobqueue worker
+  python -m skills_summarize_agent.jobqueue worker --exit_when_empty
+  python -m skills_summarize_agent.jobqueue status
+
+All commands use --db (default: SKILL_SUMMARIZER_QUEUE_DB). On several hosts, put it on a
+shared filesystem with working POSIX locks, or swap in another JobQueue backend.
+"""
+import argparse
+import hashlib
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .batch import collect_logs
+from .config import DEFAULT_OUTPUT_DIR, JOB_QUEUE_CONFIG
+
+JOB_STATES = ("pending", "leased", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    log_path TEXT NOT NULL,
+    content_hash TEXT NOT NULL UNIQUE,
+    options TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    heartbeat REAL,
+    enqueued REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, id);
+"""
+
+
+def content_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JobQueue:
+    """
+    Backend interface. Jobs are dicts {"id", "log_path", "content_hash", "options",
+    "priority", "status", "attempts", "lease_owner", "lease_expires", "heartbeat",
+    "enqueued", "started", "finished", "result", "error"}.
+    """
+
+    def enqueue(self, log_path: str, options: Optional[Dict[str, Any]] = None, priority: int = 0) -> Optional[int]:
+        """Add a log; returns the job id, or None when its content is already queued."""
+        raise NotImplementedError
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Lease the next pending job (or one whose lease expired) to owner; None if there is none."""
+        raise NotImplementedError
+
+    def renew(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        """Extend owner's lease and record a heartbeat; False when the lease was lost."""
+        raise NotImplementedError
+
+    def complete(self, job_id: int, owner: str, result: Dict[str, Any]) -> bool:
+        """Mark the job done; False when owner no longer holds the lease."""
+        raise NotImplementedError
+
+    def fail(self, job_id: int, owner: str, error: str) -> bool:
+        """Record a failed attempt: back to pending, or failed once the attempts are used up."""
+        raise NotImplementedError
+
+    def release(self, job_id: int, owner: str) -> bool:
+        """Give the job back without counting the attempt (e.g. on shutdown)."""
+        raise NotImplementedError
+
+    def progress(self) -> Dict[str, Any]:
+        """{"total", "pending", "leased", "done", "failed", "expired"} job counts."""
+        raise NotImplementedError
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """JobQueue in a SQLite database; safe for many processes (one connection per thread)."""
+
+    def __init__(self, path: Optional[str] = None, max_attempts: Optional[int] = None):
+        """
+        Args:
+            path: Database file; default JOB_QUEUE_CONFIG["db"]. Created if missing.
+            max_attempts: Attempts (claims) per job; a job that fails or loses its lease on
+                the last one is marked failed. Default JOB_QUEUE_CONFIG["max_attempts"].
+        """
+        self.path = os.path.abspath(path or JOB_QUEUE_CONFIG["db"])
+        self.max_attempts = max_attempts or JOB_QUEUE_CONFIG["max_attempts"]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    class _Tx:
+        def __init__(self, conn: sqlite3.Connection):
+            self.conn = conn
+
+        def __enter__(self) -> sqlite3.Connection:
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb) -> None:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _transaction(self) -> "SQLiteJobQueue._Tx":
+        return self._Tx(self._conn())
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, log_path: str, options: Optional[Dict[str, Any]] = None, priority: int = 0) -> Optional[int]:
+        digest = content_hash(log_path)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (log_path, content_hash, options, priority, enqueued) VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(log_path), digest, json.dumps(options or {}), priority, time.time()),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases whose attempts are used up are failed, not handed out again.
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, lease_owner = NULL, "
+                "error = COALESCE(error, 'lease expired') || ' (attempts exhausted)' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, heartbeat = ?, "
+                "started = ?, attempts = attempts + 1 WHERE id = ?",
+                (owner, now + lease_seconds, now, now, row["id"]),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return self._job(row)
+
+    def _update_leased(self, job_id: int, owner: str, assignments: str, params: tuple) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                params + (job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        return self._update_leased(job_id, owner, "lease_expires = ?, heartbeat = ?", (now + lease_seconds, now))
+
+    def complete(self, job_id: int, owner: str, result: Dict[str, Any]) -> bool:
+        return self._update_leased(
+            job_id, owner, "status = 'done', finished = ?, lease_owner = NULL, result = ?, error = NULL",
+            (time.time(), json.dumps(result, ensure_ascii=False, default=str)),
+        )
+
+    def fail(self, job_id: int, owner: str, error: str) -> bool:
+        max_attempts = self.max_attempts
+        return self._update_leased(
+            job_id, owner,
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "finished = CASE WHEN attempts >= ? THEN ? ELSE NULL END, lease_owner = NULL, error = ?",
+            (max_attempts, max_attempts, time.time(), error),
+        )
+
+    def release(self, job_id: int, owner: str) -> bool:
+        return self._update_leased(
+            job_id, owner, "status = 'pending', lease_owner = NULL, attempts = attempts - 1", ()
+        )
+
+    def progress(self) -> Dict[str, Any]:
+        counts = {state: 0 for state in JOB_STATES}
+        conn = self._conn()
+        for row in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        counts["expired"] = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'leased' AND lease_expires < ?", (time.time(),)
+        ).fetchone()[0]
+        counts["total"] = sum(counts[state] for state in JOB_STATES)
+        return counts
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        conn = self._conn()
+        if status is None:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [self._job(row) for row in rows]
+
+
+def enqueue_tree(
+    queue: JobQueue,
+    log_dir: str,
+    pattern: str = "*",
+    recursive: bool = True,
+    options: Optional[Dict[str, Any]] = None,
+    priority: int = 0,
+) -> Dict[str, int]:
+    """Coordinator: enqueue every matching log under log_dir; returns {"found", "enqueued", "duplicates"}."""
+    paths = collect_logs(log_dir, pattern, recursive=recursive)
+    enqueued = sum(1 for path in paths if queue.enqueue(path, options=options, priority=priority) is not None)
+    return {"found": len(paths), "enqueued": enqueued, "duplicates": len(paths) - enqueued}
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Renews a job's lease every lease_seconds / 3 until stopped. The lease is lost when a
+    renewal is refused, or when database errors last until the lease has expired; lost_event
+    is then set so the running job can be abandoned.
+    """
+
+    def __init__(self, queue: JobQueue, job_id: int, owner: str, lease_seconds: float):
+        super().__init__(name=f"lease-{job_id}", daemon=True)
+        self.queue, self.job_id, self.owner, self.lease_seconds = queue, job_id, owner, lease_seconds
+        self.lost_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    @property
+    def lost(self) -> bool:
+        return self.lost_event.is_set()
+
+    def run(self) -> None:
+        expires = time.time() + self.lease_seconds
+        wait = self.lease_seconds / 3
+        while not self._stop_event.wait(wait):
+            try:
+                renewed = self.queue.renew(self.job_id, self.owner, self.lease_seconds)
+            except sqlite3.Error:
+                if time.time() >= expires:
+                    self.lost_event.set()
+                    return
+                # Retry sooner than the renewal period while the lease is still ours.
+                wait = max(0.1, min(self.lease_seconds / 3, (expires - time.time()) / 4))
+                continue
+            if not renewed:
+                self.lost_event.set()
+                return
+            expires = time.time() + self.lease_seconds
+            wait = self.lease_seconds / 3
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def run_worker(
+    queue: JobQueue,
+    owner: Optional[str] = None,
+    lease_seconds: Optional[float] = None,
+    poll_interval: Optional[float] = None,
+    exit_when_empty: bool = False,
+    llm_client: Any = None,
+    stop: Optional[threading.Event] = None,
+    on_job: Optional[Any] = None,
+) -> Dict[str, int]:
+    """
+    Worker loop: claim a job, summarize its log under a renewed lease, record the outcome.
+
+    Args:
+        queue: Job queue backend.
+        owner: Lease owner id; default "<host>:<pid>:<random>".
+        lease_seconds: Lease length; default JOB_QUEUE_CONFIG["lease_seconds"].
+        poll_interval: Wait between claims when the queue is empty; default
+            JOB_QUEUE_CONFIG["poll_interval"].
+        exit_when_empty: Return once nothing is pending or leased instead of polling.
+        llm_client: OpenAI-compatible client shared by all jobs; built once if None.
+        stop: Event that ends the loop after the current job.
+        on_job: Optional callback with each finished job dict (plus "outcome").
+
+    Returns:
+        {"done": int, "failed": int, "lost": int} for this worker.
+    """
+    from .skill_summarizer_agent import build_openai_client, summarize_skills_from_log
+
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    lease_seconds = lease_seconds or JOB_QUEUE_CONFIG["lease_seconds"]
+    poll_interval = JOB_QUEUE_CONFIG["poll_interval"] if poll_interval is None else poll_interval
+    stop = stop or threading.Event()
+    client = llm_client if llm_client is not None else build_openai_client()
+    counts = {"done": 0, "failed": 0, "lost": 0}
+
+    while not stop.is_set():
+        job = queue.claim(owner, lease_seconds)
+        if job is None:
+            progress = queue.progress()
+            if exit_when_empty and progress["pending"] == 0 and progress["leased"] == 0:
+                break
+            stop.wait(poll_interval)
+            continue
+        heartbeat = _Heartbeat(queue, job["id"], owner, lease_seconds)
+        heartbeat.start()
+        options = job["options"]
+        try:
+            result = summarize_skills_from_log(
+                job["log_path"],
+                project_root=options.get("project_root") or os.path.dirname(job["log_path"]),
+                output_root=options.get("output_root") or DEFAULT_OUTPUT_DIR,
+                last_n=options.get("last_n"),
+                digest=bool(options.get("digest")),
+                llm_client=client,
+                cancel=heartbeat.lost_event,
+            )
+            # A run stopped by its budget has committed its skills: complete it, do not retry.
+            ok = result.get("success") or result.get("partial")
+            error = None if ok else (result.get("error") or result.get("final_response") or "run failed")
+        except BaseException as e:
+            heartbeat.stop()
+            if not isinstance(e, Exception):
+                # Interrupted: hand the job back to the queue untouched.
+                queue.release(job["id"], owner)
+                raise
+            result, error = None, f"{type(e).__name__}: {e}"
+        heartbeat.stop()
+
+        if heartbeat.lost:
+            outcome = "lost"
+        elif error is None:
+            summary = {
+                "success": bool(result.get("success")),
+                "partial": bool(result.get("partial")),
+                "stopped": result.get("stopped"),
+                "skipped": bool(result.get("skipped")),
+                "tool_calls": len(result.get("tool_calls", [])),
+                "writes": {k: v for k, v in (result.get("writes") or {}).items() if k != "files"},
+                "final_response": (result.get("final_response") or "")[:2000],
+            }
+            outcome = "done" if queue.complete(job["id"], owner, summary) else "lost"
+        else:
+            outcome = "failed" if queue.fail(job["id"], owner, str(error)[:2000]) else "lost"
+        counts[outcome] += 1
+        if on_job is not None:
+            on_job(dict(job, outcome=outcome, error=error))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lease-based job queue for summarizing a log corpus with many workers.")
+    parser.add_argument("--db", type=str, default=None, help="Queue database; default: SKILL_SUMMARIZER_QUEUE_DB.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    coord = sub.add_parser("coordinator", help="Enqueue a directory tree of logs and report progress.")
+    coord.add_argument("--log_dir", type=str, required=True, help="Directory of logs to enqueue.")
+    coord.add_argument("--glob", type=str, default="*", help="Filename pattern; default: *.")
+    coord.add_argument("--recursive", action="store_true", help="Also match --glob in subdirectories.")
+    coord.add_argument("--project_root", type=str, default=None, help="Root for reading; default: each log's directory.")
+    coord.add_argument("--output_dir", type=str, default=None, help="Root for generated SKILLs; default: package default.")
+    coord.add_argument("--last", type=int, default=None, help="Use only the last N lines of each log.")
+    coord.add_argument("--digest", action="store_true", help="Send compact pre-digested logs.")
+    coord.add_argument("--priority", type=int, default=0, help="Lower runs first; default: 0.")
+    coord.add_argument("--wait", action="store_true", help="Report progress until every job is done or failed.")
+    coord.add_argument("--interval", type=float, default=5.0, help="Seconds between progress reports; default: 5.")
+
+    worker = sub.add_parser("worker", help="Claim and summarize jobs until stopped.")
+    worker.add_argument("--lease", type=float, default=None, help="Lease seconds; default: SKILL_SUMMARIZER_QUEUE_LEASE (300).")
+    worker.add_argument("--max_attempts", type=int, default=None, help="Attempts per job; default: SKILL_SUMMARIZER_QUEUE_MAX_ATTEMPTS (3).")
+    worker.add_argument("--exit_when_empty", action="store_true", help="Exit once no job is pending or leased.")
+
+    sub.add_parser("status", help="Print job counts and failed jobs.")
+    args = parser.parse_args()
+
+    queue = SQLiteJobQueue(args.db, max_attempts=getattr(args, "max_attempts", None))
+    if args.command == "coordinator":
+        options = {
+            "project_root": os.path.abspath(args.project_root) if args.project_root else None,
+            "output_root": os.path.abspath(args.output_dir) if args.output_dir else None,
+            "last_n": args.last,
+            "digest": args.digest,
+        }
+        stats = enqueue_tree(queue, args.log_dir, args.glob, recursive=args.recursive, options=options, priority=args.priority)
+        print(f"[INFO] Queue: {queue.path}")
+        print(f"[INFO] Found {stats['found']} log(s): {stats['enqueued']} enqueued, {stats['duplicates']} already queued.")
+        while True:
+            p = queue.progress()
+            print(
+                f"[PROGRESS] {p['done']}/{p['total']} done, {p['failed']} failed, {p['leased']} leased "
+                f"({p['expired']} expired), {p['pending']} pending",
+                flush=True,
+            )
+            if not args.wait or p["pending"] + p["leased"] == 0:
+                return 1 if p["failed"] else 0
+            time.sleep(args.interval)
+
+    if args.command == "status":
+        p = queue.progress()
+        print(json.dumps(p))
+        for job in queue.jobs("failed"):
+            print(f"[FAILED] {job['log_path']} ({job['attempts']} attempt(s)): {job['error']}")
+        return 0
+
+    stop = threading.Event()
+
+    def on_signal(signum, frame):
+        print("[INFO] Stopping after the current job.", flush=True)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, on_signal)
+
+    def report(job):
+        detail = f": {job['error']}" if job["error"] else ""
+        print(f"[{job['outcome'].upper()}] {job['log_path']} (attempt {job['attempts']}){detail}", flush=True)
+
+    counts = run_worker(
+        queue, lease_seconds=args.lease, exit_when_empty=args.exit_when_empty, stop=stop, on_job=report,
+    )
+    print(f"[INFO] Worker finished: {counts['done']} done, {counts['failed']} failed, {counts['lost']} lost lease(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
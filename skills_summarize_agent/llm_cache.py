@@ -0,0 +1,302 @@
+"""
+Content-addressed on-disk cache for LLM chat completions.
+
+CachedLLMClient wraps any OpenAI-compatible client and plugs into the existing llm_client
+injection point of SkillSummarizerAgent / summarize_skills_from_log. Requests are keyed on
+a SHA-256 of model, messages, tools and sampling parameters; responses are stored as JSON
+under cache_dir/<key[:2]>/<key>.json with size- and age-based eviction.
+
+Modes:
+- "read-write": serve hits from disk, call the inner client on a miss and store the result.
+- "read-only": serve hits, call the inner client on a miss without storing. With no inner
+  client, a miss raises LLMCacheMiss (deterministic offline replay).
+- "bypass": always call the inner client; the cache is neither read nor written.
+
+Prompts embed the absolute output_root and project_root (system message, task message,
+tool arguments and results). Inside cache_roots (entered by SkillSummarizerAgent for each
+run) those roots are replaced by placeholders in the key and in the stored response, and
+the response is restored with the current roots on a hit. A rerun into another output
+directory or from another checkout therefore still hits the cache.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple
+
+from .config import LLM_CACHE_CONFIG
+
+CACHE_MODES = ("read-write", "read-only", "bypass")
+
+# Request fields that do not change the completion and are left out of the key.
+_UNKEYED_FIELDS = ("stream", "stream_options", "timeout", "extra_headers", "user")
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in read-only mode without an inner client when a request is not cached."""
+
+
+_Roots = Tuple[Tuple[str, str, Pattern], ...]
+_roots: ContextVar[_Roots] = ContextVar("llm_cache_roots", default=())
+
+
+@contextlib.contextmanager
+def cache_roots(roots: Dict[str, str]) -> Iterator[None]:
+    """
+    Key and store the requests made in this context (thread) with directory paths
+    replaced by placeholders, e.g. {"<output_root>": "/abs/output"}.
+    """
+    pairs = []
+    for placeholder, path in roots.items():
+        path = os.path.abspath(path)
+        # Only whole paths: /data must not match inside /database.
+        pairs.append((placeholder, path, re.compile(re.escape(path) + r"(?![\w.-])")))
+    pairs.sort(key=lambda item: -len(item[1]))
+    token = _roots.set(tuple(pairs))
+    try:
+        yield
+    finally:
+        _roots.reset(token)
+
+
+def _map_strings(data: Any, fn: Any) -> Any:
+    if isinstance(data, str):
+        return fn(data)
+    if isinstance(data, dict):
+        return {k: _map_strings(v, fn) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_map_strings(v, fn) for v in data]
+    return data
+
+
+def _to_placeholders(data: Any, roots: _Roots) -> Any:
+    def sub(text: str) -> str:
+        for placeholder, _, pattern in roots:
+            text = pattern.sub(lambda m: placeholder, text)
+        return text
+
+    return _map_strings(data, sub) if roots else data
+
+
+def _from_placeholders(data: Any, roots: _Roots) -> Any:
+    def sub(text: str) -> str:
+        for placeholder, path, _ in roots:
+            text = text.replace(placeholder, path)
+        return text
+
+    return _map_strings(data, sub) if roots else data
+
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form of the keyed request fields."""
+    keyed = {k: v for k, v in kwargs.items() if k not in _UNKEYED_FIELDS}
+    canonical = json.dumps(keyed, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _to_data(obj: Any) -> Any:
+    """Convert a response object (pydantic model or plain object) to JSON-able data."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, dict):
+        return {k: _to_data(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_data(v) for v in obj]
+    if hasattr(obj, "__dict__"):
+        return {k: _to_data(v) for k, v in vars(obj).items() if not k.startswith("_")}
+    return obj
+
+
+def _to_object(data: Any) -> Any:
+    """Rebuild attribute access (response.choices[0].message...) from stored data."""
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: _to_object(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return [_to_object(v) for v in data]
+    return data
+
+
+class LLMCache:
+    """On-disk response store with LRU-by-mtime eviction by total size and max age."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        """
+        Args:
+            cache_dir: Directory for cache entries (created if missing).
+            max_bytes: Evict least recently used entries above this total size; None/0 = unbounded.
+            max_age: Entries older than this many seconds are treated as misses and removed;
+                None/0 = never expire.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes or 0
+        self.max_age = max_age or 0
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _entries(self) -> List[str]:
+        paths = []
+        for sub in os.listdir(self.cache_dir):
+            sub_dir = os.path.join(self.cache_dir, sub)
+            if os.path.isdir(sub_dir):
+                paths.extend(os.path.join(sub_dir, n) for n in os.listdir(sub_dir) if n.endswith(".json"))
+        return paths
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(p) for p in self._entries())
+            return self._size
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return stored response data for key, or None on a miss / expired entry."""
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+            if self.max_age and time.time() - st.st_mtime > self.max_age:
+                self._remove(path, st.st_size)
+                self.misses += 1
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["response"]
+
+    def put(self, key: str, response: Any, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Store response data for key (atomic rename), then evict down to max_bytes."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"key": key, "created": time.time(), "meta": meta or {}, "response": response}
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        # Size the cache before the new entry lands so it is counted exactly once.
+        self.total_bytes()
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._size += size - old_size
+        if self.max_bytes and self._size > self.max_bytes:
+            self.evict()
+
+    def _remove(self, path: str, size: int) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones until under max_bytes."""
+        now = time.time()
+        stats = []
+        for path in self._entries():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats.append((st.st_mtime, st.st_size, path))
+        stats.sort()
+        total = sum(size for _, size, _ in stats)
+        removed = 0
+        for mtime, size, path in stats:
+            expired = self.max_age and now - mtime > self.max_age
+            if not expired and (not self.max_bytes or total <= self.max_bytes):
+                continue
+            self._remove(path, size)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._size = total
+        return removed
+
+
+class _Completions:
+    def __init__(self, owner: "CachedLLMClient"):
+        self._owner = owner
+
+    def create(self, **kwargs: Any) -> Any:
+        return self._owner._create(kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: "CachedLLMClient"):
+        self.completions = _Completions(owner)
+
+
+class CachedLLMClient:
+    """
+    OpenAI-compatible client wrapper that caches chat.completions.create on disk.
+
+    Streaming requests (stream=True) always pass through uncached.
+    """
+
+    def __init__(
+        self,
+        inner: Any = None,
+        cache: Optional[LLMCache] = None,
+        cache_dir: Optional[str] = None,
+        mode: str = "read-write",
+    ):
+        """
+        Args:
+            inner: Wrapped OpenAI-compatible client; may be None for offline replay (read-only).
+            cache: LLMCache to use; built from cache_dir and LLM_CACHE_CONFIG limits if None.
+            cache_dir: Cache directory when cache is None; default LLM_CACHE_CONFIG["dir"].
+            mode: "read-write", "read-only" or "bypass".
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Invalid cache mode: {mode} (use one of {', '.join(CACHE_MODES)})")
+        if cache is None:
+            cache = LLMCache(
+                cache_dir or LLM_CACHE_CONFIG["dir"],
+                max_bytes=LLM_CACHE_CONFIG["max_bytes"],
+                max_age=LLM_CACHE_CONFIG["max_age"],
+            )
+        self.inner = inner
+        self.cache = cache
+        self.mode = mode
+        self.chat = _Chat(self)
+
+    def _create(self, kwargs: Dict[str, Any]) -> Any:
+        if self.mode == "bypass" or kwargs.get("stream"):
+            return self._call_inner(kwargs)
+        roots = _roots.get()
+        key = request_key(_to_placeholders(kwargs, roots))
+        data = self.cache.get(key)
+        if data is not None:
+            return _to_object(_from_placeholders(data, roots))
+        if self.inner is None:
+            raise LLMCacheMiss(f"No cached completion for request {key[:12]} and no inner client")
+        response = self._call_inner(kwargs)
+        if self.mode == "read-write":
+            self.cache.put(key, _to_placeholders(_to_data(response), roots), meta={"model": kwargs.get("model")})
+        return response
+
+    def _call_inner(self, kwargs: Dict[str, Any]) -> Any:
+        if self.inner is None:
+            raise LLMCacheMiss("Cache bypassed and no inner client configured")
+        return self.inner.chat.completions.create(**kwargs)
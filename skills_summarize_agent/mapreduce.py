@@ -0,0 +1,359 @@
+"""
+Map-reduce summarization for logs larger than the model context.
+
+- shard_log: stream records, digest them, and pack them into shards under a token budget,
+  cutting preferably at task_id boundaries (a record larger than the budget is split at
+  entry boundaries). Each shard is digested with fresh stages, so its <dup ref:...>
+  markers only point at text in the same shard.
+- map phase: one tool-less LLM call per shard (in parallel) extracts candidate workflows
+  as JSON. Shards are produced as the map calls free up, so only about two per worker
+  are held in memory.
+- reduce phase: merge_candidates groups candidates by name / step overlap, then a single
+  SkillSummarizerAgent run writes the final SKILL.md files from the merged list.
+"""
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+
+from openai import OpenAI
+
+from .config import DEFAULT_OUTPUT_DIR, MAP_REDUCE_CONFIG, OPENAI_CONFIG
+from .digest import Stage, default_stages, estimate_tokens, flatten_record, render_entry
+from .history import HistoryPolicy
+from .ingest import iter_json_records, seek_last_lines
+from .skill_summarizer_agent import SkillSummarizerAgent
+
+MAP_SYSTEM_PROMPT = """You extract candidate reusable workflows from one shard of an agent execution log.
+Lines are "[ref] {fields}" entries; refs point back to the original log.
+Return only JSON: {"candidates": [{"name": "kebab-case-gerund-name", "description": "third person, with trigger phrases",
+"steps": ["short imperative step", ...], "tools": ["tool or endpoint", ...], "succeeded": true|false,
+"evidence": ["ref", ...]}]}.
+Only include multi-step workflows that reached their goal or clearly could be reused; return {"candidates": []} otherwise."""
+
+_STEP_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _task_key(value: Any, index: int) -> str:
+    if isinstance(value, dict):
+        for key in ("task_id", "group_id", "query"):
+            if value.get(key):
+                return str(value[key])
+    return f"record-{index}"
+
+
+def _render(entry: Dict[str, Any], stages: List[Stage]) -> Optional[str]:
+    """Entry rendered after the digest stages, or None when they leave nothing of it."""
+    entries: Iterator[Dict[str, Any]] = iter([dict(entry)])
+    for stage in stages:
+        entries = stage(entries)
+    for e in entries:
+        if e["fields"] or not e["path"]:
+            return render_entry(e)
+    return None
+
+
+def shard_log(
+    path: str,
+    shard_tokens: Optional[int] = None,
+    start: int = 0,
+    stage_factory: Optional[Callable[[], List[Stage]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield shards of the digested log, each within shard_tokens estimated tokens.
+
+    stage_factory (default digest.default_stages) is called once per shard: stage state
+    such as dedupe_content's seen texts never crosses a shard boundary.
+
+    Each shard: {"index": int, "text": str, "tokens": int, "task_ids": list[str],
+    "refs": [first_ref, last_ref], "offset": int, "ref_index": dict[ref, {"offset", "line",
+    "path"}]} (offset of the first record; ref_index locates each rendered ref in the log,
+    as digest_log's index does).
+    """
+    budget = shard_tokens or MAP_REDUCE_CONFIG["shard_tokens"]
+    stage_factory = stage_factory or default_stages
+    stages = stage_factory()
+    lines: List[str] = []
+    tokens = 0
+    tasks: List[str] = []
+    refs: List[str] = []
+    index: Dict[str, Dict[str, Any]] = {}
+    shard_offset = start
+    count = 0
+
+    def emit() -> Dict[str, Any]:
+        nonlocal lines, tokens, tasks, refs, index, count, stages
+        shard = {
+            "index": count,
+            "text": "\n".join(lines),
+            "tokens": tokens,
+            "task_ids": tasks,
+            "refs": [refs[0], refs[-1]],
+            "offset": shard_offset,
+            "ref_index": index,
+        }
+        count += 1
+        lines, tokens, tasks, refs, index = [], 0, [], [], {}
+        stages = stage_factory()
+        return shard
+
+    for i, record in enumerate(iter_json_records(path, start=start)):
+        entries = list(flatten_record(i, record.offset, record.line, record.value))
+        rendered = [_render(e, stages) for e in entries]
+        record_tokens = sum(estimate_tokens(line) for line in rendered if line is not None)
+        task = _task_key(record.value, i)
+
+        task_changed = bool(tasks) and task != tasks[-1]
+        if lines and (tokens + record_tokens > budget or (task_changed and tokens >= budget // 2)):
+            yield emit()
+            rendered = [_render(e, stages) for e in entries]
+        if not lines:
+            shard_offset = record.offset
+        if task not in tasks:
+            tasks.append(task)
+        for j, entry in enumerate(entries):
+            line = rendered[j]
+            if line is None:
+                continue
+            line_tokens = estimate_tokens(line)
+            if lines and tokens + line_tokens > budget:
+                # Split inside the record: the rest of it is digested for the new shard.
+                yield emit()
+                shard_offset = record.offset
+                tasks.append(task)
+                rendered[j:] = [_render(e, stages) for e in entries[j:]]
+                line = rendered[j]
+                if line is None:
+                    continue
+                line_tokens = estimate_tokens(line)
+            lines.append(line)
+            refs.append(entry["ref"])
+            index[entry["ref"]] = {"offset": entry["offset"], "line": entry["line"], "path": entry["path"]}
+            tokens += line_tokens
+    if lines:
+        yield emit()
+
+
+def _parse_candidates(text: str) -> List[Dict[str, Any]]:
+    """Parse the map-phase JSON reply; tolerate surrounding prose or code fences."""
+    if not text:
+        return []
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return []
+    try:
+        data = json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return []
+    candidates = data.get("candidates", []) if isinstance(data, dict) else []
+    return [c for c in candidates if isinstance(c, dict) and c.get("name")]
+
+
+def _locate(ref_index: Dict[str, Dict[str, Any]], ref: Any) -> Optional[Dict[str, Any]]:
+    """Location of an evidence ref ("r3.messages[1]" or "[r3]"), falling back to its record."""
+    key = str(ref).strip("[] ")
+    return ref_index.get(key) or ref_index.get(key.split(".", 1)[0])
+
+
+def map_shard(
+    shard: Dict[str, Any],
+    llm_client: OpenAI,
+    llm_model: str,
+) -> Dict[str, Any]:
+    """
+    Map phase for one shard: ask the model for candidate workflows (no tools).
+
+    Returns:
+        {"shard": int, "candidates": list[dict], "locations": dict[ref, {"offset", "line"}],
+         "error": str | None} (locations of the evidence refs the candidates cite)
+    """
+    try:
+        response = llm_client.chat.completions.create(
+            model=llm_model,
+            messages=[
+                {"role": "system", "content": MAP_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Log shard {shard['index']} (tasks: {', '.join(shard['task_ids'])}):\n\n{shard['text']}"},
+            ],
+            response_format={"type": "json_object"},
+            temperature=OPENAI_CONFIG.get("temperature", 0.3),
+            max_completion_tokens=OPENAI_CONFIG.get("max_tokens", 4096),
+        )
+        text = response.choices[0].message.content or ""
+        candidates = _parse_candidates(text)
+        locations: Dict[str, Dict[str, Any]] = {}
+        for c in candidates:
+            c["shards"] = [shard["index"]]
+            evidence = c.get("evidence")
+            for ref in evidence if isinstance(evidence, list) else []:
+                loc = _locate(shard.get("ref_index", {}), ref)
+                if loc is not None:
+                    locations[str(ref)] = {"offset": loc["offset"], "line": loc["line"]}
+        return {"shard": shard["index"], "candidates": candidates, "locations": locations, "error": None}
+    except Exception as e:
+        return {"shard": shard["index"], "candidates": [], "locations": {}, "error": f"{type(e).__name__}: {e}"}
+
+
+def _kebab(name: str) -> str:
+    return "-".join(_STEP_WORD_RE.findall(name.lower()))[:64]
+
+
+def _step_words(candidate: Dict[str, Any]) -> set:
+    words = set()
+    for step in candidate.get("steps") or []:
+        words.update(_STEP_WORD_RE.findall(str(step).lower()))
+    for tool in candidate.get("tools") or []:
+        words.add(str(tool).lower())
+    return words
+
+
+def merge_candidates(
+    candidates: List[Dict[str, Any]],
+    similarity: float = 0.6,
+) -> List[Dict[str, Any]]:
+    """
+    Reduce phase (local): merge candidates with the same kebab-case name or whose
+    step/tool vocabularies overlap by at least similarity (Jaccard).
+
+    Merged candidates keep the longest description and step list, union tools, evidence
+    and shards, and count support (how many candidates were merged) and successes.
+    Sorted by support, descending.
+    """
+    merged: List[Dict[str, Any]] = []
+    vocab: List[set] = []
+    for cand in candidates:
+        name = _kebab(str(cand.get("name", "")))
+        words = _step_words(cand)
+        target = None
+        for i, existing in enumerate(merged):
+            if existing["name"] == name:
+                target = i
+                break
+            union = words | vocab[i]
+            if union and len(words & vocab[i]) / len(union) >= similarity:
+                target = i
+                break
+        if target is None:
+            merged.append({
+                "name": name,
+                "description": cand.get("description", ""),
+                "steps": list(cand.get("steps") or []),
+                "tools": list(dict.fromkeys(cand.get("tools") or [])),
+                "evidence": list(dict.fromkeys(cand.get("evidence") or [])),
+                "shards": list(cand.get("shards") or []),
+                "support": 1,
+                "successes": 1 if cand.get("succeeded") else 0,
+            })
+            vocab.append(words)
+            continue
+        m = merged[target]
+        if len(cand.get("description") or "") > len(m["description"]):
+            m["description"] = cand["description"]
+        if len(cand.get("steps") or []) > len(m["steps"]):
+            m["steps"] = list(cand["steps"])
+        m["tools"] = list(dict.fromkeys(m["tools"] + list(cand.get("tools") or [])))
+        m["evidence"] = list(dict.fromkeys(m["evidence"] + list(cand.get("evidence") or [])))
+        m["shards"] = sorted(set(m["shards"]) | set(cand.get("shards") or []))
+        m["support"] += 1
+        m["successes"] += 1 if cand.get("succeeded") else 0
+        vocab[target] |= words
+    merged.sort(key=lambda m: (-m["support"], -m["successes"], m["name"]))
+    return merged
+
+
+def summarize_skills_map_reduce(
+    log_path: str,
+    project_root: Optional[str] = None,
+    output_root: Optional[str] = None,
+    last_n: Optional[int] = None,
+    shard_tokens: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    llm_client: Optional[OpenAI] = None,
+    digest_stage_factory: Optional[Callable[[], List[Stage]]] = None,
+    history_policy: Union[str, HistoryPolicy, None] = None,
+) -> Dict[str, Any]:
+    """
+    SDK entry point: map-reduce summarization for logs that do not fit one conversation.
+
+    Args:
+        log_path: Path to the log file (relative to project_root or absolute; any extension).
+        project_root: Root for reading; defaults to current working directory.
+        output_root: Root for writing generated SKILLs; defaults to package default.
+        last_n: Use only the last N lines of the log; None = use all.
+        shard_tokens: Estimated-token budget per shard; default MAP_REDUCE_CONFIG["shard_tokens"].
+        concurrency: Parallel map calls; default MAP_REDUCE_CONFIG["concurrency"].
+        llm_client: OpenAI-compatible client; built from OPENAI_CONFIG if None.
+        digest_stage_factory: Returns a fresh digest pipeline; called once per shard; default
+            digest.default_stages.
+        history_policy: Context-window policy for the reduce agent run (see history.py).
+
+    Returns:
+        {"success": bool, "message": str, "tool_calls": list, "final_response": str | None,
+         "shards": int, "candidates": list[dict], "map_errors": list[str]}
+    """
+    project_root = os.path.abspath(project_root or os.getcwd())
+    output_root = os.path.abspath(output_root or DEFAULT_OUTPUT_DIR)
+    abs_log = log_path if os.path.isabs(log_path) else os.path.join(project_root, log_path)
+    if not os.path.isfile(abs_log):
+        return {
+            "success": False,
+            "message": "",
+            "tool_calls": [],
+            "final_response": f"Log file not found: {abs_log}",
+            "shards": 0,
+            "candidates": [],
+            "map_errors": [],
+        }
+
+    agent = SkillSummarizerAgent(
+        project_root=project_root, output_root=output_root, llm_client=llm_client, history_policy=history_policy
+    )
+    start = seek_last_lines(abs_log, last_n) if last_n is not None and last_n > 0 else 0
+    workers = max(1, concurrency or MAP_REDUCE_CONFIG["concurrency"])
+
+    mapped: List[Dict[str, Any]] = []
+    pending: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for shard in shard_log(abs_log, shard_tokens=shard_tokens, start=start, stage_factory=digest_stage_factory):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                mapped.extend(f.result() for f in done)
+            pending.add(pool.submit(map_shard, shard, agent.llm_client, agent.llm_model))
+        mapped.extend(f.result() for f in pending)
+    mapped.sort(key=lambda m: m["shard"])
+
+    candidates = merge_candidates([c for m in mapped for c in m["candidates"]])
+    map_errors = [f"shard {m['shard']}: {m['error']}" for m in mapped if m["error"]]
+    base = {"shards": len(mapped), "candidates": candidates, "map_errors": map_errors}
+    if not candidates:
+        return dict(
+            base,
+            success=not map_errors,
+            message="",
+            tool_calls=[],
+            final_response="No reusable workflow candidates found in any shard.",
+        )
+
+    cited = {str(ref) for c in candidates for ref in c.get("evidence") or []}
+    locations = {ref: loc for m in mapped for ref, loc in m["locations"].items() if ref in cited}
+    if locations:
+        evidence_note = (
+            'Evidence locations map each ref to the byte offset and line of its record in the log; only if you need '
+            f'detail, read that record with read_file("{log_path}", unit="bytes", offset=<offset>, limit=...).'
+        )
+        evidence_block = f"\n\nEvidence locations:\n{json.dumps(locations, ensure_ascii=False)}"
+    else:
+        evidence_note = "The refs are labels from the digested shards and cannot be read back from the log."
+        evidence_block = ""
+
+    user_message = f"""Write SKILL.md files for the reusable workflows below, following the summarizing-new-skills spec.
+
+They were extracted from {len(mapped)} shard(s) of the log {log_path} and merged; "support" is how many shards/runs showed the workflow, "evidence" lists the [ref]s that showed it. {evidence_note}
+
+---
+{json.dumps(candidates, ensure_ascii=False, indent=1)}{evidence_block}
+---
+
+Check each candidate with find_similar_skills (library: {output_root}) to avoid duplicates, skip one-off or trivial candidates, then write_file new SKILL.md(s)."""
+
+    return dict(base, **agent.run(user_message))
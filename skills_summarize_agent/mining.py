@@ -0,0 +1,408 @@
+"""
+Cross-log workflow mining: find repeated action sequences locally, summarize once per workflow.
+
+- abstract_actions: normalize one run (a log record) into a sequence of abstracted
+  actions "role|operation|host". Ids and numbers are masked, and consecutive repeats
+  collapse to "action+".
+- frequent_ngrams: frequent contiguous action runs (n-grams), counted once per distinct
+  sequence in a single pass. Only closed patterns are kept, i.e. patterns with no longer
+  n-gram of the same support, and at most max_patterns of them.
+- cluster_runs: group runs whose action-bigram sets overlap by at least similarity
+  (Jaccard, greedy leader clustering; identical sequences are grouped first).
+- mine_workflows: all of the above over a corpus. Each cluster gets support statistics
+  and one representative run (the medoid, preferring successful runs).
+- summarize_workflow_clusters: one SkillSummarizerAgent run per cluster on its
+  representative, with the cluster statistics in the task message.
+
+Mining is linear in the corpus for parsing and clustering against a small set of
+leaders; LLM calls grow only with the number of distinct workflows.
+"""
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from openai import OpenAI
+
+from .config import DEFAULT_OUTPUT_DIR, MINING_CONFIG
+from .history import HistoryPolicy
+from .ingest import iter_json_records, log_window
+from .skill_summarizer_agent import SkillSummarizerAgent, build_openai_client, build_user_message
+from .triage import score_record
+
+# List fields holding the steps of a run, and item keys naming the operation
+_STEP_LIST_KEYS = ("api_call_history", "tool_calls", "actions", "steps", "conversation", "messages", "trajectory")
+_OP_KEYS = ("endpoint", "tool", "tool_name", "action", "command")
+_ROLE_KEYS = ("sender", "agent", "name", "role")
+_URL_RE = re.compile(r"https?://([^/\s'\"`<>()\[\]]+)")
+_VERB_RE = re.compile(r"^\W*i\s+([a-z]+)", re.IGNORECASE)
+_CODE_RE = re.compile(r"```\s*(python|py|sh|bash|shell)\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def _step_lists(value: Any, depth: int = 2) -> Iterator[list]:
+    if not isinstance(value, dict):
+        return
+    for key, item in value.items():
+        if key.lower() in _STEP_LIST_KEYS and isinstance(item, list):
+            yield item
+        elif depth > 1 and isinstance(item, dict):
+            yield from _step_lists(item, depth - 1)
+
+
+def _action(item: Any) -> Optional[str]:
+    """Abstract one step: "role|operation|host" (missing parts left out), or None."""
+    role = op = host = None
+    content = item
+    if isinstance(item, dict):
+        for key in _OP_KEYS:
+            if isinstance(item.get(key), str) and item[key]:
+                op = item[key]
+                break
+        function = item.get("function")
+        if op is None and isinstance(function, dict) and function.get("name"):
+            op = str(function["name"])
+        for key in _ROLE_KEYS:
+            value = item.get(key)
+            if isinstance(value, str) and value and value.lower() not in ("unknown", "user", "system", "assistant"):
+                role = value
+                break
+        content = item.get("content")
+        params = item.get("params") or item.get("arguments")
+        if host is None and params is not None:
+            match = _URL_RE.search(str(params)[:500])
+            host = match.group(1).lower() if match else None
+    if isinstance(content, list):
+        content = " ".join(str(c) for c in content[:1])
+    if isinstance(content, str):
+        head = content[:500]
+        if op is None:
+            code = _CODE_RE.search(head)
+            verb = _VERB_RE.match(head.lstrip("['\""))
+            if code:
+                op = f"code:{code.group(1).lower()}"
+            elif verb:
+                op = verb.group(1).lower()
+        if op is not None and host is None:
+            match = _URL_RE.search(head)
+            host = match.group(1).lower() if match else None
+    if op is None:
+        return None
+    op = _NUMBER_RE.sub("#", op)
+    return "|".join(part for part in (role, op, host) if part)
+
+
+def abstract_actions(value: Any) -> List[str]:
+    """The run's abstracted action sequence; consecutive repeats collapse to "action+"."""
+    actions: List[str] = []
+    for steps in _step_lists(value):
+        for item in steps:
+            action = _action(item)
+            if action is None:
+                continue
+            if actions and actions[-1].rstrip("+") == action:
+                actions[-1] = action + "+"
+            else:
+                actions.append(action)
+    return actions
+
+
+def _contains(pattern: Sequence[Any], seq: Sequence[Any]) -> bool:
+    """Whether pattern occurs in seq as a contiguous run."""
+    n = len(pattern)
+    first = pattern[0]
+    return any(seq[i] == first and tuple(seq[i : i + n]) == tuple(pattern) for i in range(len(seq) - n + 1))
+
+
+def frequent_ngrams(
+    sequences: List[Sequence[int]],
+    min_support: int,
+    max_length: int = 8,
+    weights: Optional[List[int]] = None,
+    max_patterns: Optional[int] = None,
+) -> List[Tuple[Tuple[int, ...], int]]:
+    """
+    Frequent contiguous action runs (n-grams, 2 <= n <= max_length) with support >= min_support.
+
+    weights gives the multiplicity of each sequence (identical runs are passed once); a
+    sequence counts once per n-gram however often it repeats it. Counting is level-wise,
+    one pass per length, so work is linear in the total sequence length times max_length. Returns closed patterns (no one-action longer
+    n-gram with the same support) as (pattern, support), best first (support, then
+    length), at most max_patterns of them.
+    """
+    weights = weights or [1] * len(sequences)
+    frequent: Dict[Tuple[int, ...], int] = {}
+    level: Dict[Tuple[int, ...], int] = {}
+    live = [(seq, weight) for seq, weight in zip(sequences, weights) if len(seq) >= 2]
+    for n in range(2, max_length + 1):
+        # Level-wise: an n-gram can only be frequent when both its (n-1)-grams are.
+        counts: Dict[Tuple[int, ...], int] = {}
+        still_live = []
+        for seq, weight in live:
+            grams = set()
+            for i in range(len(seq) - n + 1):
+                gram = tuple(seq[i : i + n])
+                if n == 2 or (gram[:-1] in level and gram[1:] in level):
+                    grams.add(gram)
+            for gram in grams:
+                counts[gram] = counts.get(gram, 0) + weight
+            if grams:
+                still_live.append((seq, weight))
+        level = {gram: support for gram, support in counts.items() if support >= min_support}
+        if not level:
+            break
+        frequent.update(level)
+        live = still_live
+    # Support only shrinks as a pattern grows, so a pattern is not closed exactly when one
+    # of its one-action extensions has the same support.
+    covered = set()
+    for gram, support in frequent.items():
+        if len(gram) > 2:
+            for sub in (gram[:-1], gram[1:]):
+                if frequent.get(sub) == support:
+                    covered.add(sub)
+    found = [(gram, support) for gram, support in frequent.items() if gram not in covered]
+    found.sort(key=lambda p: (-p[1], -len(p[0]), p[0]))
+    return found[:max_patterns] if max_patterns else found
+
+
+def _features(actions: Sequence[str]) -> Set[str]:
+    if len(actions) < 2:
+        return set(actions)
+    return {f"{a} > {b}" for a, b in zip(actions, actions[1:])}
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    union = a | b
+    return len(a & b) / len(union) if union else 1.0
+
+
+def cluster_runs(sequences: List[Tuple[str, ...]], similarity: float) -> List[List[int]]:
+    """Greedy leader clustering of distinct sequences by action-bigram Jaccard similarity."""
+    clusters: List[List[int]] = []
+    leaders: List[Set[str]] = []
+    for i, actions in enumerate(sequences):
+        features = _features(actions)
+        best, best_score = None, similarity
+        for c, leader in enumerate(leaders):
+            score = _jaccard(features, leader)
+            if score >= best_score:
+                best, best_score = c, score
+        if best is None:
+            clusters.append([i])
+            leaders.append(features)
+        else:
+            clusters[best].append(i)
+    return clusters
+
+
+def _iter_runs(path: str) -> Iterator[Dict[str, Any]]:
+    """Runs (JSON records) of a log with their byte span."""
+    previous: Optional[Dict[str, Any]] = None
+    for record in iter_json_records(path):
+        if previous is not None:
+            previous["end_offset"] = record.offset
+            yield previous
+        triage = score_record(record.value)
+        previous = {
+            "log_path": path,
+            "start_offset": record.offset,
+            "end_offset": None,
+            "line": record.line,
+            "actions": tuple(abstract_actions(record.value)),
+            "success": triage["outcome"] == "success",
+        }
+    if previous is not None:
+        yield previous
+
+
+def mine_workflows(
+    log_paths: List[str],
+    min_support: Optional[float] = None,
+    similarity: Optional[float] = None,
+    max_pattern_length: Optional[int] = None,
+    max_patterns: int = 50,
+) -> Dict[str, Any]:
+    """
+    Mine repeated workflows across a corpus of logs (no LLM calls).
+
+    Args:
+        log_paths: Log files (absolute); each JSON record is one run.
+        min_support: Minimum runs sharing a pattern: a count (>= 1) or a fraction of the
+            runs (< 1); default MINING_CONFIG["min_support"]. Never below 2.
+        similarity: Jaccard threshold on action bigrams for runs in one cluster; default
+            MINING_CONFIG["similarity"].
+        max_pattern_length: Longest pattern searched; default MINING_CONFIG["max_pattern_length"].
+        max_patterns: Patterns reported (globally and per cluster).
+
+    Returns:
+        {"logs": int, "runs": int, "mined_runs": int, "min_support": int, "elapsed": float,
+         "patterns": [{"actions": list[str], "support": int}],
+         "clusters": [{"id", "runs", "logs", "successes", "success_rate", "actions",
+                       "patterns", "representative": {"log_path", "start_offset",
+                       "end_offset", "line", "success"}}]}
+        Runs with fewer than 2 actions are counted but not mined. Clusters are sorted by
+        size.
+    """
+    started = time.perf_counter()
+    min_support = MINING_CONFIG["min_support"] if min_support is None else min_support
+    similarity = MINING_CONFIG["similarity"] if similarity is None else similarity
+    max_pattern_length = max_pattern_length or MINING_CONFIG["max_pattern_length"]
+
+    total = 0
+    by_sequence: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for path in log_paths:
+        for run in _iter_runs(path):
+            total += 1
+            if len(run["actions"]) >= 2:
+                by_sequence.setdefault(run["actions"], []).append(run)
+    distinct = list(by_sequence)
+    mined = sum(len(runs) for runs in by_sequence.values())
+    support = int(min_support) if min_support >= 1 else math.ceil(min_support * mined)
+    support = max(2, support)
+
+    vocab: Dict[str, int] = {}
+    encoded = [[vocab.setdefault(a, len(vocab)) for a in seq] for seq in distinct]
+    names = {i: a for a, i in vocab.items()}
+    weights = [len(by_sequence[seq]) for seq in distinct]
+    patterns = frequent_ngrams(
+        encoded, support, max_length=max_pattern_length, weights=weights, max_patterns=max_patterns
+    )
+
+    clusters = []
+    for members in cluster_runs(distinct, similarity):
+        runs = [run for i in members for run in by_sequence[distinct[i]]]
+        successes = sum(1 for run in runs if run["success"])
+        # Medoid over the cluster's distinct sequences (weighted by run count), among
+        # the successful ones when there are any.
+        candidates = [i for i in members if any(r["success"] for r in by_sequence[distinct[i]])] or members
+        features = {i: _features(distinct[i]) for i in members}
+        medoid = max(
+            candidates[:200],
+            key=lambda i: sum(_jaccard(features[i], features[j]) * weights[j] for j in members[:200]),
+        )
+        representative = next((r for r in by_sequence[distinct[medoid]] if r["success"]), by_sequence[distinct[medoid]][0])
+        cluster_patterns = []
+        for pattern, _ in patterns:
+            count = sum(weights[i] for i in members if _contains(pattern, encoded[i]))
+            if count >= 2:
+                cluster_patterns.append({"actions": [names[a] for a in pattern], "support": count})
+        cluster_patterns.sort(key=lambda p: (-p["support"], -len(p["actions"])))
+        clusters.append({
+            "runs": len(runs),
+            "logs": len({run["log_path"] for run in runs}),
+            "successes": successes,
+            "success_rate": round(successes / len(runs), 3),
+            "actions": list(distinct[medoid]),
+            "patterns": cluster_patterns[:10],
+            "representative": {k: representative[k] for k in ("log_path", "start_offset", "end_offset", "line", "success")},
+        })
+    clusters.sort(key=lambda c: (-c["runs"], -c["successes"]))
+    for i, cluster in enumerate(clusters):
+        cluster["id"] = i
+
+    return {
+        "logs": len(log_paths),
+        "runs": total,
+        "mined_runs": mined,
+        "min_support": support,
+        "elapsed": time.perf_counter() - started,
+        "patterns": [{"actions": [names[a] for a in p], "support": s} for p, s in patterns],
+        "clusters": clusters,
+    }
+
+
+def cluster_note(cluster: Dict[str, Any]) -> str:
+    """Task-message note with a cluster's support statistics (see build_user_message)."""
+    rep = cluster["representative"]
+    lines = [
+        f"Workflow cluster {cluster['id']}: {cluster['runs']} run(s) across {cluster['logs']} log(s) follow this "
+        f"workflow ({cluster['successes']} succeeded, {cluster['success_rate']:.0%}). The log excerpt below is one "
+        f"representative run (line {rep['line']}); write one skill that covers the whole cluster.",
+        f"Representative action sequence: {' -> '.join(cluster['actions'])}",
+    ]
+    if cluster["patterns"]:
+        lines.append("Frequent action sequences in the cluster (support = runs):")
+        lines.extend(f"- {' -> '.join(p['actions'])} (support {p['support']})" for p in cluster["patterns"][:5])
+    return "\n".join(lines)
+
+
+def summarize_workflow_clusters(
+    log_paths: List[str],
+    project_root: Optional[str] = None,
+    output_root: Optional[str] = None,
+    min_cluster_runs: Optional[int] = None,
+    digest: bool = False,
+    concurrency: int = 4,
+    llm_client: Optional[OpenAI] = None,
+    history_policy: Union[str, HistoryPolicy, None] = None,
+    mining: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    SDK entry point: mine workflows across logs, then summarize one representative per cluster.
+
+    Args:
+        log_paths: Log files (relative to project_root or absolute).
+        project_root: Root for reading; defaults to current working directory.
+        output_root: Root for generated SKILLs; defaults to package default.
+        min_cluster_runs: Clusters with fewer runs are not summarized; default
+            MINING_CONFIG["min_cluster_runs"].
+        digest: Send the representative run pre-digested (see digest.py).
+        concurrency: Clusters summarized at the same time.
+        llm_client: Shared OpenAI-compatible client; built once from OPENAI_CONFIG if None.
+        history_policy: Context-window policy for each agent run (see history.py).
+        mining: A mine_workflows() result to reuse; mined from log_paths if None.
+
+    Returns:
+        {"success": bool, "mining": dict, "results": list[dict], "elapsed": float}
+        Each result: {"cluster", "runs", "log_path", "success", "tool_calls",
+        "final_response", "error"}, in cluster order.
+    """
+    started = time.perf_counter()
+    project_root = os.path.abspath(project_root or os.getcwd())
+    output_root = os.path.abspath(output_root or DEFAULT_OUTPUT_DIR)
+    abs_paths = [p if os.path.isabs(p) else os.path.join(project_root, p) for p in log_paths]
+    if mining is None:
+        mining = mine_workflows(abs_paths)
+    min_runs = MINING_CONFIG["min_cluster_runs"] if min_cluster_runs is None else min_cluster_runs
+    selected = [c for c in mining["clusters"] if c["runs"] >= min_runs]
+    client = llm_client or build_openai_client()
+
+    def work(cluster: Dict[str, Any]) -> Dict[str, Any]:
+        rep = cluster["representative"]
+        try:
+            agent = SkillSummarizerAgent(
+                project_root=project_root, output_root=output_root, llm_client=client, history_policy=history_policy
+            )
+            window = log_window(rep["log_path"], start=rep["start_offset"], end=rep["end_offset"])
+            message = build_user_message(
+                rep["log_path"], rep["log_path"], output_root, window, digest=digest, note=cluster_note(cluster)
+            )
+            result = agent.run(message)
+            error = result.get("error")
+        except Exception as e:
+            result = {"success": False, "tool_calls": [], "final_response": None}
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "cluster": cluster["id"],
+            "runs": cluster["runs"],
+            "log_path": rep["log_path"],
+            "success": bool(result.get("success")),
+            "tool_calls": len(result.get("tool_calls", [])),
+            "final_response": result.get("final_response"),
+            "error": error,
+        }
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(selected)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(work, c): i for i, c in enumerate(selected)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return {
+        "success": all(r["success"] for r in results if r),
+        "mining": mining,
+        "results": results,
+        "elapsed": time.perf_counter() - started,
+    }
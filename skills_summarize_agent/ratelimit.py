@@ -0,0 +1,318 @@
+"""
+Rate-limit-aware scheduling for LLM requests.
+
+RateLimiter applies token-bucket limits to requests per minute (rpm) and estimated tokens
+per minute (tpm). Callers wait in a priority queue: lower priority values go first, and
+ties are served first in, first out. When a state_file is set, the buckets are kept in a
+JSON file guarded by an exclusive file lock. Every process on the host that uses the same
+file then shares one quota. The priority queue itself is per process.
+
+RateLimitedClient wraps an OpenAI-compatible client:
+- each request first acquires capacity from the limiter;
+- after the call, the token estimate is corrected with the reported usage;
+- 429, 408, 409, 5xx and connection errors are retried with jittered exponential backoff;
+- Retry-After / retry-after-ms headers are honoured;
+- a 429 pauses the shared bucket for every caller until the retry time.
+
+Retries repeat the same request, so the agent's conversation continues where it was. If
+the retries run out, SkillSummarizerAgent returns a resumable result (see run(resume=...)).
+"""
+import email.utils
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets stay per process
+    fcntl = None
+
+from .config import OPENAI_CONFIG, RATE_LIMIT_CONFIG
+from .digest import estimate_tokens
+
+_RETRY_STATUS = (408, 409, 429)
+
+
+def default_state_file() -> str:
+    """Per-user, per-endpoint/key bucket file in the temp directory."""
+    key = f"{OPENAI_CONFIG.get('base_url')}|{OPENAI_CONFIG.get('api_key')}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.path.join(tempfile.gettempdir(), f"skill-summarizer-ratelimit-{uid}-{digest}.json")
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, with a priority wait queue."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, state_file: Optional[str] = None):
+        """
+        Args:
+            rpm: Requests per minute; 0 = unlimited.
+            tpm: Estimated tokens (prompt + max completion) per minute; 0 = unlimited.
+            state_file: Shared bucket file for cross-process limits; None = this process only.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.state_file = state_file if fcntl is not None else None
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._state_lock = threading.Lock()
+        self._state = {"requests": float(rpm), "tokens": float(tpm), "updated": time.time(), "blocked_until": 0.0}
+
+    def _refill(self, state: Dict[str, float], now: float) -> None:
+        elapsed = max(0.0, now - state.get("updated", now))
+        if self.rpm:
+            state["requests"] = min(float(self.rpm), state.get("requests", self.rpm) + elapsed * self.rpm / 60)
+        if self.tpm:
+            state["tokens"] = min(float(self.tpm), state.get("tokens", self.tpm) + elapsed * self.tpm / 60)
+        state["updated"] = now
+
+    def _with_state(self, fn: Callable[[Dict[str, float], float], Any]) -> Any:
+        """Run fn(state, now) on the refilled bucket state, under the in-process and file locks."""
+        with self._state_lock:
+            if self.state_file is None:
+                now = time.time()
+                self._refill(self._state, now)
+                return fn(self._state, now)
+            with open(self.state_file + ".lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    try:
+                        with open(self.state_file, "r", encoding="utf-8") as f:
+                            state = json.load(f)
+                    except (OSError, ValueError):
+                        state = {"requests": float(self.rpm), "tokens": float(self.tpm), "blocked_until": 0.0}
+                    now = time.time()
+                    self._refill(state, now)
+                    result = fn(state, now)
+                    tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(state, f)
+                    os.replace(tmp_path, self.state_file)
+                    return result
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _try_take(self, tokens: int) -> float:
+        """Take capacity for one request of tokens; returns 0, or seconds to wait before retrying."""
+        def take(state: Dict[str, float], now: float) -> float:
+            if state.get("blocked_until", 0.0) > now:
+                return state["blocked_until"] - now
+            waits = []
+            if self.rpm and state["requests"] < 1:
+                waits.append((1 - state["requests"]) * 60 / self.rpm)
+            # A request larger than the whole bucket waits for a full bucket, then runs into debt.
+            need = min(tokens, self.tpm)
+            if self.tpm and state["tokens"] < need:
+                waits.append((need - state["tokens"]) * 60 / self.tpm)
+            if waits:
+                return max(waits)
+            if self.rpm:
+                state["requests"] -= 1
+            if self.tpm:
+                state["tokens"] -= tokens
+            return 0.0
+
+        return self._with_state(take)
+
+    def acquire(self, tokens: int = 0, priority: int = 0) -> float:
+        """Block until a request of about tokens may be sent; returns the seconds waited."""
+        started = time.monotonic()
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+        try:
+            while True:
+                with self._cond:
+                    while self._waiting[0] != entry:
+                        self._cond.wait()
+                wait = self._try_take(tokens)
+                if wait <= 0:
+                    return time.monotonic() - started
+                with self._cond:
+                    # Wake early if a higher-priority request arrives.
+                    self._cond.wait(timeout=min(wait, 1.0))
+        finally:
+            with self._cond:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tpm and actual is not None and actual != estimated:
+            def adjust(state: Dict[str, float], now: float) -> None:
+                state["tokens"] = min(float(self.tpm), state["tokens"] - (actual - estimated))
+
+            self._with_state(adjust)
+
+    def block(self, seconds: float) -> None:
+        """Pause every caller sharing the bucket for seconds (after a 429)."""
+        def pause(state: Dict[str, float], now: float) -> None:
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), now + seconds)
+
+        self._with_state(pause)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The process-wide limiter built from RATE_LIMIT_CONFIG (shared by all agents)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            rpm, tpm = RATE_LIMIT_CONFIG["rpm"], RATE_LIMIT_CONFIG["tpm"]
+            state_file = RATE_LIMIT_CONFIG["state_file"] or (default_state_file() if rpm or tpm else None)
+            _limiter = RateLimiter(rpm, tpm, state_file=state_file)
+        return _limiter
+
+
+def configure_rate_limiter(rpm: Optional[float] = None, tpm: Optional[float] = None, state_file: Optional[str] = None) -> RateLimiter:
+    """Replace the process-wide limiter (e.g. from CLI flags); unset values come from RATE_LIMIT_CONFIG."""
+    global _limiter
+    rpm = RATE_LIMIT_CONFIG["rpm"] if rpm is None else rpm
+    tpm = RATE_LIMIT_CONFIG["tpm"] if tpm is None else tpm
+    state_file = state_file or RATE_LIMIT_CONFIG["state_file"] or (default_state_file() if rpm or tpm else None)
+    with _limiter_lock:
+        _limiter = RateLimiter(rpm, tpm, state_file=state_file)
+        return _limiter
+
+
+def estimate_request_tokens(kwargs: Dict[str, Any]) -> int:
+    """Estimated tokens of a chat request: prompt (messages + tools) plus max completion."""
+    prompt = json.dumps([kwargs.get("messages", []), kwargs.get("tools", [])], ensure_ascii=False, default=str)
+    return estimate_tokens(prompt) + int(kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 0)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts, conflicts, server errors and connection failures are retried."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in _RETRY_STATUS or status >= 500
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(error, openai.APIConnectionError)
+
+
+def retry_delay(error: Exception, attempt: int, base: float, cap: float) -> Optional[float]:
+    """Seconds to wait before retry number attempt + 1, or None if error is not retryable."""
+    if not is_retryable(error):
+        return None
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, min(1.0, base))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _usage_tokens(usage: Any) -> Optional[int]:
+    total = getattr(usage, "total_tokens", None) if usage is not None else None
+    return total if isinstance(total, int) else None
+
+
+class RateLimitedClient:
+    """OpenAI-compatible client wrapper: rate-limited, retried chat.completions.create."""
+
+    def __init__(
+        self,
+        inner: Any,
+        limiter: Optional[RateLimiter] = None,
+        priority: int = 0,
+        max_retries: Optional[int] = None,
+    ):
+        """
+        Args:
+            inner: Wrapped OpenAI-compatible client.
+            limiter: Shared limiter; default get_rate_limiter().
+            priority: Queue priority of this client's requests (lower goes first).
+            max_retries: Retries per request; default RATE_LIMIT_CONFIG["max_retries"].
+        """
+        self.inner = inner
+        self.limiter = limiter or get_rate_limiter()
+        self.priority = priority
+        self.max_retries = RATE_LIMIT_CONFIG["max_retries"] if max_retries is None else max_retries
+        self.stats = {"requests": 0, "retries": 0, "throttled_seconds": 0.0, "backoff_seconds": 0.0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs: Any) -> Any:
+        estimate = estimate_request_tokens(kwargs)
+        attempt = 0
+        while True:
+            self.stats["throttled_seconds"] += self.limiter.acquire(estimate, self.priority)
+            self.stats["requests"] += 1
+            try:
+                response = self.inner.chat.completions.create(**kwargs)
+            except Exception as e:
+                delay = retry_delay(e, attempt, RATE_LIMIT_CONFIG["backoff_base"], RATE_LIMIT_CONFIG["backoff_max"])
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.stats["retries"] += 1
+                self.stats["backoff_seconds"] += delay
+                if getattr(e, "status_code", None) == 429:
+                    self.limiter.block(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            if kwargs.get("stream"):
+                return self._settle_stream(response, estimate)
+            self.limiter.settle(estimate, _usage_tokens(getattr(response, "usage", None)))
+            return response
+
+    def _settle_stream(self, stream: Any, estimate: int) -> Iterator[Any]:
+        usage = None
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            yield chunk
+        self.limiter.settle(estimate, _usage_tokens(usage))
+
+
+def with_rate_limit(client: Any, priority: int = 0) -> Any:
+    """
+    Route client's requests through the process-wide limiter with retries.
+
+    A CachedLLMClient keeps serving hits without touching the limiter: it is returned as a
+    new CachedLLMClient on the same cache whose inner client is wrapped, so the caller's
+    client (possibly shared by agents of other priorities) is left unchanged. Already
+    wrapped clients are returned as is.
+    """
+    from .llm_cache import CachedLLMClient
+
+    if isinstance(client, RateLimitedClient):
+        return client
+    if isinstance(client, CachedLLMClient):
+        if client.inner is None or isinstance(client.inner, RateLimitedClient):
+            return client
+        return CachedLLMClient(RateLimitedClient(client.inner, priority=priority), cache=client.cache, mode=client.mode)
+    return RateLimitedClient(client, priority=priority)
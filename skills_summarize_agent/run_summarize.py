@@ -5,13 +5,41 @@ CLI entry point: summarize skills from an agent log (JSONL).
 Usage (from repo root or any dir with the package on PYTHONPATH):
   python -m skills_summarize_agent.run_summarize --log_path agent_log
   python -m skills_summarize_agent.run_summarize --log_path /path/to/log.jsonl --last 100
+  python -m skills_summarize_agent.run_summarize --log_path data/example2 --digest
   python -m skills_summarize_agent.run_summarize --project_root /path/to/project --output_dir /path/to/output
+  python -m skills_summarize_agent.run_summarize --log_dir logs/ --glob "*.jsonl" --concurrency 8
+  python -m skills_summarize_agent.run_summarize --log_path big_multi_task.jsonl --map_reduce --shard_tokens 16000
+  python -m skills_summarize_agent.run_summarize --log_path agent.jsonl --incremental
+  python -m skills_summarize_agent.run_summarize --log_path agent.jsonl --follow --batch_records 200
+  python -m skills_summarize_agent.run_summarize --log_path agent_log --history_policy summarize --history_budget 16000
+  python -m skills_summarize_agent.run_summarize --log_path agent_log --stream
+  python -m skills_summarize_agent.run_summarize --log_path agent_log --structured
+  python -m skills_summarize_agent.run_summarize --log_path agent_log --trace run.trace.json --trace_format chrome
+  python -m skills_summarize_agent.run_summarize --log_dir logs/ --rpm 60 --tpm 200000
+  python -m skills_summarize_agent.run_summarize --log_path agent_log --budget_seconds 300 --budget_tokens 200000
+  python -m skills_summarize_agent.run_summarize --log_dir logs/ --triage --min_score 0.6
+  python -m skills_summarize_agent.run_summarize --log_dir logs/ --triage_only
+  python -m skills_summarize_agent.run_summarize --log_dir logs/ --mine
+  python -m skills_summarize_agent.run_summarize --log_dir logs/ --mine_only
 """
 import argparse
+import json
 import os
 import sys
+import threading
 
-from skills_summarize_agent import summarize_skills_from_log
+from skills_summarize_agent import summarize_skills_from_log, summarize_skills_from_logs
+from skills_summarize_agent.batch import DEFAULT_CONCURRENCY, collect_logs
+from skills_summarize_agent.budget import configure_budget
+from skills_summarize_agent.history import HISTORY_POLICIES, make_policy
+from skills_summarize_agent.incremental import follow_log, summarize_incremental
+from skills_summarize_agent.llm_cache import CACHE_MODES, CachedLLMClient
+from skills_summarize_agent.mapreduce import summarize_skills_map_reduce
+from skills_summarize_agent.mining import mine_workflows, summarize_workflow_clusters
+from skills_summarize_agent.ratelimit import configure_rate_limiter
+from skills_summarize_agent.skill_summarizer_agent import build_openai_client
+from skills_summarize_agent.trace import TRACE_FORMATS, write_trace
+from skills_summarize_agent.triage import triage_log
 
 
 def main():
@@ -40,13 +68,208 @@ def main():
         "--last",
         type=int,
         default=None,
-        help="Use only the last N lines of the log; default: all.",
+        help="Use only the last N lines of the log (single-log, --log_dir and --map_reduce runs); default: all.",
+    )
+    parser.add_argument(
+        "--digest",
+        action="store_true",
+        help="Send a compact pre-digested log (deduped, truncated, noise dropped) instead of raw lines.",
+    )
+    parser.add_argument(
+        "--log_dir",
+        type=str,
+        default=None,
+        help="Batch mode: summarize every log in this directory (relative to project_root or absolute).",
+    )
+    parser.add_argument(
+        "--glob",
+        type=str,
+        default="*",
+        help="Batch mode: filename pattern within --log_dir; default: *.",
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Batch mode: also match --glob in subdirectories of --log_dir.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Batch mode: maximum logs processed in parallel; default: {DEFAULT_CONCURRENCY}.",
+    )
+    parser.add_argument(
+        "--map_reduce",
+        action="store_true",
+        help="Map-reduce mode for logs larger than the model context: shard, extract candidates in parallel, merge, write.",
+    )
+    parser.add_argument(
+        "--shard_tokens",
+        type=int,
+        default=None,
+        help="Map-reduce mode: estimated-token budget per shard; default: SKILL_SUMMARIZER_SHARD_TOKENS or 24000.",
+    )
+    parser.add_argument(
+        "--llm_cache",
+        type=str,
+        default=None,
+        help="Directory for the on-disk LLM completion cache (reruns and replays are served from it).",
+    )
+    parser.add_argument(
+        "--llm_cache_mode",
+        type=str,
+        choices=CACHE_MODES,
+        default="read-write",
+        help="LLM cache mode; read-only with --offline replays recorded sessions without network.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="With --llm_cache: never call the API; a cache miss fails the run.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only summarize lines appended since the last run (per-log checkpoint).",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep following the log and summarize new lines in batches (Ctrl-C to stop).",
+    )
+    parser.add_argument(
+        "--batch_records",
+        type=int,
+        default=None,
+        help="Incremental/follow mode: lines per agent run; default: SKILL_SUMMARIZER_BATCH_RECORDS or 500.",
+    )
+    parser.add_argument(
+        "--window_seconds",
+        type=float,
+        default=None,
+        help="Follow mode: flush a partial batch after this many seconds; default: SKILL_SUMMARIZER_BATCH_WINDOW or 300.",
+    )
+    parser.add_argument(
+        "--checkpoint_dir",
+        type=str,
+        default=None,
+        help="Incremental/follow mode: checkpoint store directory; default: SKILL_SUMMARIZER_CHECKPOINT_DIR or .checkpoints.",
+    )
+    parser.add_argument(
+        "--history_policy",
+        type=str,
+        choices=sorted(HISTORY_POLICIES),
+        default=None,
+        help="Context-window policy for the agent loop: full, stub (elide stale tool results) or "
+        "summarize (collapse earlier turns); default: SKILL_SUMMARIZER_HISTORY_POLICY or stub.",
+    )
+    parser.add_argument(
+        "--history_budget",
+        type=int,
+        default=None,
+        help="Estimated tokens of history before the policy compacts it; default: SKILL_SUMMARIZER_HISTORY_BUDGET or 24000.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream completions, start tools as soon as their arguments arrive, and print progress live (single-log mode only).",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Write a performance trace of the run (turn latency, tokens, tool timings) to this file (single-log mode only).",
+    )
+    parser.add_argument(
+        "--trace_format",
+        type=str,
+        choices=TRACE_FORMATS,
+        default="json",
+        help="Trace file format: json, or chrome (open in chrome://tracing or Perfetto); default: json.",
+    )
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="Single-shot mode: one request with the skill listing and digested log, answered as JSON; falls back to the tool loop if invalid (single-log mode only).",
+    )
+    parser.add_argument(
+        "--triage",
+        action="store_true",
+        help="Score logs locally first and skip failed, one-shot and repeated runs before any LLM call (single-log and --log_dir runs).",
+    )
+    parser.add_argument(
+        "--min_score",
+        type=float,
+        default=None,
+        help="Triage threshold (0-1) for summarizing a log; default: SKILL_SUMMARIZER_TRIAGE_MIN_SCORE (0.5).",
+    )
+    parser.add_argument(
+        "--triage_only",
+        action="store_true",
+        help="Only print the triage score, decision and reasons per log; no LLM calls.",
+    )
+    parser.add_argument(
+        "--mine",
+        action="store_true",
+        help="Mine repeated workflows across all runs of the logs, then summarize one representative run per workflow cluster.",
+    )
+    parser.add_argument(
+        "--mine_only",
+        action="store_true",
+        help="Only print the mined workflow clusters and frequent action sequences; no LLM calls.",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Max model requests per minute, shared with other runs on this host; default: SKILL_SUMMARIZER_RPM (0 = unlimited).",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Max estimated tokens per minute, shared with other runs on this host; default: SKILL_SUMMARIZER_TPM (0 = unlimited).",
+    )
+    parser.add_argument(
+        "--budget_seconds",
+        type=float,
+        default=None,
+        help="Wall-clock budget per agent run in seconds; default: SKILL_SUMMARIZER_BUDGET_SECONDS (0 = unlimited).",
+    )
+    parser.add_argument(
+        "--budget_tokens",
+        type=int,
+        default=None,
+        help="Prompt + completion token budget per agent run; default: SKILL_SUMMARIZER_BUDGET_TOKENS (0 = unlimited).",
+    )
+    parser.add_argument(
+        "--budget_cost",
+        type=float,
+        default=None,
+        help="Estimated cost budget per agent run (needs SKILL_SUMMARIZER_PRICE_INPUT/_OUTPUT); default: SKILL_SUMMARIZER_BUDGET_COST (0 = unlimited).",
     )
     args = parser.parse_args()
+    check_mode_flags(parser, args)
+    if args.rpm is not None or args.tpm is not None:
+        configure_rate_limiter(rpm=args.rpm, tpm=args.tpm)
+    configure_budget(max_seconds=args.budget_seconds, max_tokens=args.budget_tokens, max_cost=args.budget_cost)
 
     project_root = os.path.abspath(args.project_root or os.getcwd())
     output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
 
+    if args.triage_only:
+        return run_triage(args, project_root)
+    if args.mine_only:
+        print_mining(mine_workflows(resolve_log_paths(args, project_root)))
+        return 0
+
+    llm_client = build_llm_client(args)
+    history_policy = make_policy(args.history_policy, budget_tokens=args.history_budget)
+    if args.mine:
+        return run_mining(args, project_root, output_dir, llm_client, history_policy)
+    if args.log_dir:
+        return run_batch(args, project_root, output_dir, llm_client, history_policy)
+
     print(f"[INFO] Project root: {project_root}")
     print(f"[INFO] Log path: {args.log_path}")
     if output_dir:
@@ -54,12 +277,64 @@ def main():
     if args.last:
         print(f"[INFO] Last N lines: {args.last}")
 
-    result = summarize_skills_from_log(
-        log_path=args.log_path,
-        project_root=project_root,
-        output_root=output_dir,
-        last_n=args.last,
-    )
+    if args.follow:
+        return run_follow(args, project_root, output_dir, llm_client, history_policy)
+    if args.incremental:
+        result = summarize_incremental(
+            log_path=args.log_path,
+            project_root=project_root,
+            output_root=output_dir,
+            digest=args.digest,
+            batch_records=args.batch_records,
+            checkpoint_dir=args.checkpoint_dir,
+            llm_client=llm_client,
+            on_batch=print_batch,
+            history_policy=history_policy,
+        )
+        print(
+            f"[INFO] Incremental ({result['status']}): {result['lines']} new line(s), "
+            f"bytes {result['start_offset']}-{result['end_offset']}, {len(result['batches'])} batch(es)"
+        )
+    elif args.map_reduce:
+        result = summarize_skills_map_reduce(
+            log_path=args.log_path,
+            project_root=project_root,
+            output_root=output_dir,
+            last_n=args.last,
+            shard_tokens=args.shard_tokens,
+            llm_client=llm_client,
+            history_policy=history_policy,
+        )
+        print(f"[INFO] Map-reduce: {result['shards']} shard(s), {len(result['candidates'])} merged candidate(s)")
+        for error in result["map_errors"]:
+            print(f"[WARN] Map {error}")
+    else:
+        result = summarize_skills_from_log(
+            log_path=args.log_path,
+            project_root=project_root,
+            output_root=output_dir,
+            last_n=args.last,
+            digest=args.digest,
+            llm_client=llm_client,
+            history_policy=history_policy,
+            stream=True if args.stream else None,
+            on_event=ProgressPrinter() if args.stream else None,
+            trace=True if args.trace else None,
+            structured=True if args.structured else None,
+            triage=True if args.triage else None,
+            min_score=args.min_score,
+        )
+        if result.get("triage"):
+            print_triage(result["triage"])
+        if result.get("mode"):
+            print_mode(result)
+        print_history(result.get("history"))
+        print_budget(result.get("budget"))
+        print_writes(result.get("writes"))
+        if result.get("trace"):
+            print_trace(result["trace"])
+            if args.trace:
+                print(f"[INFO] Trace written to {write_trace(result['trace'], args.trace, args.trace_format)}")
 
     if result["success"]:
         print("\n[OK] Skill summarizer finished.")
@@ -67,8 +342,13 @@ def main():
             print("\n--- Agent final response ---")
             text = result["final_response"]
             print(text[:2000] + ("..." if len(text) > 2000 else ""))
+    elif result.get("partial"):
+        print("\n[PARTIAL] Skill summarizer stopped early; skills written so far are kept.")
+        print(result["error"])
     else:
         print("\n[FAIL] Skill summarizer did not finish successfully.")
+        if result.get("error"):
+            print(result["error"])
         if result.get("final_response"):
             print(result["final_response"])
     print(f"\nTool calls made: {len(result.get('tool_calls', []))}")
@@ -76,5 +356,267 @@ def main():
     return 0 if result["success"] else 1
 
 
+def print_triage(verdict):
+    """One line per triaged log: decision, score and reasons."""
+    label = "PROCESS" if verdict["decision"] == "process" else "SKIP"
+    print(f"[{label}] {verdict['path']} score={verdict['score']:.2f}: {'; '.join(verdict['reasons'])}")
+
+
+def resolve_log_paths(args, project_root):
+    """Absolute paths of --log_path, or of every log matching --glob under --log_dir."""
+    if args.log_dir:
+        log_dir = args.log_dir if os.path.isabs(args.log_dir) else os.path.join(project_root, args.log_dir)
+        return collect_logs(log_dir, args.glob, recursive=args.recursive)
+    return [args.log_path if os.path.isabs(args.log_path) else os.path.join(project_root, args.log_path)]
+
+
+def print_mining(mining):
+    """Corpus, frequent action sequences and workflow clusters of a mine_workflows() result."""
+    print(
+        f"[INFO] Mined {mining['mined_runs']} of {mining['runs']} run(s) in {mining['logs']} log(s) "
+        f"in {mining['elapsed']:.2f}s (min support {mining['min_support']}): {len(mining['clusters'])} workflow cluster(s)"
+    )
+    for pattern in mining["patterns"][:10]:
+        print(f"  [{pattern['support']}] {' -> '.join(pattern['actions'])}")
+    for cluster in mining["clusters"][:20]:
+        rep = cluster["representative"]
+        print(
+            f"[CLUSTER {cluster['id']}] {cluster['runs']} run(s), {cluster['logs']} log(s), "
+            f"{cluster['success_rate']:.0%} success: {' -> '.join(cluster['actions'])} "
+            f"(representative: {rep['log_path']} line {rep['line']})"
+        )
+
+
+def run_mining(args, project_root, output_dir, llm_client=None, history_policy=None):
+    """--mine: one agent run per workflow cluster across the logs."""
+    mining = mine_workflows(resolve_log_paths(args, project_root))
+    print_mining(mining)
+    result = summarize_workflow_clusters(
+        [], project_root=project_root, output_root=output_dir, digest=args.digest,
+        concurrency=args.concurrency, llm_client=llm_client, history_policy=history_policy, mining=mining,
+    )
+    for item in result["results"]:
+        status = "OK" if item["success"] else ("PARTIAL" if item.get("stopped") else "FAIL")
+        detail = f", error: {item['error']}" if item["error"] else ""
+        print(f"[{status}] cluster {item['cluster']} ({item['runs']} runs): {item['tool_calls']} tool calls{detail}")
+    print(f"\nSummarized {len(result['results'])} of {len(mining['clusters'])} cluster(s) in {result['elapsed']:.1f}s.")
+    return 0 if result["success"] else 1
+
+
+def run_triage(args, project_root):
+    """--triage_only: score the log (or every log under --log_dir) without calling the model."""
+    log_paths = resolve_log_paths(args, project_root)
+    seen = set()
+    selected = 0
+    for path in log_paths:
+        verdict = triage_log(path, seen=seen, min_score=args.min_score)
+        selected += verdict["decision"] == "process"
+        print_triage(verdict)
+    print(f"\n{selected} of {len(log_paths)} log(s) would be summarized.")
+    return 0
+
+
+def print_mode(result):
+    """Which path a --structured run took, and why it fell back."""
+    if result["mode"] == "structured":
+        print(f"[INFO] Structured mode: 1 request, {len(result.get('skills', []))} skill(s)")
+    else:
+        print(f"[INFO] Structured answer rejected, used the tool loop: {result.get('structured_error')}")
+
+
+def print_batch(item):
+    """Progress line for one incremental batch."""
+    status = "OK" if item["success"] else ("PARTIAL" if item.get("stopped") else "FAIL")
+    print(
+        f"[{status}] {item['log_path']} bytes {item['start_offset']}-{item['end_offset']} "
+        f"({item['lines']} line(s), {item['tool_calls']} tool calls)"
+    )
+
+
+class ProgressPrinter:
+    """on_event callback printing agent progress events as they arrive (--stream)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mid_line = False
+
+    def __call__(self, event):
+        with self._lock:
+            kind = event["type"]
+            if kind == "tokens":
+                if event["content"]:
+                    sys.stdout.write(event["content"])
+                    sys.stdout.flush()
+                    self._mid_line = True
+                return
+            if self._mid_line:
+                print()
+                self._mid_line = False
+            t = f"[{event['t']:7.2f}s]"
+            if kind == "turn_started":
+                print(f"{t} turn {event['turn']}")
+            elif kind == "tool_dispatched":
+                args = json.dumps(event["arguments"], ensure_ascii=False)
+                print(f"{t}   -> {event['name']} {args[:120] + ('...' if len(args) > 120 else '')}")
+            elif kind == "tool_finished":
+                status = "ok" if event["success"] else f"error: {event['error']}"
+                print(f"{t}   <- {event['name']} {status} ({event['elapsed']:.2f}s)")
+            elif kind == "file_written":
+                print(f"{t}   wrote {event['path']} ({event['bytes']} bytes)")
+            elif kind == "budget_nudge":
+                print(f"{t} asked to wrap up: {event['reason']}")
+            elif kind == "writes_committed":
+                print(f"{t} committed {event['written']} file(s) ({event['bytes']} bytes), {event['skipped']} unchanged")
+            elif kind == "run_finished":
+                print(f"{t} finished ({event['tool_calls']} tool calls)")
+
+
+def print_writes(writes):
+    """Outcome of a run's staged skill writes."""
+    if not writes:
+        return
+    if writes["committed"]:
+        print(f"[INFO] Skills: {writes['written']} file(s) written ({writes['bytes']} bytes), {writes['skipped']} unchanged skipped")
+    elif writes["discarded"]:
+        print(f"[INFO] Skills: run failed, {writes['discarded']} staged file(s) rolled back")
+
+
+def print_budget(budget):
+    """Usage of a run against its budgets."""
+    if not budget:
+        return
+    limits = budget["limits"]
+
+    def of(value, limit, fmt="{}"):
+        return fmt.format(value) + (f"/{fmt.format(limit)}" if limit else "")
+
+    print(
+        f"[INFO] Budget: {of(budget['turns'], limits['turns'])} turn(s), "
+        f"{of(budget['seconds'], limits['seconds'], '{:.1f}')}s, "
+        f"{of(budget['prompt_tokens'] + budget['completion_tokens'], limits['tokens'])} tokens, "
+        f"cost {of(budget['cost'], limits['cost'], '{:.4f}')}"
+    )
+
+
+def print_history(stats):
+    """Token stats of the history policy for one agent run."""
+    if not stats:
+        return
+    print(
+        f"[INFO] History ({stats['policy']}): ~{stats['tokens_sent']} tokens sent over {stats['calls']} call(s), "
+        f"~{stats['tokens_saved']} saved vs full history, {stats['compactions']} compaction(s)"
+    )
+
+
+def print_trace(trace):
+    """Totals of a run's performance trace."""
+    t = trace["totals"]
+    print(
+        f"[INFO] Trace: {t['wall_seconds']:.2f}s wall, {t['turns']} turn(s) / {t['llm_seconds']:.2f}s LLM, "
+        f"{t['tool_calls']} tool call(s) / {t['tool_seconds']:.2f}s; tokens: {t['prompt_tokens']} prompt "
+        f"({t['cached_tokens']} cached), {t['completion_tokens']} completion; "
+        f"{t['bytes_read']} bytes read, {t['bytes_written']} written"
+    )
+
+
+def run_follow(args, project_root, output_dir, llm_client=None, history_policy=None):
+    """Follow mode (--follow): summarize new lines in batches until interrupted."""
+    print(f"[INFO] Following {args.log_path} (Ctrl-C to stop)")
+    try:
+        follow_log(
+            args.log_path,
+            project_root=project_root,
+            output_root=output_dir,
+            digest=args.digest,
+            batch_records=args.batch_records,
+            window_seconds=args.window_seconds,
+            checkpoint_dir=args.checkpoint_dir,
+            llm_client=llm_client,
+            on_batch=print_batch,
+            history_policy=history_policy,
+        )
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopped following.")
+    return 0
+
+
+# Flags each mode would ignore, rejected by check_mode_flags; single-log runs accept them all.
+_AGENT_ONLY = ("--stream", "--trace", "--structured")
+_NO_AGENT = _AGENT_ONLY + ("--last", "--digest", "--history_policy", "--history_budget")
+_IGNORED_FLAGS = {
+    "--triage_only": _NO_AGENT + ("--triage",),
+    "--mine_only": _NO_AGENT + ("--triage", "--min_score"),
+    "--mine": _AGENT_ONLY + ("--last", "--triage", "--min_score"),
+    "--log_dir": _AGENT_ONLY,
+    "--follow": _AGENT_ONLY + ("--last", "--triage", "--min_score"),
+    "--incremental": _AGENT_ONLY + ("--last", "--triage", "--min_score"),
+    "--map_reduce": _AGENT_ONLY + ("--digest", "--triage", "--min_score"),
+}
+
+
+def check_mode_flags(parser, args):
+    """Reject flags that the selected mode would silently ignore (see _IGNORED_FLAGS)."""
+    modes = [mode for mode in _IGNORED_FLAGS if getattr(args, mode[2:])]
+    if not modes:
+        return
+    # The first mode in _IGNORED_FLAGS order is the one main() runs.
+    mode = modes[0]
+    flags = [flag for flag in _IGNORED_FLAGS[mode] if getattr(args, flag[2:]) not in (None, False)]
+    if flags:
+        note = " (map-reduce always digests its shards)" if "--digest" in flags and mode == "--map_reduce" else ""
+        parser.error(f"{', '.join(flags)} cannot be combined with {mode}{note}")
+
+
+def build_llm_client(args):
+    """CachedLLMClient for --llm_cache (no inner client with --offline); None = agent default."""
+    if not args.llm_cache:
+        return None
+    inner = None if args.offline else build_openai_client()
+    return CachedLLMClient(inner, cache_dir=os.path.abspath(args.llm_cache), mode=args.llm_cache_mode)
+
+
+def run_batch(args, project_root, output_dir, llm_client=None, history_policy=None):
+    """Batch mode (--log_dir): summarize all matching logs concurrently and report per-log results."""
+    log_dir = args.log_dir if os.path.isabs(args.log_dir) else os.path.join(project_root, args.log_dir)
+    log_paths = collect_logs(log_dir, args.glob, recursive=args.recursive)
+    print(f"[INFO] Project root: {project_root}")
+    print(f"[INFO] Log dir: {log_dir} ({args.glob}): {len(log_paths)} file(s)")
+    if output_dir:
+        print(f"[INFO] Output dir: {output_dir}")
+    print(f"[INFO] Concurrency: {args.concurrency}")
+    if not log_paths:
+        print("\n[FAIL] No log files matched.")
+        return 1
+
+    def report(item):
+        if item.get("skipped"):
+            print_triage(item["triage"])
+            return
+        status = "OK" if item["success"] else ("PARTIAL" if item.get("stopped") else "FAIL")
+        detail = f", error: {item['error']}" if item["error"] else ""
+        print(f"[{status}] {item['log_path']} ({item['elapsed']:.1f}s, {item['tool_calls']} tool calls{detail})")
+
+    result = summarize_skills_from_logs(
+        log_paths,
+        project_root=project_root,
+        output_root=output_dir,
+        last_n=args.last,
+        digest=args.digest,
+        concurrency=args.concurrency,
+        llm_client=llm_client,
+        on_result=report,
+        history_policy=history_policy,
+        triage=True if args.triage else None,
+        min_score=args.min_score,
+    )
+    print(
+        f"\nProcessed {len(log_paths)} log(s): {result['succeeded']} succeeded, "
+        f"{result['failed']} failed, {result['skipped']} skipped by triage in {result['elapsed']:.1f}s wall-clock."
+    )
+    writes = result["writes"]
+    print(f"Skill files: {writes['written']} written ({writes['bytes']} bytes), {writes['skipped']} unchanged skipped.")
+    return 0 if result["success"] else 1
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,412 @@
+"""
+Persistent index of generated skills for duplicate detection.
+
+SkillIndex keeps, per skill directory under output_root, the SKILL.md frontmatter name,
+description and trigger phrases plus a MinHash signature of their word shingles. Signatures
+are bucketed with LSH banding, so a similarity query only touches the skills that share a
+band with it: the cost per query stays fixed as the library grows. No network or
+third-party dependency.
+
+- SkillIndex.update_skill: (re)index one skill, e.g. right after write_file of its SKILL.md.
+- SkillIndex.rebuild: re-scan output_root.
+- find_similar_skills: tool entry point returning the top-k matches.
+
+The index is an append-only journal, <output_root>/.skill_index/skills.jsonl: one line per
+indexed or removed skill. Several indexes may share one library (one agent per log in a
+batch, job-queue workers in other processes): an update appends its line under a file lock,
+and an index catches up by reading only the lines appended since its last read. The journal
+is compacted (rewritten with one line per live skill) once it holds more than twice as many
+lines as skills. On load, the library is listed again only when the output_root directory
+changed since the last scan recorded in the journal, and only new skill directories are
+read; rebuild() re-reads every SKILL.md.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are not serialized across processes
+    fcntl = None
+
+INDEX_DIRNAME = ".skill_index"
+INDEX_FILENAME = "skills.jsonl"
+INDEX_VERSION = 3
+NUM_PERM = 64
+BANDS = 32
+_ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the this to use used uses "
+    "using when with user says skill".split()
+)
+_SUFFIXES = ("ing", "ies", "es", "ed", "s")
+_QUOTED_RE = re.compile(r"""["'‘’“”]([^"'‘’“”]{3,80})["'‘’“”]""")
+
+
+def _perm_params() -> List[Tuple[int, int]]:
+    params = []
+    for i in range(NUM_PERM):
+        digest = hashlib.sha256(f"skill-index-perm-{i}".encode("ascii")).digest()
+        a = int.from_bytes(digest[:8], "big") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:16], "big") % _PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMS = _perm_params()
+
+
+def parse_frontmatter(text: str) -> Dict[str, str]:
+    """Parse simple "key: value" YAML frontmatter between leading --- markers."""
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return {}
+    meta: Dict[str, str] = {}
+    for line in lines[1:]:
+        if line.strip() == "---":
+            break
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and not key.startswith((" ", "\t", "#")):
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            meta[key.strip()] = value
+    return meta
+
+
+def extract_triggers(description: str, body: str = "") -> List[str]:
+    """Quoted phrases from the description and from "trigger" lines of the body."""
+    sources = [description] + [line for line in body.splitlines() if "trigger" in line.lower()]
+    phrases: List[str] = []
+    for text in sources:
+        for phrase in _QUOTED_RE.findall(text):
+            phrase = phrase.strip()
+            if phrase and phrase not in phrases:
+                phrases.append(phrase)
+    return phrases
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def shingles(text: str) -> set:
+    """Lower-cased, lightly stemmed content words of text (stopwords dropped)."""
+    return {_stem(w) for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def minhash(tokens: set) -> List[int]:
+    """MinHash signature (NUM_PERM values) of a token set."""
+    if not tokens:
+        return [_MAX_HASH] * NUM_PERM
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "big") for t in tokens]
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMS]
+
+
+def _bands(signature: List[int]) -> List[str]:
+    return [
+        f"{i}:" + hashlib.blake2b(json.dumps(signature[i * _ROWS:(i + 1) * _ROWS]).encode("ascii"), digest_size=8).hexdigest()
+        for i in range(BANDS)
+    ]
+
+
+def _similarity(a: List[int], b: List[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def skill_text(meta: Dict[str, str], triggers: List[str]) -> str:
+    """Text used for the skill's signature: name (hyphens as spaces), description, triggers."""
+    return " ".join([meta.get("name", "").replace("-", " "), meta.get("description", "")] + triggers)
+
+
+class SkillIndex:
+    """On-disk MinHash/LSH index of the skills under one output_root."""
+
+    def __init__(self, output_root: str, index_path: Optional[str] = None):
+        """
+        Args:
+            output_root: Skills library root (one skill directory with a SKILL.md each).
+            index_path: Journal file; default <output_root>/.skill_index/skills.jsonl. Built
+                by scanning output_root when missing or unreadable.
+        """
+        self.output_root = os.path.abspath(output_root)
+        self.index_path = index_path or os.path.join(self.output_root, INDEX_DIRNAME, INDEX_FILENAME)
+        self._lock = threading.RLock()
+        self.skills: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[str, set] = {}
+        # Journal read so far: file identity, byte offset and line count.
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._offset = 0
+        self._lines = 0
+        # output_root mtime at the last library scan recorded in the journal.
+        self._scanned: Optional[int] = None
+        with self._lock:
+            loaded = self._catch_up()
+        if loaded:
+            self._check_library()
+        else:
+            self.rebuild()
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on the journal across processes (no-op without fcntl)."""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.index_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _catch_up(self) -> bool:
+        """
+        Apply the journal lines appended since the last read (all lines after a compaction);
+        call with self._lock held. Returns False when the journal is missing or unreadable.
+        """
+        try:
+            st = os.stat(self.index_path)
+        except OSError:
+            return False
+        if (st.st_dev, st.st_ino) == self._file_id and st.st_size == self._offset:
+            return True
+        try:
+            with open(self.index_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                file_id = (st.st_dev, st.st_ino)
+                if file_id != self._file_id or st.st_size < self._offset:
+                    # New or compacted journal: read it from the start.
+                    self._file_id, self._offset, self._lines, self._scanned = file_id, 0, 0, None
+                    self._set_skills({})
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return False
+        # A line without its newline is still being written: leave it for the next read.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not self._apply(record):
+                return False
+        self._offset += end
+        return True
+
+    def _apply(self, record: Dict[str, Any]) -> bool:
+        """Apply one journal line; False for a header of another index format."""
+        self._lines += 1
+        if "version" in record:
+            return record.get("version") == INDEX_VERSION and record.get("num_perm") == NUM_PERM
+        if "scan" in record:
+            self._scanned = record["scan"]
+            return True
+        key = record.get("key")
+        old = self.skills.pop(key, None)
+        if old is not None:
+            self._remove_buckets(key, old["bands"])
+        entry = record.get("entry")
+        if entry is not None:
+            self.skills[key] = entry
+            self._add_buckets(key, entry["bands"])
+        return True
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        """Append journal lines (applied in memory too), compacting when the journal is long."""
+        with self._lock, self._file_lock():
+            fresh = self._catch_up()
+            for record in records:
+                self._apply(record)
+            if not fresh or self._lines > 2 * len(self.skills) + 64:
+                self._compact()
+                return
+            data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+            with open(self.index_path, "ab") as f:
+                f.write(data)
+                end = f.tell()
+            if end - len(data) == self._offset:
+                self._offset = end
+            # else another writer appended without the lock (no fcntl): the next catch-up
+            # re-reads these lines too, which is harmless.
+
+    def _compact(self) -> None:
+        """Rewrite the journal with one line per skill; call with both locks held."""
+        records: List[Dict[str, Any]] = [{"version": INDEX_VERSION, "num_perm": NUM_PERM, "bands": BANDS}]
+        records.extend({"key": key, "entry": entry} for key, entry in sorted(self.skills.items()))
+        if self._scanned is not None:
+            records.append({"scan": self._scanned})
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(self.index_path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.index_path)
+        st = os.stat(self.index_path)
+        self._file_id, self._offset, self._lines = (st.st_dev, st.st_ino), len(data), len(records)
+
+    def _set_skills(self, skills: Dict[str, Dict[str, Any]]) -> None:
+        self.skills = skills
+        self._buckets = {}
+        for key, entry in skills.items():
+            self._add_buckets(key, entry["bands"])
+
+    def refresh(self) -> None:
+        """Apply the updates other indexes of the library journaled since the last read."""
+        with self._lock:
+            self._catch_up()
+
+    def _root_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.output_root).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_library(self) -> None:
+        """Index skill directories added and drop ones removed since the last scan (no-op when output_root is unchanged)."""
+        stamp = self._root_stamp()
+        if stamp is None or stamp == self._scanned:
+            return
+        names = set(os.listdir(self.output_root))
+        records: List[Dict[str, Any]] = []
+        with self._lock:
+            for key in list(self.skills):
+                if key.split(os.sep)[0] not in names:
+                    records.append({"key": key})
+            for name in sorted(names - set(self.skills)):
+                skill_md = os.path.join(self.output_root, name, "SKILL.md")
+                if not name.startswith(".") and os.path.isfile(skill_md):
+                    entry = self._entry(skill_md)
+                    if entry is not None:
+                        records.append({"key": name, "entry": entry})
+            records.append({"scan": stamp})
+            self._write(records)
+
+    def _add_buckets(self, key: str, bands: List[str]) -> None:
+        for band in bands:
+            self._buckets.setdefault(band, set()).add(key)
+
+    def _remove_buckets(self, key: str, bands: List[str]) -> None:
+        for band in bands:
+            members = self._buckets.get(band)
+            if members:
+                members.discard(key)
+                if not members:
+                    del self._buckets[band]
+
+    def _entry(self, skill_md: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(skill_md, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return None
+        meta = parse_frontmatter(text)
+        body = text.split("---", 2)[-1] if meta else text
+        triggers = extract_triggers(meta.get("description", ""), body)
+        signature = minhash(shingles(skill_text(meta, triggers)))
+        return {
+            "name": meta.get("name") or os.path.basename(os.path.dirname(skill_md)),
+            "description": meta.get("description", ""),
+            "triggers": triggers,
+            "path": os.path.relpath(skill_md, self.output_root),
+            "mtime": os.path.getmtime(skill_md),
+            "signature": signature,
+            "bands": _bands(signature),
+        }
+
+    def update_skill(self, skill_md: str) -> Optional[Dict[str, Any]]:
+        """(Re)index the skill whose SKILL.md is at skill_md; removes it if the file is gone."""
+        skill_md = os.path.abspath(skill_md)
+        key = os.path.relpath(os.path.dirname(skill_md), self.output_root)
+        entry = self._entry(skill_md)
+        self._write([{"key": key, "entry": entry}])
+        return entry
+
+    def rebuild(self) -> int:
+        """Re-scan output_root for */SKILL.md (reusing unchanged entries); returns skill count."""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        stamp = self._root_stamp()
+        found: Dict[str, str] = {}
+        if os.path.isdir(self.output_root):
+            for name in sorted(os.listdir(self.output_root)):
+                skill_md = os.path.join(self.output_root, name, "SKILL.md")
+                if not name.startswith(".") and os.path.isfile(skill_md):
+                    found[name] = skill_md
+        with self._lock:
+            self._catch_up()
+            records: List[Dict[str, Any]] = [{"key": key} for key in self.skills if key not in found]
+            for key, skill_md in found.items():
+                old = self.skills.get(key)
+                if old is not None and old.get("mtime") == os.path.getmtime(skill_md):
+                    continue
+                entry = self._entry(skill_md)
+                if entry is not None:
+                    records.append({"key": key, "entry": entry})
+            if records or stamp != self._scanned or self._file_id is None:
+                self._write(records + [{"scan": stamp}])
+        return len(self.skills)
+
+    def query(self, text: str, k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top-k skills similar to text, by estimated Jaccard similarity of word shingles.
+
+        Only skills sharing at least one LSH band with the query are scored.
+        """
+        signature = minhash(shingles(text))
+        self.refresh()
+        with self._lock:
+            candidates = set()
+            for band in _bands(signature):
+                candidates |= self._buckets.get(band, set())
+            scored = []
+            for key in candidates:
+                entry = self.skills[key]
+                score = _similarity(signature, entry["signature"])
+                if score >= min_score:
+                    scored.append((score, key, entry))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        matches = []
+        for score, key, entry in scored:
+            if len(matches) >= k:
+                break
+            # Skills deleted without going through an index are skipped, not reported.
+            if not os.path.isfile(os.path.join(self.output_root, entry["path"])):
+                continue
+            matches.append({
+                "skill_dir": key,
+                "name": entry["name"],
+                "description": entry["description"],
+                "triggers": entry["triggers"],
+                "path": entry["path"],
+                "score": round(score, 3),
+            })
+        return matches
+
+
+def find_similar_skills(index: SkillIndex, query: str, k: int = 5) -> dict:
+    """
+    Tool entry point: skills in the library similar to query (a proposed name/description).
+
+    Returns:
+        {"success": bool, "matches": list[dict] | None, "total_skills": int, "error": str | None}
+    """
+    if not query or not query.strip():
+        return {"success": False, "matches": None, "total_skills": len(index.skills), "error": "Empty query."}
+    try:
+        matches = index.query(query, k=max(1, min(int(k), 50)))
+        return {"success": True, "matches": matches, "total_skills": len(index.skills), "error": None}
+    except Exception as e:
+        return {"success": False, "matches": None, "total_skills": len(index.skills), "error": str(e)}
@@ -3,17 +3,55 @@ Skill Summarizer Agent: extracts reusable SKILL.md from other agents' execution
 
 Architecture:
 - LLM: OpenAI-compatible API (strong reasoning, large context).
-- Tools: read_file / write_file / list_dir (sandboxed).
+- Tools: read_file / write_file / list_dir / search_log / find_similar_skills (sandboxed).
 - Skill context: summarizing-new-skills (SKILL.md) injected as system context.
+- History: a HistoryPolicy (history.py) bounds the context re-sent on each turn.
+- Tool calls of one turn run concurrently on a worker pool (same-path calls serialized).
+- Optional streaming: tool calls start as soon as their arguments are complete; progress
+  events go to an on_event callback or the iter_run iterator.
+- Optional per-run performance trace (trace.py): turn latency, tokens, tool timings.
+- Optional single-shot structured mode (structured.py): skill listing and digested log in
+  one request, JSON answer written by the harness; the tool loop is the fallback.
+- Model requests go through the shared rate limiter (ratelimit.py): token buckets, retries
+  with backoff; a run whose retries run out returns a resumable result.
+- Skill writes are staged per run (staging.py) and committed when the run succeeds:
+  unchanged files are skipped, new skill directories appear atomically. Staging areas
+  left by crashed runs are removed when an agent starts.
+- Per-run budgets (budget.py): turns, wall-clock time, tokens, estimated cost. Near a limit
+  the model is told to write what it has; at the limit the run stops with a partial result.
 """
+import concurrent.futures
+import contextlib
 import json
 import os
-from typing import Any, Dict, List, Optional
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 from openai import OpenAI
 
 from . import tools as file_tools
-from .config import OPENAI_CONFIG
+from .budget import NUDGE_MESSAGE, RunBudget
+from .config import LLM_CACHE_CONFIG, OPENAI_CONFIG, STRUCTURED_CONFIG, TOOL_CONFIG, TRACE_CONFIG, TRIAGE_CONFIG
+from .digest import Stage, digest_log, estimate_tokens
+from .history import HistoryPolicy, make_policy, to_api
+from .ingest import log_window
+from .llm_cache import CachedLLMClient, cache_roots
+from .ratelimit import with_rate_limit
+from .skill_index import INDEX_DIRNAME, SkillIndex, find_similar_skills
+from .staging import STAGING_DIRNAME, SkillStaging, cleanup_stale
+from .structured import (
+    RESPONSE_FORMAT,
+    build_structured_message,
+    existing_skills_listing,
+    parse_structured,
+    validate_skills,
+)
+from .trace import RunTrace, TraceHook
+from .triage import triage_log
 
 
 TOOL_DEFS = [
@@ -21,11 +59,14 @@ TOOL_DEFS = [
         "type": "function",
         "function": {
             "name": "read_file",
-            "description": "Read the contents of a file. Allowed paths: under project root (e.g. agent log JSONL, configs) or under the skills output directory.",
+            "description": "Read the contents of a file, or a range of it. Allowed paths: under project root (e.g. agent log JSONL, configs) or under the skills output directory. For large logs, page through with offset/limit instead of reading the whole file; ranged results include next_offset, eof and total_bytes. Compressed logs (.gz, .xz, .zst) are read as plain text; offsets refer to the decompressed content.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "file_path": {"type": "string", "description": "Path to the file (relative to project root or absolute)."},
+                    "offset": {"type": "integer", "description": "Optional 0-based start of the range, in lines or bytes (see unit)."},
+                    "limit": {"type": "integer", "description": "Optional maximum number of lines or bytes to return (see unit)."},
+                    "unit": {"type": "string", "enum": ["lines", "bytes"], "description": "Unit for offset/limit; default: lines."},
                 },
                 "required": ["file_path"],
             },
@@ -46,11 +87,45 @@ TOOL_DEFS = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_log",
+            "description": "Search a log on the server side without reading it whole. With only pattern: regex over lines, returning line numbers, byte offsets and short snippets. With where: field filters over parsed records and their conversation/tool-call items, e.g. 'role == \"WebSurfer\" and content ~ /average/i' (operators == != > >= < <= ~ !~). Use it to locate successful steps, then read_file with offset/limit for detail.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "file_path": {"type": "string", "description": "Path to the log file (relative to project root or absolute)."},
+                    "pattern": {"type": "string", "description": "Optional regular expression to search for."},
+                    "where": {"type": "string", "description": "Optional field filter; clauses joined with 'and'."},
+                    "max_results": {"type": "integer", "description": "Maximum matches to return; default 20, at most 200."},
+                    "context_chars": {"type": "integer", "description": "Characters of context around each match; default 200, at most 2000."},
+                    "ignore_case": {"type": "boolean", "description": "Case-insensitive matching; default false."},
+                },
+                "required": ["file_path"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_similar_skills",
+            "description": "Find existing skills in the output library similar to a proposed skill (by name, description and trigger phrases). Use before writing a new SKILL.md to avoid duplicates and near-duplicates; returns the top-k matches with similarity scores (0-1).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Proposed skill name, description and trigger phrases."},
+                    "k": {"type": "integer", "description": "Number of matches to return; default 5."},
+                },
+                "required": ["query"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
             "name": "list_dir",
-            "description": "List directory contents (names only). Use to check existing skills before creating a new one to avoid duplicates.",
+            "description": "List directory contents (names only); compressed log files are flagged under 'compressed'. For duplicate checks against the skills library, prefer find_similar_skills, whose cost does not grow with the library.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -63,11 +138,44 @@ TOOL_DEFS = [
 ]
 
 
+def _parse_arguments(arguments: str, complete_only: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Parse tool-call arguments JSON. Invalid JSON gives {} (or None with complete_only,
+    used to test whether streamed arguments are complete yet).
+    """
+    try:
+        args = json.loads(arguments or "{}")
+    except json.JSONDecodeError:
+        return None if complete_only else {}
+    if isinstance(args, dict):
+        return args
+    return None if complete_only else {}
+
+
+def build_openai_client() -> OpenAI:
+    """Build an OpenAI client from OPENAI_CONFIG (retries are left to ratelimit.RateLimitedClient)."""
+    base_url = OPENAI_CONFIG.get("base_url")
+    return OpenAI(
+        api_key=OPENAI_CONFIG.get("api_key", ""),
+        base_url=base_url if base_url else None,
+        max_retries=0,
+    )
+
+
+_skill_context_cache: Dict[str, Tuple[int, str]] = {}
+
+
 def load_skill_context(skill_md_path: str) -> str:
-    """Load the full SKILL.md (summarizing-new-skills) as context."""
+    """Load the full SKILL.md (summarizing-new-skills) as context; cached until the file changes."""
     try:
+        mtime = os.stat(skill_md_path).st_mtime_ns
+        cached = _skill_context_cache.get(skill_md_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
         with open(skill_md_path, "r", encoding="utf-8") as f:
-            return f.read()
+            content = f.read()
+        _skill_context_cache[skill_md_path] = (mtime, content)
+        return content
     except Exception as e:
         return f"[Warning: Could not load skill file: {e}]\n"
 
@@ -79,8 +187,8 @@ You are a senior AI architect who extracts standardized workflows from messy exe
 
 # Capability: summarizing-new-skills
 When given a task to extract skills from agent logs, you must:
-1. Use list_dir to inspect the existing skills directory ({output_root}) and avoid creating duplicates.
-2. Use read_file to read the provided agent log (text file, often JSONL: one JSON per line with e.g. query, api_call_history, collected_info_sources).
+1. Use find_similar_skills with each proposed skill's name and description to avoid creating duplicates or near-duplicates of skills in {output_root} (list_dir shows the directory itself).
+2. Use search_log to locate relevant steps and read_file to read the provided agent log (text file, often JSONL: one JSON per line with e.g. query, api_call_history, collected_info_sources). For large logs, read ranges with offset/limit rather than the whole file.
 3. Apply Pattern Extraction: Success Mining, Context Gap, Variable Abstraction, Hidden Requirements, Decision Logic, Failure Modes.
 4. If you identify a reusable multi-step successful workflow, use write_file to produce a new SKILL.md under {output_root} (name: kebab-case only, no Unicode; description: third person with trigger phrases).
 5. Put complex steps in a scripts/ subdir; keep the main SKILL concise (progressive disclosure).
@@ -106,29 +214,73 @@ class SkillSummarizerAgent:
         llm_model: Optional[str] = None,
         skill_md_path: Optional[str] = None,
         max_turns: int = 20,
+        history_policy: Union[str, HistoryPolicy, None] = None,
+        tool_workers: Optional[int] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        stream: Optional[bool] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        trace: Optional[bool] = None,
+        trace_hooks: Optional[List[TraceHook]] = None,
+        skill_index: Optional[SkillIndex] = None,
+        priority: int = 0,
+        staged_writes: Optional[bool] = None,
+        budget: Optional[Dict[str, float]] = None,
+        cancel: Optional[threading.Event] = None,
     ):
         """
         Args:
             project_root: Root directory allowed for reads (logs, configs).
             output_root: Root directory allowed for writes (generated SKILLs).
-            llm_client: OpenAI-compatible client; built from OPENAI_CONFIG if None.
+            llm_client: OpenAI-compatible client; built from OPENAI_CONFIG if None. Requests go
+                through the process-wide rate limiter (ratelimit.with_rate_limit); wrapped in a
+                CachedLLMClient when SKILL_SUMMARIZER_LLM_CACHE_DIR is set.
             llm_model: Model name; defaults to OPENAI_CONFIG["model"].
             skill_md_path: Path to summarizing-new-skills SKILL.md; default: package SKILL.md.
-            max_turns: Maximum tool-call rounds per run.
+            max_turns: Maximum tool-call rounds per run (the turn budget).
+            history_policy: Context-window policy name ("full", "stub", "summarize") or a
+                HistoryPolicy instance (copied per run); default HISTORY_CONFIG["policy"].
+            tool_workers: Threads for the tool calls of one turn; default TOOL_CONFIG["workers"].
+            tool_timeouts: Per-tool timeouts in seconds (0 = none), on top of
+                TOOL_CONFIG["timeouts"]; tools not listed use TOOL_CONFIG["timeout"].
+            stream: Stream completions and start tools while the response is still arriving;
+                default OPENAI_CONFIG["stream"].
+            on_event: Progress callback, called (possibly from tool worker threads) with dicts
+                {"type", "t", ...}; types: turn_started, tokens, tool_dispatched,
+                tool_finished, file_written, budget_nudge, writes_committed, run_finished.
+            trace: Record a performance trace per run (result["trace"], see trace.py);
+                default TRACE_CONFIG["enabled"]. Implied by trace_hooks.
+            trace_hooks: TraceHook instances that receive turn/tool records as they are made.
+            skill_index: Index of output_root to share (e.g. kept warm by the daemon); loaded
+                lazily if None.
+            priority: Rate-limiter queue priority of this agent's requests (lower goes first).
+            staged_writes: Stage write_file calls per run and commit them only when the run
+                succeeds (see staging.py); default TOOL_CONFIG["staged_writes"].
+            budget: Per-run limits on top of the process defaults (BUDGET_CONFIG, see
+                budget.configure_budget), e.g. {"max_seconds": 300, "max_tokens": 200000,
+                "max_cost": 0.5}.
+            cancel: Event that abandons the current run: the loop stops before its next
+                turn and staged writes are rolled back instead of committed (e.g. when a
+                job-queue lease is lost).
         """
         self.project_root = os.path.abspath(project_root)
         self.output_root = os.path.abspath(output_root)
         self.llm_model = llm_model or OPENAI_CONFIG.get("model", "gpt-5.2")
         self.max_turns = max_turns
+        self.history_policy = make_policy(history_policy)
+        self.tool_workers = max(1, tool_workers or TOOL_CONFIG["workers"])
+        self.tool_timeouts = dict(TOOL_CONFIG["timeouts"], **(tool_timeouts or {}))
+        self.stream = OPENAI_CONFIG["stream"] if stream is None else stream
+        self.on_event = on_event
+        self.trace_hooks = list(trace_hooks or [])
+        self.trace = bool(self.trace_hooks) or (TRACE_CONFIG["enabled"] if trace is None else trace)
+        self.staged_writes = TOOL_CONFIG["staged_writes"] if staged_writes is None else staged_writes
+        self.budget = dict(budget or {})
+        self.cancel = cancel
 
-        if llm_client is not None:
-            self.llm_client = llm_client
-        else:
-            base_url = OPENAI_CONFIG.get("base_url")
-            self.llm_client = OpenAI(
-                api_key=OPENAI_CONFIG.get("api_key", ""),
-                base_url=base_url if base_url else None,
-            )
+        self.llm_client = llm_client if llm_client is not None else build_openai_client()
+        self.llm_client = with_rate_limit(self.llm_client, priority=priority)
+        if LLM_CACHE_CONFIG["dir"] and not isinstance(self.llm_client, CachedLLMClient):
+            self.llm_client = CachedLLMClient(self.llm_client, mode=LLM_CACHE_CONFIG["mode"])
 
         pkg_dir = os.path.dirname(__file__)
         self.skill_md_path = skill_md_path or os.path.join(pkg_dir, "SKILL.md")
@@ -136,7 +288,25 @@ class SkillSummarizerAgent:
         self.system_message = build_system_message(self.skill_content, self.output_root)
 
         self.allowed_read_roots = [self.project_root, self.output_root]
+        self._read_cache: Optional[file_tools.FileReadCache] = None
+        self._run_id: Optional[str] = None
+        self._staging: Optional[SkillStaging] = None
+        self._tool_pool: Optional[ThreadPoolExecutor] = None
+        self._on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._run_started = 0.0
+        self._trace: Optional[RunTrace] = None
+        self._turn = 0
+        self._skill_index: Optional[SkillIndex] = skill_index
         os.makedirs(self.output_root, exist_ok=True)
+        if self.staged_writes:
+            cleanup_stale(self.output_root, TOOL_CONFIG["staging_max_age"])
+
+    @property
+    def skill_index(self) -> SkillIndex:
+        """Index of the skills under output_root; loaded (or built) on first use."""
+        if self._skill_index is None:
+            self._skill_index = SkillIndex(self.output_root)
+        return self._skill_index
 
     def _resolve_path(self, path: str) -> str:
         """Resolve path to absolute; relative paths are under project_root."""
@@ -144,99 +314,701 @@ class SkillSummarizerAgent:
             return path
         return os.path.join(self.project_root, path)
 
+    def _read_path(self, path: str) -> str:
+        """Path to read for path: the run's staged copy when it wrote one, else path itself."""
+        staged = self._staging.staged_path(path) if self._staging is not None else None
+        return staged or path
+
     def _run_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a single tool call."""
         if name == "read_file":
-            file_path = self._resolve_path(arguments["file_path"])
-            return file_tools.read_file(file_path, self.allowed_read_roots)
+            file_path = self._read_path(self._resolve_path(arguments["file_path"]))
+            return file_tools.read_file(
+                file_path,
+                self.allowed_read_roots,
+                offset=arguments.get("offset"),
+                limit=arguments.get("limit"),
+                unit=arguments.get("unit") or "lines",
+                cache=self._read_cache,
+            )
         if name == "write_file":
             file_path = arguments["file_path"]
             if not os.path.isabs(file_path):
                 file_path = os.path.join(self.output_root, file_path)
-            return file_tools.write_file(file_path, arguments["content"], self.output_root)
+            staging_root = self._staging.root if self._staging is not None else None
+            result = file_tools.write_file(
+                file_path, arguments["content"], self.output_root, owner=self._run_id, staging_root=staging_root
+            )
+            if result["success"] and staging_root is None and os.path.basename(result["path"]) == "SKILL.md":
+                self.skill_index.update_skill(result["path"])
+            return result
+        if name == "find_similar_skills":
+            return find_similar_skills(self.skill_index, arguments.get("query", ""), arguments.get("k") or 5)
+        if name == "search_log":
+            file_path = self._read_path(self._resolve_path(arguments["file_path"]))
+            return file_tools.search_log(
+                file_path,
+                self.allowed_read_roots,
+                pattern=arguments.get("pattern"),
+                where=arguments.get("where"),
+                max_results=int(arguments.get("max_results") or 20),
+                context_chars=int(arguments.get("context_chars") or 200),
+                ignore_case=bool(arguments.get("ignore_case")),
+            )
         if name == "list_dir":
             dir_path = self._resolve_path(arguments["dir_path"])
-            return file_tools.list_dir(dir_path, self.allowed_read_roots)
+            result = file_tools.list_dir(dir_path, self.allowed_read_roots)
+            staged = self._staging.staged_path(dir_path) if self._staging is not None else None
+            if staged and os.path.isdir(staged):
+                # Show the files this run has staged as if they were already written.
+                staged_result = file_tools.list_dir(staged, [self._staging.root])
+                entries = set(result.get("entries") or []) | set(staged_result.get("entries") or [])
+                result = dict(result, success=True, entries=sorted(entries), error=None)
+            if result.get("entries") and os.path.abspath(dir_path) == self.output_root:
+                result["entries"] = [e for e in result["entries"] if e not in (STAGING_DIRNAME, INDEX_DIRNAME)]
+            return result
         return {"success": False, "error": f"Unknown tool: {name}"}
 
+    def _tool_path(self, name: str, arguments: Dict[str, Any]) -> Optional[str]:
+        """Real path a tool call reads or writes (None if it touches no single path)."""
+        if name == "write_file":
+            path = arguments.get("file_path")
+            if path and not os.path.isabs(path):
+                path = os.path.join(self.output_root, path)
+        elif name in ("read_file", "search_log"):
+            path = arguments.get("file_path")
+            path = self._resolve_path(path) if path else None
+        elif name == "list_dir":
+            path = arguments.get("dir_path")
+            path = self._resolve_path(path) if path else None
+        else:
+            return None
+        return os.path.realpath(path) if path else None
+
+    def _emit(self, event_type: str, **fields: Any) -> None:
+        """Send a progress event to the run's on_event callback (if any)."""
+        if self._on_event is not None:
+            fields.update(type=event_type, t=round(time.monotonic() - self._run_started, 3))
+            self._on_event(fields)
+
+    def _run_tool_after(
+        self,
+        call_id: str,
+        name: str,
+        arguments: Dict[str, Any],
+        previous: Optional[Future],
+        abandoned: threading.Event,
+        turn: int,
+        queued: float,
+    ) -> Dict[str, Any]:
+        """Worker body: wait for the previous call on the same path, then run the tool."""
+        if previous is not None:
+            concurrent.futures.wait([previous])
+        if abandoned.is_set():
+            return {"success": False, "error": f"Tool {name} was abandoned after a timeout."}
+        t0 = time.monotonic()
+        try:
+            result = self._run_tool(name, arguments)
+        except Exception as e:
+            result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        t1 = time.monotonic()
+        if self._trace is not None:
+            self._trace_tool(turn, call_id, name, arguments, result, queued, t0, t1)
+        self._emit(
+            "tool_finished", id=call_id, name=name, success=bool(result.get("success")),
+            error=result.get("error"), elapsed=round(t1 - t0, 3),
+        )
+        if name == "write_file" and result.get("success"):
+            self._emit("file_written", path=result.get("path"), bytes=len(arguments.get("content", "").encode("utf-8")))
+        return result
+
+    def _trace_tool(
+        self,
+        turn: int,
+        call_id: str,
+        name: str,
+        arguments: Dict[str, Any],
+        result: Dict[str, Any],
+        queued: float,
+        start: float,
+        end: float,
+    ) -> None:
+        ok = bool(result.get("success"))
+        content = result.get("content") if name == "read_file" else arguments.get("content") if name == "write_file" else None
+        size = len(content.encode("utf-8")) if ok and isinstance(content, str) else 0
+        base = self._trace.started
+        self._trace.add_tool(
+            turn, call_id, name, queued - base, start - base, end - base, ok,
+            bytes_read=size if name == "read_file" else 0,
+            bytes_written=size if name == "write_file" else 0,
+            result_bytes=len(json.dumps(result, ensure_ascii=False).encode("utf-8")),
+        )
+
+    def _dispatch_tool(
+        self,
+        call_id: str,
+        name: str,
+        arguments: Dict[str, Any],
+        last_on_path: Dict[str, Tuple[Future, Optional[float]]],
+    ) -> Tuple[str, Future, Optional[float], float, threading.Event]:
+        """
+        Submit one tool call to the pool; returns the pending handle for _collect_tool.
+
+        A call waits for the previous call on the same path (last_on_path, shared by the
+        calls of one turn). Its timeout counts from dispatch, or from the deadline of the
+        call queued before it on its path.
+        """
+        timeout = self.tool_timeouts.get(name, TOOL_CONFIG["timeout"])
+        path = self._tool_path(name, arguments)
+        previous, deadline = last_on_path.get(path, (None, time.monotonic())) if path else (None, time.monotonic())
+        deadline = deadline + timeout if timeout and deadline is not None else None
+        abandoned = threading.Event()
+        self._emit("tool_dispatched", id=call_id, name=name, arguments=arguments)
+        future = self._tool_pool.submit(
+            self._run_tool_after, call_id, name, arguments, previous, abandoned, self._turn, time.monotonic()
+        )
+        if path:
+            last_on_path[path] = (future, deadline)
+        return name, future, deadline, timeout, abandoned
+
+    @staticmethod
+    def _collect_tool(pending: Tuple[str, Future, Optional[float], float, threading.Event]) -> Dict[str, Any]:
+        """Wait for a dispatched call until its deadline; a timed-out call gets an error result."""
+        name, future, deadline, timeout, abandoned = pending
+        try:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            return future.result(timeout=wait)
+        except concurrent.futures.TimeoutError:
+            abandoned.set()
+            state = "did not start" if future.cancel() else "may still complete in the background"
+            return {"success": False, "error": f"Tool {name} timed out after {timeout:g}s ({state})."}
+
+    def _run_tool_calls(self, calls: List[Tuple[str, str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Run the (id, name, arguments) tool calls of one turn concurrently; results are
+        returned in call order. Calls on the same path run one after another in their
+        original order; a timed-out call gets an error result and the turn moves on.
+        """
+        last_on_path: Dict[str, Tuple[Future, Optional[float]]] = {}
+        pending = [self._dispatch_tool(call_id, name, args, last_on_path) for call_id, name, args in calls]
+        return [self._collect_tool(p) for p in pending]
+
     def run(
         self,
         user_message: str,
         initial_messages: Optional[List[Dict[str, str]]] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        resume: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Run one summarization task.
 
+        Args:
+            user_message: Task message (see build_user_message).
+            initial_messages: Optional messages inserted between the system and task messages.
+            on_event: Progress callback for this run; default: the agent's on_event.
+            resume: The "resume" state of an earlier failed result; the conversation continues
+                from its last completed turn (initial_messages is then ignored).
+
         Returns:
-            {"success": bool, "message": str, "tool_calls": list, "final_response": str | None}
+            {"success": bool, "message": str, "tool_calls": list, "final_response": str | None,
+             "history": dict}
+            history: token stats of the history policy for this run (policy, calls,
+            tokens_full, tokens_sent, tokens_saved, compactions, prompt_tokens).
+            With tracing enabled, also "trace" (see trace.RunTrace.to_dict).
+            When a model request still fails after the rate limiter's retries, success is
+            False with "error" and "resume" ({"messages", "tool_calls", "turns", "pinned",
+            "staging"}); pass it to resume() to continue instead of starting over.
+            "budget": usage and limits of the run (see budget.RunBudget.stats). When a budget
+            runs out (max_turns included) before the model finishes, the result is partial:
+            success False, "partial": True, "stopped" ("turns", "wall_clock", "tokens" or
+            "cost"), "error", and the skills written so far are kept. When the agent's cancel
+            event is set, the result has "cancelled": True and the staged writes are dropped.
+            With staged writes, also "writes" ({"committed", "written", "skipped", "bytes",
+            "files", "discarded"}; see staging.SkillStaging.commit): files reach output_root
+            when the run succeeds or stops on a budget.
         """
-        messages: List[Dict[str, Any]] = [
-            {"role": "system", "content": self.system_message},
-        ]
-        if initial_messages:
-            messages.extend(initial_messages)
-        messages.append({"role": "user", "content": user_message})
+        with self._run_scope(on_event, staging_id=(resume or {}).get("staging")):
+            return self._finish_run(self._loop(user_message, initial_messages, resume))
 
-        tool_calls_log: List[Dict] = []
-        turn = 0
+    @contextlib.contextmanager
+    def _run_scope(
+        self,
+        on_event: Optional[Callable[[Dict[str, Any]], None]],
+        staging_id: Optional[str] = None,
+        **trace_meta: Any,
+    ) -> Iterator[None]:
+        """
+        Per-run state: read cache, run id (skill claims), write staging, tool pool, event
+        callback, trace, cache roots. Staged writes not committed by _finish_run are rolled back.
+        """
+        self._read_cache = file_tools.FileReadCache()
+        self._run_id = uuid.uuid4().hex
+        if self.staged_writes:
+            self._staging = SkillStaging(self.output_root, staging_id or self._run_id)
+            self._staging.claim()
+        self._tool_pool = ThreadPoolExecutor(max_workers=self.tool_workers, thread_name_prefix="skill-tool")
+        self._on_event = on_event or self.on_event
+        self._run_started = time.monotonic()
+        if self.trace:
+            self._trace = RunTrace(
+                self.trace_hooks,
+                meta=dict(
+                    {"model": self.llm_model, "stream": self.stream, "history_policy": self.history_policy.name},
+                    **trace_meta,
+                ),
+            )
+        try:
+            with cache_roots({"<output_root>": self.output_root, "<project_root>": self.project_root}):
+                yield
+        finally:
+            # Do not wait for timed-out tool calls that are still running.
+            self._tool_pool.shutdown(wait=False)
+            self._tool_pool = None
+            self._read_cache.close()
+            self._read_cache = None
+            if self._staging is not None:
+                self._staging.rollback()
+                self._staging = None
+            file_tools.release_skill_claims(self._run_id)
+            self._run_id = None
+            self._on_event = None
+            self._trace = None
 
-        while turn < self.max_turns:
-            turn += 1
+    def _finish_run(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if self._staging is not None:
+            result["writes"] = self._settle_writes(result)
+        if self._trace is not None:
+            result["trace"] = self._trace.finish()
+        self._emit("run_finished", success=result["success"], tool_calls=len(result["tool_calls"]))
+        return result
+
+    def _settle_writes(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Commit the run's staged writes if it succeeded or stopped on a budget, else roll them
+        back (always when the run was cancelled). A resumable failure keeps them: the staging
+        id goes into result["resume"] for resume().
+        """
+        staging, self._staging = self._staging, None
+        if self.cancel is not None and self.cancel.is_set():
+            result.pop("partial", None)
+            result.update(success=False, cancelled=True, error=result.get("error") or "Cancelled before the writes were committed")
+            return staging.rollback()
+        if result.get("resume") is not None:
+            result["resume"]["staging"] = staging.run_id
+            return staging.keep()
+        if not (result["success"] or result.get("partial")):
+            return staging.rollback()
+        writes = staging.commit()
+        for rel in writes["files"]:
+            if os.path.basename(rel) == "SKILL.md":
+                self.skill_index.update_skill(os.path.join(self.output_root, rel))
+        self._emit("writes_committed", written=writes["written"], skipped=writes["skipped"], bytes=writes["bytes"])
+        return writes
+
+    def run_structured(
+        self,
+        structured_message: str,
+        fallback_message: str,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Single-shot structured mode: one request answered with JSON (structured.SKILLS_SCHEMA),
+        validated and written by the harness instead of the tool loop.
+
+        Args:
+            structured_message: Task with the skill listing and log pre-injected (see
+                build_structured_message).
+            fallback_message: Task for run(), used when the request fails or the answer does
+                not validate.
+            on_event: Progress callback for this run; default: the agent's on_event.
+
+        Returns:
+            The run() result shape plus "mode" ("structured" or "tool_loop"); after a
+            fallback also "structured_error" (why the single-shot answer was rejected).
+        """
+        with self._run_scope(on_event, mode="structured"):
+            result, error = self._structured_turn(structured_message)
+            if result is not None:
+                return self._finish_run(result)
+        self._emit("structured_fallback", error=error)
+        result = self.run(fallback_message, on_event=on_event)
+        result.update(mode="tool_loop", structured_error=error)
+        return result
+
+    def _structured_turn(self, message: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """One structured request; returns (result, None), or (None, error) to fall back."""
+        self._turn = 1
+        self._emit("turn_started", turn=1)
+        messages = [{"role": "system", "content": self.system_message}, {"role": "user", "content": message}]
+        history = self.history_policy.fresh()
+        history.pin(len(messages))
+        turn_start = time.monotonic()
+        try:
             response = self.llm_client.chat.completions.create(
                 model=self.llm_model,
-                messages=messages,
-                tools=TOOL_DEFS,
-                tool_choice="auto",
+                messages=to_api(history.view(messages)),
+                response_format=RESPONSE_FORMAT,
                 temperature=OPENAI_CONFIG.get("temperature", 0.3),
-                max_completion_tokens=OPENAI_CONFIG.get("max_tokens", 4096),
+                max_completion_tokens=STRUCTURED_CONFIG["max_completion_tokens"],
             )
-            choice = response.choices[0]
-            msg = choice.message
+        except Exception as e:
+            return None, f"Model request failed: {e}"
+        usage = getattr(response, "usage", None)
+        history.record_usage(usage)
+        if self._trace is not None:
+            base = self._trace.started
+            self._trace.add_turn(1, turn_start - base, time.monotonic() - base, usage=usage, first_token=None, tool_calls=0)
+        content = response.choices[0].message.content or ""
+        self._emit("tokens", turn=1, content=content, received=len(content),
+                   completion_tokens=getattr(usage, "completion_tokens", None))
+        data, error = parse_structured(content)
+        if data is None:
+            return None, error
+        files, errors = validate_skills(data, self.output_root)
+        if errors:
+            return None, "; ".join(errors)
+
+        calls = [
+            (f"structured-{i}", "write_file", {"file_path": path, "content": text})
+            for i, (path, text) in enumerate(files)
+        ]
+        results = self._run_tool_calls(calls)
+        tool_calls_log = [
+            {"name": name, "arguments": args, "result": res} for (_, name, args), res in zip(calls, results)
+        ]
+        failed = [f"{args['file_path']}: {res.get('error')}" for (_, _, args), res in zip(calls, results) if not res.get("success")]
+        result = {
+            "success": not failed,
+            "message": message,
+            "tool_calls": tool_calls_log,
+            "final_response": data.get("summary") or "",
+            "history": history.stats,
+            "mode": "structured",
+            "skills": [skill["name"] for skill in data["skills"]],
+        }
+        if failed:
+            result["error"] = "Write failed: " + "; ".join(failed)
+        return result, None
+
+    def resume(
+        self, result: Dict[str, Any], on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Continue a run that failed on a model request (result must carry "resume")."""
+        return self.run(result["message"], on_event=on_event, resume=result["resume"])
 
-            if not getattr(msg, "tool_calls", None) or len(msg.tool_calls) == 0:
+    def iter_run(
+        self,
+        user_message: str,
+        initial_messages: Optional[List[Dict[str, str]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run one task in a background thread and yield its progress events as they happen.
+
+        The last event is {"type": "result", "result": <run() result>}; an exception raised
+        by the run is re-raised from the iterator.
+        """
+        events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        outcome: Dict[str, Any] = {}
+
+        def work() -> None:
+            try:
+                outcome["result"] = self.run(user_message, initial_messages, on_event=events.put)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                events.put({"type": "_done"})
+
+        worker = threading.Thread(target=work, name="skill-summarizer-run", daemon=True)
+        worker.start()
+        while True:
+            event = events.get()
+            if event["type"] == "_done":
+                break
+            yield event
+        worker.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        yield {"type": "result", "result": outcome["result"]}
+
+    def _request(self, history: HistoryPolicy, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "model": self.llm_model,
+            "messages": to_api(history.view(messages)),
+            "tools": TOOL_DEFS,
+            "tool_choice": "auto",
+            "temperature": OPENAI_CONFIG.get("temperature", 0.3),
+            "max_completion_tokens": OPENAI_CONFIG.get("max_tokens", 4096),
+        }
+
+    def _complete_turn(
+        self, turn: int, history: HistoryPolicy, messages: List[Dict[str, Any]]
+    ) -> Tuple[str, List[Tuple[str, str, str]], List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Non-streaming model call; runs the tool calls it returns.
+
+        Returns (content, [(id, name, raw arguments)], tool results, timing), where timing is
+        {"usage", "first_token", "llm_end"} (time.monotonic() values).
+        """
+        response = self.llm_client.chat.completions.create(**self._request(history, messages))
+        timing = {"usage": getattr(response, "usage", None), "first_token": None, "llm_end": time.monotonic()}
+        usage = timing["usage"]
+        msg = response.choices[0].message
+        content = getattr(msg, "content", None) or ""
+        self._emit("tokens", turn=turn, content=content, received=len(content),
+                   completion_tokens=getattr(usage, "completion_tokens", None))
+        raw_calls = [(tc.id, tc.function.name, tc.function.arguments) for tc in getattr(msg, "tool_calls", None) or []]
+        results = self._run_tool_calls([(call_id, name, _parse_arguments(args)) for call_id, name, args in raw_calls])
+        return content, raw_calls, results, timing
+
+    def _stream_turn(
+        self, turn: int, history: HistoryPolicy, messages: List[Dict[str, Any]]
+    ) -> Tuple[str, List[Tuple[str, str, str]], List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Streaming model call: assemble tool calls from deltas and dispatch each one as soon
+        as its arguments form a complete JSON object. Same return shape as _complete_turn.
+        """
+        stream = self.llm_client.chat.completions.create(
+            **self._request(history, messages), stream=True, stream_options={"include_usage": True}
+        )
+        content_parts: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        last_on_path: Dict[str, Tuple[Future, Optional[float]]] = {}
+        received = 0
+        timing: Dict[str, Any] = {"usage": None, "first_token": None, "llm_end": None}
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                timing["usage"] = chunk.usage
+            if not chunk.choices:
+                continue
+            if timing["first_token"] is None:
+                timing["first_token"] = time.monotonic()
+            delta = chunk.choices[0].delta
+            text = getattr(delta, "content", None) or ""
+            if text:
+                content_parts.append(text)
+            received += len(text)
+            for d in getattr(delta, "tool_calls", None) or []:
+                call = calls.setdefault(d.index, {"id": None, "name": "", "arguments": "", "pending": None})
+                if d.id:
+                    call["id"] = d.id
+                fragment = ""
+                if d.function is not None:
+                    if d.function.name:
+                        call["name"] = d.function.name
+                    fragment = d.function.arguments or ""
+                    call["arguments"] += fragment
+                received += len(fragment)
+                if call["pending"] is None and call["id"] and call["name"] and "}" in fragment:
+                    args = _parse_arguments(call["arguments"], complete_only=True)
+                    if args is not None:
+                        call["pending"] = self._dispatch_tool(call["id"], call["name"], args, last_on_path)
+            self._emit("tokens", turn=turn, content=text, received=received)
+        timing["llm_end"] = time.monotonic()
+
+        raw_calls = []
+        pending = []
+        for index in sorted(calls):
+            call = calls[index]
+            if call["pending"] is None:
+                args = _parse_arguments(call["arguments"])
+                call["pending"] = self._dispatch_tool(call["id"], call["name"], args, last_on_path)
+            raw_calls.append((call["id"], call["name"], call["arguments"]))
+            pending.append(call["pending"])
+        return "".join(content_parts), raw_calls, [self._collect_tool(p) for p in pending], timing
+
+    def _loop(
+        self,
+        user_message: str,
+        initial_messages: Optional[List[Dict[str, str]]],
+        resume: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Tool-calling loop for run(); see run() for the return shape."""
+        if resume is not None:
+            messages: List[Dict[str, Any]] = list(resume["messages"])
+            pinned = resume["pinned"]
+            tool_calls_log: List[Dict] = list(resume["tool_calls"])
+            turn = resume["turns"]
+        else:
+            messages = [{"role": "system", "content": self.system_message}]
+            if initial_messages:
+                messages.extend(initial_messages)
+            messages.append({"role": "user", "content": user_message})
+            pinned = len(messages)
+            tool_calls_log = []
+            turn = 0
+        history = self.history_policy.fresh()
+        history.pin(pinned)
+        budget = RunBudget.from_defaults(self.max_turns, self.budget, cancel=self.cancel)
+        nudged = False
+        content = None
+
+        while True:
+            stopped = budget.exhausted(turn)
+            if stopped is not None:
+                break
+            closing = None if nudged else budget.closing(turn)
+            if closing is not None:
+                # Said once: the model gets the remaining turns to write what it has.
+                nudged = True
+                messages.append({"role": "user", "content": NUDGE_MESSAGE.format(reason=closing)})
+                self._emit("budget_nudge", turn=turn, reason=closing)
+            turn += 1
+            self._turn = turn
+            self._emit("turn_started", turn=turn)
+            run_turn = self._stream_turn if self.stream else self._complete_turn
+            turn_start = time.monotonic()
+            sent_before = history.stats["tokens_sent"]
+            try:
+                content, raw_calls, results, timing = run_turn(turn, history, messages)
+            except Exception as e:
+                # Retries are exhausted (or the error is not retryable): keep the conversation
+                # up to the last completed turn so the caller can resume it.
+                return {
+                    "success": False,
+                    "message": user_message,
+                    "tool_calls": tool_calls_log,
+                    "final_response": None,
+                    "history": history.stats,
+                    "budget": budget.stats(),
+                    "error": f"Model request failed: {e}",
+                    "resume": {"messages": messages, "tool_calls": tool_calls_log, "turns": turn - 1, "pinned": pinned},
+                }
+            history.record_usage(timing["usage"])
+            budget.record(time.monotonic() - turn_start, *_turn_tokens(
+                timing["usage"], history.stats["tokens_sent"] - sent_before, content, raw_calls
+            ))
+            if self._trace is not None:
+                base = self._trace.started
+                first_token = timing["first_token"]
+                self._trace.add_turn(
+                    turn, turn_start - base, timing["llm_end"] - base, usage=timing["usage"],
+                    first_token=None if first_token is None else first_token - base, tool_calls=len(raw_calls),
+                )
+
+            if not raw_calls:
                 return {
                     "success": True,
                     "message": user_message,
                     "tool_calls": tool_calls_log,
-                    "final_response": getattr(msg, "content", None) or "",
+                    "final_response": content,
+                    "history": history.stats,
+                    "budget": budget.stats(),
                 }
 
             messages.append({
                 "role": "assistant",
-                "content": msg.content or "",
+                "content": content,
                 "tool_calls": [
-                    {"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
-                    for tc in msg.tool_calls
+                    {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+                    for call_id, name, arguments in raw_calls
                 ],
             })
-
-            for tc in msg.tool_calls:
-                name = tc.function.name
-                try:
-                    args = json.loads(tc.function.arguments)
-                except json.JSONDecodeError:
-                    args = {}
-                result = self._run_tool(name, args)
-                tool_calls_log.append({"name": name, "arguments": args, "result": result})
+            for (call_id, name, arguments), result in zip(raw_calls, results):
+                tool_calls_log.append({"name": name, "arguments": _parse_arguments(arguments), "result": result})
                 messages.append({
                     "role": "tool",
-                    "tool_call_id": tc.id,
+                    "tool_call_id": call_id,
                     "content": json.dumps(result, ensure_ascii=False),
                 })
 
+        if stopped == "cancelled":
+            return {
+                "success": False,
+                "cancelled": True,
+                "message": user_message,
+                "tool_calls": tool_calls_log,
+                "final_response": None,
+                "history": history.stats,
+                "budget": budget.stats(),
+                "error": f"Cancelled after {turn} turn(s)",
+            }
         return {
             "success": False,
+            "partial": True,
+            "stopped": stopped,
             "message": user_message,
             "tool_calls": tool_calls_log,
-            "final_response": None,
+            "final_response": content or None,
+            "history": history.stats,
+            "budget": budget.stats(),
+            "error": f"Stopped after {turn} turn(s): {stopped.replace('_', '-')} budget exhausted",
         }
 
 
+def _turn_tokens(usage: Any, prompt_estimate: int, content: str, raw_calls: List[Tuple[str, str, str]]) -> Tuple[int, int]:
+    """(prompt, completion) tokens of a turn: provider-reported, else estimated."""
+    prompt = getattr(usage, "prompt_tokens", None) if usage is not None else None
+    completion = getattr(usage, "completion_tokens", None) if usage is not None else None
+    if not isinstance(prompt, int):
+        prompt = prompt_estimate
+    if not isinstance(completion, int):
+        completion = estimate_tokens(content + "".join(name + arguments for _, name, arguments in raw_calls))
+    return prompt, completion
+
+
+def build_user_message(
+    log_path: str,
+    abs_log: str,
+    output_root: str,
+    window: Dict[str, Any],
+    digest: bool = False,
+    digest_stages: Optional[List[Stage]] = None,
+    note: Optional[str] = None,
+) -> str:
+    """
+    Build the summarization task message for a log window (see ingest.log_window).
+
+    The window's byte range [start_offset, end_offset) is shown either as its first 50
+    lines or, with digest=True, as a compact digest. note is inserted after the log path.
+    """
+    total_lines = window["total_lines"]
+    if digest:
+        digested = digest_log(
+            abs_log, start=window["start_offset"], end=window.get("end_offset"), stages=digest_stages
+        )
+        stats = digested["stats"]
+        log_section = (
+            f"Total lines: {total_lines}. Digest of {stats['records']} record(s) "
+            f"({stats['input_bytes']} -> {stats['output_bytes']} bytes; repeated text replaced by "
+            f"<dup ref:hash>, long fields elided; [ref] = record/JSON path in the original log):\n\n"
+            f"---\n{digested['text']}\n---"
+        )
+    else:
+        log_preview = "\n".join(window["preview"])
+        if total_lines > 50:
+            log_preview += f"\n... ({total_lines} lines total; use read_file for more.)"
+        log_section = f"Total lines: {total_lines}. First 50 lines:\n\n---\n{log_preview}\n---"
+    if note:
+        log_section = f"{note}\n{log_section}"
+
+    return f"""Extract reusable skills from the agent log below and write SKILL.md files following the summarizing-new-skills spec.
+
+Log path: {log_path}
+{log_section}
+
+Check proposed skills with find_similar_skills (library: {output_root}) to avoid duplicates, then analyze repeated successful patterns, then write_file new SKILL.md(s)."""
+
+
 def summarize_skills_from_log(
     log_path: str,
     project_root: Optional[str] = None,
     output_root: Optional[str] = None,
     last_n: Optional[int] = None,
+    digest: bool = False,
+    digest_stages: Optional[List[Stage]] = None,
+    llm_client: Optional[OpenAI] = None,
+    history_policy: Union[str, HistoryPolicy, None] = None,
+    stream: Optional[bool] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    trace: Optional[bool] = None,
+    trace_hooks: Optional[List[TraceHook]] = None,
+    agent: Optional[SkillSummarizerAgent] = None,
+    structured: Optional[bool] = None,
+    triage: Optional[bool] = None,
+    min_score: Optional[float] = None,
+    budget: Optional[Dict[str, float]] = None,
+    cancel: Optional[threading.Event] = None,
 ) -> Dict[str, Any]:
     """
     SDK entry point: summarize skills from an agent log file.
@@ -249,9 +1021,38 @@ def summarize_skills_from_log(
         project_root: Root for reading; defaults to current working directory.
         output_root: Root for writing generated SKILLs; defaults to package default.
         last_n: Use only the last N lines of the log; None = use all.
+        digest: Send a compact pre-digested view of the log (deduped, truncated, noise
+            dropped; see digest.py) instead of the first 50 raw lines.
+        digest_stages: Custom digest pipeline; default: digest.default_stages().
+        llm_client: OpenAI-compatible client to reuse (e.g. shared across a batch); built from
+            OPENAI_CONFIG if None.
+        history_policy: Context-window policy for the agent loop (see history.py); default
+            HISTORY_CONFIG["policy"].
+        stream: Stream completions (tools start while the response arrives); default
+            OPENAI_CONFIG["stream"].
+        on_event: Progress callback (see SkillSummarizerAgent).
+        trace: Attach a performance trace as result["trace"]; default TRACE_CONFIG["enabled"].
+        trace_hooks: TraceHook instances receiving trace records (implies trace).
+        agent: Pre-built agent to run (e.g. with a warm client and skill index); the
+            client/policy/stream/trace arguments are then ignored.
+        structured: Single-shot structured mode (SkillSummarizerAgent.run_structured): one
+            request with the skill listing and digested log, falling back to the tool loop
+            when the answer is invalid or the digest is truncated or over
+            STRUCTURED_CONFIG["max_prompt_tokens"]; default STRUCTURED_CONFIG["enabled"].
+        triage: Score the log locally first (triage.triage_log) and return without any LLM
+            call when it is not worth summarizing; default TRIAGE_CONFIG["enabled"].
+        min_score: Triage threshold; default TRIAGE_CONFIG["min_score"].
+        budget: Run limits (max_seconds, max_tokens, max_cost, ...) on top of BUDGET_CONFIG;
+            see SkillSummarizerAgent. Ignored with a pre-built agent.
+        cancel: Event that abandons the run and drops its writes (see SkillSummarizerAgent).
+            Ignored with a pre-built agent.
 
     Returns:
-        {"success": bool, "message": str, "tool_calls": list, "final_response": str | None}
+        {"success": bool, "message": str, "tool_calls": list, "final_response": str | None,
+         "history": dict, "trace": dict (when tracing)}; in structured mode also "mode"
+        and, after a fallback, "structured_error". With triage, also "triage" and "skipped"
+        (a skipped log counts as success). "budget" holds the run's usage; a run stopped by
+        a budget has "partial" and "stopped" (see SkillSummarizerAgent.run).
     """
     from .config import DEFAULT_OUTPUT_DIR
 
@@ -267,29 +1068,52 @@ def summarize_skills_from_log(
             "final_response": f"Log file not found: {abs_log}",
         }
 
-    lines = []
-    with open(abs_log, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                lines.append(line)
-    if last_n is not None and last_n > 0:
-        lines = lines[-last_n:]
-
-    log_preview = "\n".join(lines[:50])
-    if len(lines) > 50:
-        log_preview += f"\n... ({len(lines)} lines total; use read_file for more.)"
-
-    user_message = f"""Extract reusable skills from the agent log below and write SKILL.md files following the summarizing-new-skills spec.
-
-Log path: {log_path}
-Total lines: {len(lines)}. First 50 lines:
-
----
-{log_preview}
----
+    verdict = triage_log(abs_log, min_score=min_score) if (TRIAGE_CONFIG["enabled"] if triage is None else triage) else None
+    if verdict is not None and verdict["decision"] == "skip":
+        return {
+            "success": True,
+            "skipped": True,
+            "message": "",
+            "tool_calls": [],
+            "final_response": f"Skipped by triage (score {verdict['score']}): {'; '.join(verdict['reasons'])}",
+            "triage": verdict,
+        }
 
-First list_dir on {output_root} to avoid duplicates, then analyze repeated successful patterns, then write_file new SKILL.md(s)."""
+    window = log_window(abs_log, last_n=last_n, preview_lines=50)
+    user_message = build_user_message(
+        log_path, abs_log, output_root, window, digest=digest, digest_stages=digest_stages
+    )
 
-    agent = SkillSummarizerAgent(project_root=project_root, output_root=output_root)
-    return agent.run(user_message)
+    if agent is None:
+        agent = SkillSummarizerAgent(
+            project_root=project_root,
+            output_root=output_root,
+            llm_client=llm_client,
+            history_policy=history_policy,
+            stream=stream,
+            on_event=on_event,
+            trace=trace,
+            trace_hooks=trace_hooks,
+            budget=budget,
+            cancel=cancel,
+        )
+    if not (STRUCTURED_CONFIG["enabled"] if structured is None else structured):
+        result = agent.run(user_message)
+    else:
+        structured_message, stats = build_structured_message(
+            log_path, abs_log, window, existing_skills_listing(agent.skill_index), digest_stages=digest_stages
+        )
+        if stats["truncated"]:
+            reason = "log digest was truncated"
+        elif estimate_tokens(structured_message) > STRUCTURED_CONFIG["max_prompt_tokens"]:
+            reason = f"prompt exceeds {STRUCTURED_CONFIG['max_prompt_tokens']} estimated tokens"
+        else:
+            reason = None
+        if reason is None:
+            result = agent.run_structured(structured_message, user_message)
+        else:
+            result = agent.run(user_message)
+            result.update(mode="tool_loop", structured_error=reason)
+    if verdict is not None:
+        result.update(skipped=False, triage=verdict)
+    return result
@@ -0,0 +1,232 @@
+"""
+Per-run staging of skill writes: nothing reaches the skills library until the run succeeds.
+
+With a staging_root, write_file puts each file of a run under
+<output_root>/.staging/<run id>/, at its path relative to output_root. When the run ends, the
+agent commits the staging area on success or rolls it back on failure:
+
+- Files whose content hash equals the file already in the library are skipped, so a rerun
+  that produces the same skill leaves mtimes (and downstream caches and syncs) alone.
+- A new skill directory is moved into place with a single rename: readers see either no
+  skill or the whole skill.
+- In an existing skill directory, changed files are renamed over their targets one by one
+  (each atomic), SKILL.md last.
+- rollback deletes the staging area; the library is untouched.
+
+claim() records the owning process in <run id>.owner next to the staging area. A crash
+leaves both behind; cleanup_stale removes those whose owner process is gone (same host) or,
+when that cannot be checked, that are older than a maximum age.
+"""
+import hashlib
+import json
+import os
+import shutil
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+STAGING_DIRNAME = ".staging"
+OWNER_SUFFIX = ".owner"
+
+
+def file_hash(path: str) -> Optional[str]:
+    """SHA-256 of a file's bytes, or None when it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+    return digest.hexdigest()
+
+
+def _staged_files(root: str) -> List[str]:
+    """Relative paths of the files under root (unfinished temp files excluded), SKILL.md last."""
+    files = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            if not name.startswith(".tmp-"):
+                files.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(files, key=lambda rel: (os.path.basename(rel) == "SKILL.md", rel))
+
+
+def _join(base: str, rel: str) -> str:
+    return os.path.join(base, rel) if rel else base
+
+
+def _pid_alive(pid: int) -> Optional[bool]:
+    """Whether process pid exists on this host; None when it cannot be checked."""
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows.
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return None
+    return True
+
+
+def _read_owner(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            owner = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return owner if isinstance(owner, dict) else None
+
+
+def cleanup_stale(output_root: str, max_age: float) -> List[str]:
+    """
+    Remove staging areas under output_root left behind by runs that died.
+
+    An area whose owner process runs on this host is removed once that process is gone and
+    never while it is alive (a run kept for resume stays usable). Areas owned on another
+    host, or without a readable owner file, are removed when older than max_age seconds
+    (0 = never).
+
+    Returns:
+        Run ids of the removed staging areas.
+    """
+    staging_dir = os.path.join(os.path.abspath(output_root), STAGING_DIRNAME)
+    try:
+        names = os.listdir(staging_dir)
+    except OSError:
+        return []
+    run_ids = {name[: -len(OWNER_SUFFIX)] if name.endswith(OWNER_SUFFIX) else name for name in names}
+    host = socket.gethostname()
+    now = time.time()
+    removed = []
+    for run_id in sorted(run_ids):
+        root = os.path.join(staging_dir, run_id)
+        owner_path = root + OWNER_SUFFIX
+        owner = _read_owner(owner_path)
+        alive = None
+        if owner is not None and owner.get("host") == host and isinstance(owner.get("pid"), int):
+            alive = _pid_alive(owner["pid"])
+        if alive is None:
+            try:
+                mtime = max(os.path.getmtime(p) for p in (root, owner_path) if os.path.exists(p))
+            except (OSError, ValueError):
+                continue
+            alive = not max_age or now - mtime <= max_age
+        if alive:
+            continue
+        shutil.rmtree(root, ignore_errors=True)
+        try:
+            os.remove(owner_path)
+        except OSError:
+            pass
+        removed.append(run_id)
+    return removed
+
+
+class SkillStaging:
+    """Staging area of one run under <output_root>/.staging/<run_id>."""
+
+    def __init__(self, output_root: str, run_id: str):
+        """
+        Args:
+            output_root: Skills library root.
+            run_id: Staging area name; reusing the id of an earlier run (see resume)
+                adopts the files it staged.
+        """
+        self.output_root = os.path.abspath(output_root)
+        self.run_id = run_id
+        self.root = os.path.join(self.output_root, STAGING_DIRNAME, run_id)
+
+    def claim(self) -> None:
+        """Record this process as the owner of the staging area (see cleanup_stale)."""
+        owner = {"pid": os.getpid(), "host": socket.gethostname(), "claimed": time.time()}
+        for attempt in range(3):
+            os.makedirs(os.path.dirname(self.root), exist_ok=True)
+            try:
+                with open(self.root + OWNER_SUFFIX, "w", encoding="utf-8") as f:
+                    json.dump(owner, f)
+                return
+            except FileNotFoundError:
+                # Another run removed the empty .staging directory in between.
+                if attempt == 2:
+                    raise
+
+    def staged_path(self, abs_path: str) -> Optional[str]:
+        """Staged counterpart of a library path when this run staged it (file or directory), else None."""
+        rel = os.path.relpath(os.path.abspath(abs_path), self.output_root)
+        if rel.startswith(".." + os.sep) or rel == "..":
+            return None
+        staged = os.path.normpath(os.path.join(self.root, rel))
+        return staged if os.path.exists(staged) else None
+
+    def _empty_stats(self) -> Dict[str, Any]:
+        return {"committed": False, "written": 0, "skipped": 0, "bytes": 0, "files": [], "discarded": 0}
+
+    def commit(self) -> Dict[str, Any]:
+        """
+        Move the staged files into the library, skipping unchanged ones.
+
+        Returns:
+            {"committed": True, "written": int, "skipped": int, "bytes": int,
+             "files": list[str] (written, relative to output_root), "discarded": 0}
+        """
+        stats = self._empty_stats()
+        stats["committed"] = True
+        if not os.path.isdir(self.root):
+            return stats
+        for top in sorted(os.listdir(self.root)):
+            staged_top = os.path.join(self.root, top)
+            final_top = os.path.join(self.output_root, top)
+            files = [""] if os.path.isfile(staged_top) else _staged_files(staged_top)
+            changed = [
+                rel for rel in files
+                if file_hash(_join(staged_top, rel)) != file_hash(_join(final_top, rel))
+            ]
+            stats["skipped"] += len(files) - len(changed)
+            if not changed:
+                continue
+            sizes = {rel: os.path.getsize(_join(staged_top, rel)) for rel in changed}
+            moved = False
+            if files != [""] and not os.path.exists(final_top):
+                try:
+                    os.rename(staged_top, final_top)
+                    moved = True
+                except OSError:
+                    # Another run created the directory meanwhile: merge file by file.
+                    pass
+            if not moved:
+                for rel in changed:
+                    target = _join(final_top, rel)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(_join(staged_top, rel), target)
+            for rel in changed:
+                stats["written"] += 1
+                stats["bytes"] += sizes[rel]
+                stats["files"].append(_join(top, rel))
+        self._remove()
+        return stats
+
+    def rollback(self) -> Dict[str, Any]:
+        """Discard the staged files; returns the commit() shape with committed False and the discarded count."""
+        stats = self._empty_stats()
+        if os.path.isdir(self.root):
+            stats["discarded"] = len(_staged_files(self.root))
+        self._remove()
+        return stats
+
+    def keep(self) -> Dict[str, Any]:
+        """Leave the staged files for a later run with the same run_id; returns the commit() shape, nothing written."""
+        return self._empty_stats()
+
+    def _remove(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        try:
+            os.remove(self.root + OWNER_SUFFIX)
+        except OSError:
+            pass
+        try:
+            os.rmdir(os.path.dirname(self.root))
+        except OSError:
+            pass
@@ -0,0 +1,169 @@
+"""
+Single-shot structured mode: one request, no tool loop.
+
+The existing-skill listing and the digested log are put into a single request, and the
+model answers with JSON matching SKILLS_SCHEMA (the skills and the files to write). The
+harness validates the answer with validate_skills and writes the files itself (see
+SkillSummarizerAgent.run_structured). An invalid answer falls back to the tool loop.
+"""
+import json
+import os
+import posixpath
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .digest import Stage, digest_log
+from .skill_index import SkillIndex, parse_frontmatter
+
+_NAME_RE = re.compile(r"^[a-z0-9]+(-[a-z0-9]+)*$")
+
+SKILLS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["skills", "summary"],
+    "properties": {
+        "summary": {"type": "string", "description": "Short account of what was extracted or why nothing was."},
+        "skills": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": ["name", "description", "files"],
+                "properties": {
+                    "name": {"type": "string", "description": "kebab-case skill directory name (gerund form)."},
+                    "description": {"type": "string", "description": "Third person, with trigger phrases."},
+                    "files": {
+                        "type": "array",
+                        "description": "Files of the skill; must include SKILL.md. Paths are relative to the skill directory.",
+                        "items": {
+                            "type": "object",
+                            "additionalProperties": False,
+                            "required": ["path", "content"],
+                            "properties": {"path": {"type": "string"}, "content": {"type": "string"}},
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "skills", "strict": True, "schema": SKILLS_SCHEMA}}
+
+
+def existing_skills_listing(index: SkillIndex) -> str:
+    """One "- dir: name - description" line per skill in the library."""
+    index.refresh()
+    if not index.skills:
+        return "(no skills yet)"
+    return "\n".join(
+        f"- {key}: {entry['name']} - {entry['description']}" for key, entry in sorted(index.skills.items())
+    )
+
+
+def build_structured_message(
+    log_path: str,
+    abs_log: str,
+    window: Dict[str, Any],
+    skills_listing: str,
+    digest_stages: Optional[List[Stage]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the single-shot task message: existing skills plus the digest of the log window.
+
+    Returns (message, digest stats).
+    """
+    digested = digest_log(abs_log, start=window["start_offset"], end=window.get("end_offset"), stages=digest_stages)
+    stats = digested["stats"]
+    message = f"""Extract reusable skills from the agent log below following the summarizing-new-skills spec.
+No tools are available in this request: answer only with JSON matching the response schema, listing each new
+skill and the full content of every file to write (SKILL.md first, with name/description frontmatter; optional
+scripts/ or references/ files). Do not repeat a skill that already exists below; return "skills": [] if the log
+holds nothing new worth keeping.
+
+Existing skills:
+{skills_listing}
+
+Log path: {log_path}
+Total lines: {window['total_lines']}. Digest of {stats['records']} record(s) (repeated text replaced by
+<dup ref:hash>, long fields elided; [ref] = record/JSON path in the original log):
+
+---
+{digested['text']}
+---"""
+    return message, stats
+
+
+def parse_structured(text: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Parse the model's JSON answer; returns (data, None) or (None, error)."""
+    if not text or not text.strip():
+        return None, "empty response"
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        return None, f"response is not valid JSON: {e}"
+    if not isinstance(data, dict) or not isinstance(data.get("skills"), list):
+        return None, 'response is not an object with a "skills" list'
+    return data, None
+
+
+def validate_skills(data: Dict[str, Any], output_root: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Check the skills of a parsed answer against the spec and the library.
+
+    Each skill needs a new kebab-case name, a description and a SKILL.md whose frontmatter
+    repeats the name and has a description; file paths must stay inside the skill
+    directory.
+
+    Returns:
+        ([(path relative to output_root, content)], [error]); the files are only usable
+        when the error list is empty.
+    """
+    files: List[Tuple[str, str]] = []
+    errors: List[str] = []
+    seen = set()
+    for i, skill in enumerate(data["skills"]):
+        if not isinstance(skill, dict):
+            errors.append(f"skills[{i}] is not an object")
+            continue
+        name = skill.get("name")
+        if not isinstance(name, str) or not _NAME_RE.match(name) or len(name) > 64:
+            errors.append(f"skills[{i}]: name {name!r} is not kebab-case (max 64 chars)")
+            continue
+        if name in seen:
+            errors.append(f"{name}: listed twice")
+            continue
+        seen.add(name)
+        if os.path.exists(os.path.join(output_root, name)):
+            errors.append(f"{name}: a skill with this name already exists")
+        if not str(skill.get("description") or "").strip():
+            errors.append(f"{name}: empty description")
+        entries = skill.get("files")
+        if not isinstance(entries, list):
+            errors.append(f"{name}: files is not a list")
+            continue
+        paths = set()
+        for entry in entries:
+            path = entry.get("path") if isinstance(entry, dict) else None
+            content = entry.get("content") if isinstance(entry, dict) else None
+            if not isinstance(path, str) or not isinstance(content, str):
+                errors.append(f"{name}: file entries need string path and content")
+                continue
+            norm = posixpath.normpath(path.replace("\\", "/"))
+            if posixpath.isabs(norm) or norm == "." or norm.startswith("../") or norm == "..":
+                errors.append(f"{name}: path {path!r} leaves the skill directory")
+                continue
+            if norm in paths:
+                errors.append(f"{name}: file {norm} listed twice")
+                continue
+            paths.add(norm)
+            if norm == "SKILL.md":
+                meta = parse_frontmatter(content)
+                if meta.get("name") != name:
+                    errors.append(f"{name}: SKILL.md frontmatter name is {meta.get('name')!r}")
+                if not meta.get("description"):
+                    errors.append(f"{name}: SKILL.md frontmatter has no description")
+            files.append((f"{name}/{norm}", content))
+        if "SKILL.md" not in paths:
+            errors.append(f"{name}: no SKILL.md")
+    return files, errors
@@ -2,11 +2,26 @@
 Sandboxed file tools for the Skill Summarizer Agent.
 
 - read_file: read-only; allowed under configured read roots (e.g. logs, configs).
-- write_file: write allowed only under the designated output directory.
-- list_dir: read-only; list contents under allowed roots.
+  Supports ranged reads (offset/limit in lines or bytes) served from a memory-mapped file,
+  or streamed from a compressed log (gzip, xz, zstd) without decompressing it to disk.
+- write_file: write allowed only under the designated output directory; atomic (temp + rename),
+  with per-run skill-directory claims so concurrent runs do not interleave files. Optionally
+  staged per run and committed at the end (see staging.py).
+- list_dir: read-only; list contents under allowed roots (compressed files are flagged).
+- search_log: read-only; stream a log and return regex / field-filter matches with offsets.
+- FileReadCache: per-agent-run cache of mmaps, line-offset indexes and read results.
 """
+import mmap
 import os
-from typing import Optional
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .compressed import codecs_in, detect_codec, log_size, open_log
+from .digest import flatten_record
+from .ingest import iter_json_records
 
 
 def _resolve_allowed_base(path: str, allowed_bases: list) -> Optional[str]:
@@ -19,16 +34,190 @@ def _resolve_allowed_base(path: str, allowed_bases: list) -> Optional[str]:
     return None
 
 
+def _decode_text(data: bytes, encoding: str) -> str:
+    """Decode bytes with universal-newline translation, matching open(..., "r")."""
+    return data.decode(encoding).replace("\r\n", "\n").replace("\r", "\n")
+
+
+class _MappedFile:
+    """Read-only mmap of one file with a lazily extended line-offset index."""
+
+    def __init__(self, path: str):
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.line_starts: List[int] = [0] if self.size else []
+        self._scanned = 0
+
+    def _index_to(self, line: int) -> None:
+        """Extend line_starts until it covers line (0-based) or the file is fully scanned."""
+        while len(self.line_starts) <= line and self._scanned < self.size:
+            nl = self.data.find(b"\n", self._scanned)
+            if nl < 0:
+                self._scanned = self.size
+                break
+            self._scanned = nl + 1
+            if self._scanned < self.size:
+                self.line_starts.append(self._scanned)
+
+    def line_span(self, offset: int, limit: Optional[int]) -> Tuple[int, int, int]:
+        """Byte span of lines [offset, offset + limit); returns (start, end, next_line)."""
+        if limit is None:
+            self._index_to(offset)
+            start = self.line_starts[offset] if offset < len(self.line_starts) else self.size
+            return start, self.size, max(offset, len(self.line_starts))
+        self._index_to(offset + limit)
+        starts = self.line_starts
+        start = starts[offset] if offset < len(starts) else self.size
+        end = starts[offset + limit] if offset + limit < len(starts) else self.size
+        return start, end, min(offset + limit, max(offset, len(starts)))
+
+    def byte_span(self, offset: int, limit: Optional[int]) -> Tuple[int, int]:
+        """Byte span [offset, offset + limit) snapped inward to UTF-8 character boundaries."""
+        start = min(offset, self.size)
+        end = self.size if limit is None else min(start + limit, self.size)
+        while start < end and self.data[start] & 0xC0 == 0x80:
+            start += 1
+        while start < end < self.size and self.data[end] & 0xC0 == 0x80:
+            end -= 1
+        return start, end
+
+    def read(self, start: int, end: int) -> bytes:
+        return self.data[start:end]
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+
+class _StreamedFile(_MappedFile):
+    """
+    Decompressed view of a compressed file, with the interface of _MappedFile.
+
+    The line index is extended by streaming; ranges are read by seeking a decompressing
+    reader, which restarts from the nearest archive member when seeking backwards.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = log_size(path)
+        self.line_starts = [0] if self.size else []
+        self._scanned = 0
+        self._scanner = None
+        self._reader = open_log(path)
+        self._last: Tuple[int, bytes] = (0, b"")
+
+    def _index_to(self, line: int) -> None:
+        while len(self.line_starts) <= line and self._scanned < self.size:
+            if self._scanner is None:
+                self._scanner = open_log(self.path, self._scanned)
+            raw = self._scanner.readline()
+            if not raw.endswith(b"\n"):
+                self._scanned = self.size
+                break
+            self._scanned += len(raw)
+            if self._scanned < self.size:
+                self.line_starts.append(self._scanned)
+
+    def byte_span(self, offset: int, limit: Optional[int]) -> Tuple[int, int]:
+        base = start = min(offset, self.size)
+        end = self.size if limit is None else min(start + limit, self.size)
+        # One read covers the range and the continuation bytes that may follow its end.
+        data = self.read(base, min(end + 4, self.size))
+        while start < end and data[start - base] & 0xC0 == 0x80:
+            start += 1
+        while start < end < self.size and data[end - base] & 0xC0 == 0x80:
+            end -= 1
+        return start, end
+
+    def read(self, start: int, end: int) -> bytes:
+        last_start, last = self._last
+        if last_start <= start and end <= last_start + len(last):
+            return last[start - last_start:end - last_start]
+        self._reader.seek(start)
+        data = self._reader.read(end - start)
+        self._last = (start, data)
+        return data
+
+    def close(self) -> None:
+        self._reader.close()
+        if self._scanner is not None:
+            self._scanner.close()
+
+
+class FileReadCache:
+    """
+    Per-agent-run cache for read_file.
+
+    Keeps one mmap (or decompressing reader, for compressed logs) + line index per file
+    and the results of recent reads keyed by (path, range). Entries are validated against
+    (mtime_ns, size), so a file rewritten during the run is re-mapped. Call close() when
+    the run ends.
+    """
+
+    def __init__(self, max_results: int = 256):
+        self.max_results = max_results
+        self._files: Dict[str, Tuple[Tuple[int, int], _MappedFile]] = {}
+        self._results: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def mapped(self, abs_path: str) -> Tuple[Tuple[int, int], _MappedFile]:
+        st = os.stat(abs_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(abs_path)
+        if cached is not None and cached[0] == stamp:
+            return cached
+        if cached is not None:
+            cached[1].close()
+        entry = (stamp, _StreamedFile(abs_path) if detect_codec(abs_path) else _MappedFile(abs_path))
+        self._files[abs_path] = entry
+        return entry
+
+    def get(self, key: tuple) -> Optional[dict]:
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._results.move_to_end(key)
+        return result
+
+    def put(self, key: tuple, result: dict) -> None:
+        self._results[key] = result
+        if len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def close(self) -> None:
+        for _, mapped in self._files.values():
+            mapped.close()
+        self._files.clear()
+        self._results.clear()
+
+
 def read_file(
     file_path: str,
     allowed_read_roots: list,
     encoding: str = "utf-8",
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+    unit: str = "lines",
+    cache: Optional[FileReadCache] = None,
 ) -> dict:
     """
     Read file contents. Allowed only when file_path is under one of allowed_read_roots.
 
+    With offset and/or limit, returns only that range; unit is "lines" (0-based line
+    offset, line count) or "bytes" (byte offset, byte count; snapped to UTF-8 boundaries).
+    Ranges are sliced from a memory-mapped file, so a range costs O(range) once the line
+    index covers it. Pass a FileReadCache to reuse mmaps and results within one run.
+    Compressed logs (gzip, xz, zstd) are read transparently; offsets, sizes and line
+    numbers then refer to the decompressed content.
+
     Returns:
         {"success": bool, "content": str | None, "error": str | None}
+        Ranged reads add {"unit", "offset", "next_offset", "eof", "total_bytes"}.
     """
     abs_path = os.path.abspath(file_path)
     base = _resolve_allowed_base(abs_path, allowed_read_roots)
@@ -40,12 +229,68 @@ def read_file(
         }
     if not os.path.isfile(abs_path):
         return {"success": False, "content": None, "error": f"Not a file or not found: {abs_path}"}
+    if unit not in ("lines", "bytes"):
+        return {"success": False, "content": None, "error": f"Invalid unit: {unit} (use 'lines' or 'bytes')"}
+    if (offset is not None and offset < 0) or (limit is not None and limit < 0):
+        return {"success": False, "content": None, "error": "offset and limit must be >= 0"}
+
+    own_cache = cache is None
+    cache = cache or FileReadCache(max_results=0)
     try:
-        with open(abs_path, "r", encoding=encoding) as f:
-            content = f.read()
-        return {"success": True, "content": content, "error": None}
+        stamp, mapped = cache.mapped(abs_path)
+        key = (abs_path, stamp, encoding, offset, limit, unit)
+        cached = cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        ranged = offset is not None or limit is not None
+        if not ranged:
+            content = _decode_text(mapped.read(0, mapped.size), encoding)
+            result: Dict[str, Any] = {"success": True, "content": content, "error": None}
+        else:
+            start_at = offset or 0
+            if unit == "lines":
+                start, end, next_offset = mapped.line_span(start_at, limit)
+            else:
+                start, end = mapped.byte_span(start_at, limit)
+                next_offset = end
+            result = {
+                "success": True,
+                "content": _decode_text(mapped.read(start, end), encoding),
+                "error": None,
+                "unit": unit,
+                "offset": start_at,
+                "next_offset": next_offset,
+                "eof": end >= mapped.size,
+                "total_bytes": mapped.size,
+            }
+        cache.put(key, result)
+        return dict(result)
     except Exception as e:
         return {"success": False, "content": None, "error": str(e)}
+    finally:
+        if own_cache:
+            cache.close()
+
+
+_claims_lock = threading.Lock()
+_skill_claims: Dict[str, str] = {}
+
+
+def _skill_dir(abs_path: str, abs_root: str) -> Optional[str]:
+    """Top-level directory under abs_root that contains abs_path (the skill dir), or None."""
+    rel = os.path.relpath(abs_path, abs_root)
+    head = rel.split(os.sep, 1)[0]
+    if head in (".", "..") or head == rel:
+        return None
+    return os.path.join(abs_root, head)
+
+
+def release_skill_claims(owner: str) -> None:
+    """Release every skill directory claimed by owner (see write_file)."""
+    with _claims_lock:
+        for skill_dir in [d for d, o in _skill_claims.items() if o == owner]:
+            del _skill_claims[skill_dir]
 
 
 def write_file(
@@ -53,10 +298,20 @@ def write_file(
     content: str,
     output_root: str,
     encoding: str = "utf-8",
+    owner: Optional[str] = None,
+    staging_root: Optional[str] = None,
 ) -> dict:
     """
     Write content to a file. Allowed only when file_path is under output_root.
 
+    The file is written to a temporary sibling and renamed into place, so readers never
+    see a partially written file. When owner is given (one id per agent run), the skill
+    directory (first path component under output_root) is claimed for that owner until
+    release_skill_claims(owner); concurrent runs writing into the same skill directory
+    get an error instead of interleaving their files. With staging_root, the file goes to
+    the same relative path under staging_root instead (see staging.SkillStaging); path in the
+    result is still the path in output_root.
+
     Returns:
         {"success": bool, "path": str | None, "error": str | None}
     """
@@ -68,12 +323,30 @@ def write_file(
             "path": None,
             "error": f"Write only allowed under output_root: {output_root}",
         }
+    skill_dir = _skill_dir(abs_path, abs_root)
+    if owner is not None and skill_dir is not None:
+        with _claims_lock:
+            holder = _skill_claims.setdefault(skill_dir, owner)
+        if holder != owner:
+            return {
+                "success": False,
+                "path": None,
+                "error": f"Skill directory is being written by another run: {skill_dir}. Choose a different name or merge into it later.",
+            }
+    target = os.path.join(staging_root, os.path.relpath(abs_path, abs_root)) if staging_root else abs_path
+    tmp_path = None
     try:
-        os.makedirs(os.path.dirname(abs_path) or ".", exist_ok=True)
-        with open(abs_path, "w", encoding=encoding) as f:
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(target))
+        with os.fdopen(fd, "w", encoding=encoding) as f:
             f.write(content)
+        mode = os.stat(abs_path).st_mode & 0o777 if os.path.exists(abs_path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, target)
         return {"success": True, "path": abs_path, "error": None}
     except Exception as e:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return {"success": False, "path": None, "error": str(e)}
 
 
@@ -86,6 +359,8 @@ def list_dir(
 
     Returns:
         {"success": bool, "entries": list[str] | None, "error": str | None}
+        When some files are compressed logs, adds {"compressed": {name: codec}}; read_file
+        and search_log read them as plain text.
     """
     abs_path = os.path.abspath(dir_path)
     base = _resolve_allowed_base(abs_path, allowed_list_roots)
@@ -99,6 +374,234 @@ def list_dir(
         return {"success": False, "entries": None, "error": f"Not a directory or not found: {abs_path}"}
     try:
         entries = sorted(os.listdir(abs_path))
-        return {"success": True, "entries": entries, "error": None}
+        result: Dict[str, Any] = {"success": True, "entries": entries, "error": None}
+        compressed = codecs_in(abs_path, entries)
+        if compressed:
+            result["compressed"] = compressed
+        return result
     except Exception as e:
         return {"success": False, "entries": None, "error": str(e)}
+
+
+# One clause, which must be followed by " and " or the end of the filter; quoted values
+# and /regex/ bodies may themselves contain " and ".
+_CLAUSE_RE = re.compile(
+    r"""\s*([\w.\[\]]+)\s*(==|!=|>=|<=|>|<|!~|~)\s*(?:"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'|/(.*?)/([imsx]*)|(\S+))(?=\s+and\s+|\s*$)""",
+    re.DOTALL,
+)
+_AND_RE = re.compile(r"\s+and\s+")
+
+# Upper bounds for search_log arguments, which come from the model.
+MAX_SEARCH_RESULTS = 200
+MAX_CONTEXT_CHARS = 2000
+
+Predicate = Callable[[Dict[str, Any]], Optional[List[Tuple[str, Optional["re.Match"]]]]]
+
+
+def _field_values(fields: Dict[str, Any], name: str) -> List[Tuple[str, Any]]:
+    """Fields whose dotted key equals name or ends with "." + name."""
+    return [(k, v) for k, v in fields.items() if k == name or k.endswith("." + name)]
+
+
+def _parse_literal(text: str) -> Any:
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return {"true": True, "false": False, "null": None}.get(text, text)
+
+
+def parse_where(where: str, ignore_case: bool = False) -> List[Predicate]:
+    """
+    Parse a field filter such as: role == "WebSurfer" and content ~ /average/i
+
+    Clauses are joined with "and" (not split inside quoted values or /regex/); operators: == != > >= < <= ~ (regex) !~ (no regex match).
+    Field names match a dotted key exactly or by suffix (role matches conversation.role).
+    Raises ValueError on a malformed clause.
+    """
+    predicates: List[Predicate] = []
+    where = where.strip()
+    pos = 0
+    while True:
+        m = _CLAUSE_RE.match(where, pos)
+        if not m:
+            raise ValueError(f"Invalid filter clause: {_AND_RE.split(where[pos:], 1)[0]!r}")
+        name, op, dq, sq, rx, rx_flags, bare = m.groups()
+        if op in ("~", "!~"):
+            flags = re.IGNORECASE if ignore_case or "i" in (rx_flags or "") else 0
+            flags |= re.MULTILINE if "m" in (rx_flags or "") else 0
+            flags |= re.DOTALL if "s" in (rx_flags or "") else 0
+            regex = re.compile(rx if rx is not None else (dq or sq or bare or ""), flags)
+            predicates.append(_regex_predicate(name, regex, negate=op == "!~"))
+        else:
+            value = _parse_literal(bare) if bare is not None else (dq if dq is not None else sq)
+            predicates.append(_compare_predicate(name, op, value))
+        sep = _AND_RE.match(where, m.end())
+        if sep is None:
+            return predicates
+        pos = sep.end()
+
+
+def _regex_predicate(name: str, regex: "re.Pattern", negate: bool) -> Predicate:
+    def check(fields: Dict[str, Any]) -> Optional[List[Tuple[str, Optional["re.Match"]]]]:
+        hits = []
+        for key, value in _field_values(fields, name):
+            if isinstance(value, str):
+                m = regex.search(value)
+                if m:
+                    hits.append((key, m))
+        if negate:
+            return [] if not hits else None
+        return hits or None
+
+    return check
+
+
+_COMPARE = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+def _compare_predicate(name: str, op: str, expected: Any) -> Predicate:
+    compare = _COMPARE[op]
+
+    def check(fields: Dict[str, Any]) -> Optional[List[Tuple[str, Optional["re.Match"]]]]:
+        hits = []
+        for key, value in _field_values(fields, name):
+            try:
+                if compare(value, expected):
+                    hits.append((key, None))
+            except TypeError:
+                continue
+        if op == "!=" and not _field_values(fields, name):
+            return []
+        return hits or None
+
+    return check
+
+
+def _snippet(text: str, match: Optional["re.Match"], context_chars: int) -> str:
+    """Clip text to context_chars around match (or from the start when match is None)."""
+    if match is None:
+        start, end = 0, 0
+    else:
+        start, end = match.start(), match.end()
+    lo = max(0, start - context_chars)
+    hi = min(len(text), end + context_chars)
+    return ("..." if lo > 0 else "") + text[lo:hi] + ("..." if hi < len(text) else "")
+
+
+def search_log(
+    file_path: str,
+    allowed_read_roots: list,
+    pattern: Optional[str] = None,
+    where: Optional[str] = None,
+    max_results: int = 20,
+    context_chars: int = 200,
+    ignore_case: bool = False,
+    encoding: str = "utf-8",
+) -> dict:
+    """
+    Search a log without loading it. Allowed only under one of allowed_read_roots.
+
+    - pattern only: streams lines; each match reports line number, byte offset and a
+      snippet of context_chars around the match.
+    - where (optionally with pattern): streams records (JSONL or pretty-printed JSON),
+      flattens them into entries (record header + conversation/api_call_history items)
+      and applies field filters (see parse_where); pattern must then match some string
+      field of the entry. Matches report the entry ref, JSON path and the record's
+      line / byte offset, with matched fields clipped to context_chars.
+
+    max_results and context_chars are clamped to MAX_SEARCH_RESULTS / MAX_CONTEXT_CHARS.
+
+    Returns:
+        {"success": bool, "matches": list | None, "truncated": bool, "scanned": int,
+         "error": str | None}
+    """
+    abs_path = os.path.abspath(file_path)
+    base = _resolve_allowed_base(abs_path, allowed_read_roots)
+    if base is None:
+        return {
+            "success": False,
+            "matches": None,
+            "error": f"Path not allowed. Allowed roots: {allowed_read_roots}",
+        }
+    if not os.path.isfile(abs_path):
+        return {"success": False, "matches": None, "error": f"Not a file or not found: {abs_path}"}
+    if not pattern and not where:
+        return {"success": False, "matches": None, "error": "Provide pattern and/or where."}
+    max_results = min(max(max_results, 1), MAX_SEARCH_RESULTS)
+    context_chars = min(max(context_chars, 0), MAX_CONTEXT_CHARS)
+    try:
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0) if pattern else None
+        predicates = parse_where(where, ignore_case=ignore_case) if where else []
+    except (re.error, ValueError) as e:
+        return {"success": False, "matches": None, "error": f"Invalid query: {e}"}
+
+    matches: List[Dict[str, Any]] = []
+    scanned = 0
+    truncated = False
+    try:
+        if not predicates:
+            with open_log(abs_path) as f:
+                offset = 0
+                for line_no, raw in enumerate(f, start=1):
+                    scanned += 1
+                    text = raw.decode(encoding, errors="replace").rstrip("\r\n")
+                    m = regex.search(text)
+                    if m:
+                        if len(matches) >= max_results:
+                            truncated = True
+                            break
+                        matches.append({
+                            "line": line_no,
+                            "offset": offset + len(text[: m.start()].encode(encoding)),
+                            "line_offset": offset,
+                            "text": _snippet(text, m, context_chars),
+                        })
+                    offset += len(raw)
+        else:
+            for i, record in enumerate(iter_json_records(abs_path, encoding=encoding)):
+                for entry in flatten_record(i, record.offset, record.line, record.value):
+                    scanned += 1
+                    fields = entry["fields"]
+                    hits: List[Tuple[str, Optional["re.Match"]]] = []
+                    for predicate in predicates:
+                        found = predicate(fields)
+                        if found is None:
+                            break
+                        hits.extend(found)
+                    else:
+                        if regex is not None:
+                            rx_hits = [
+                                (k, regex.search(v)) for k, v in fields.items() if isinstance(v, str)
+                            ]
+                            rx_hits = [(k, m) for k, m in rx_hits if m]
+                            if not rx_hits:
+                                continue
+                            hits.extend(rx_hits)
+                        if len(matches) >= max_results:
+                            truncated = True
+                            break
+                        shown: Dict[str, Any] = {}
+                        for key, m in hits:
+                            value = fields[key]
+                            shown[key] = _snippet(value, m, context_chars) if isinstance(value, str) else value
+                        matches.append({
+                            "ref": entry["ref"],
+                            "path": entry["path"],
+                            "line": entry["line"],
+                            "offset": entry["offset"],
+                            "fields": shown,
+                        })
+                if truncated:
+                    break
+        return {"success": True, "matches": matches, "truncated": truncated, "scanned": scanned, "error": None}
+    except Exception as e:
+        return {"success": False, "matches": None, "error": str(e)}
@@ -0,0 +1,220 @@
+"""
+Per-run performance trace for SkillSummarizerAgent.
+
+RunTrace records, for one run:
+- each LLM turn: latency, time to first token (streaming), and prompt, completion and
+  cached tokens;
+- each tool call: queue wait, wall time, bytes read and written, and result payload size.
+
+It also keeps totals. The trace is attached to the run result as result["trace"] and can
+be written as plain JSON or as a Chrome trace (chrome://tracing, Perfetto). TraceHook
+subclasses receive the records as they are made, e.g. to forward them to a metrics
+collector.
+
+Tracing is off unless enabled (agent trace=True, trace hooks, SKILL_SUMMARIZER_TRACE or
+--trace). When off, the agent does not create a RunTrace and skips all recording.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+TRACE_FORMATS = ("json", "chrome")
+
+
+class TraceHook:
+    """Receives trace records as they are made; override the methods you need."""
+
+    def on_turn(self, record: Dict[str, Any]) -> None:
+        """Called after each LLM turn with its turn record."""
+
+    def on_tool(self, record: Dict[str, Any]) -> None:
+        """Called (from tool worker threads) after each tool call with its tool record."""
+
+    def on_run(self, trace: Dict[str, Any]) -> None:
+        """Called once at the end of the run with the full trace (see RunTrace.to_dict)."""
+
+
+def _usage_field(usage: Any, name: str) -> Optional[int]:
+    value = getattr(usage, name, None) if usage is not None else None
+    return value if isinstance(value, int) else None
+
+
+def cached_tokens(usage: Any) -> Optional[int]:
+    """Prompt tokens served from the provider's prefix cache, when reported."""
+    details = getattr(usage, "prompt_tokens_details", None) if usage is not None else None
+    return _usage_field(details, "cached_tokens")
+
+
+class RunTrace:
+    """Collects turn and tool records for one agent run (thread-safe)."""
+
+    def __init__(self, hooks: Optional[List[TraceHook]] = None, meta: Optional[Dict[str, Any]] = None):
+        self.hooks = list(hooks or [])
+        self.meta = dict(meta or {})
+        self.started = time.monotonic()
+        self.started_at = time.time()
+        self.ended: Optional[float] = None
+        self.turns: List[Dict[str, Any]] = []
+        self.tools: List[Dict[str, Any]] = []
+        self.hook_errors = 0
+        self._lock = threading.Lock()
+        self._threads: Dict[int, int] = {}
+
+    def now(self) -> float:
+        """Seconds since the start of the run."""
+        return time.monotonic() - self.started
+
+    def _call_hooks(self, method: str, record: Dict[str, Any]) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, method)(record)
+            except Exception:
+                self.hook_errors += 1
+
+    def add_turn(
+        self,
+        turn: int,
+        start: float,
+        end: float,
+        usage: Any = None,
+        first_token: Optional[float] = None,
+        tool_calls: int = 0,
+    ) -> Dict[str, Any]:
+        """Record one LLM turn; start/end/first_token are now() values."""
+        record = {
+            "turn": turn,
+            "start": round(start, 6),
+            "latency": round(end - start, 6),
+            "time_to_first_token": None if first_token is None else round(first_token - start, 6),
+            "prompt_tokens": _usage_field(usage, "prompt_tokens"),
+            "completion_tokens": _usage_field(usage, "completion_tokens"),
+            "cached_tokens": cached_tokens(usage),
+            "tool_calls": tool_calls,
+        }
+        with self._lock:
+            self.turns.append(record)
+        self._call_hooks("on_turn", record)
+        return record
+
+    def add_tool(
+        self,
+        turn: int,
+        call_id: str,
+        name: str,
+        queued: float,
+        start: float,
+        end: float,
+        success: bool,
+        bytes_read: int = 0,
+        bytes_written: int = 0,
+        result_bytes: int = 0,
+    ) -> Dict[str, Any]:
+        """Record one tool call; queued/start/end are now() values (dispatch, start, finish)."""
+        ident = threading.get_ident()
+        with self._lock:
+            thread = self._threads.setdefault(ident, len(self._threads) + 1)
+            record = {
+                "turn": turn,
+                "id": call_id,
+                "name": name,
+                "start": round(start, 6),
+                "wait": round(start - queued, 6),
+                "elapsed": round(end - start, 6),
+                "success": success,
+                "bytes_read": bytes_read,
+                "bytes_written": bytes_written,
+                "result_bytes": result_bytes,
+                "thread": thread,
+            }
+            self.tools.append(record)
+        self._call_hooks("on_tool", record)
+        return record
+
+    def totals(self) -> Dict[str, Any]:
+        def total(records: List[Dict[str, Any]], key: str) -> int:
+            return sum(r[key] or 0 for r in records)
+
+        wall = (self.ended if self.ended is not None else time.monotonic()) - self.started
+        return {
+            "wall_seconds": round(wall, 6),
+            "turns": len(self.turns),
+            "llm_seconds": round(sum(t["latency"] for t in self.turns), 6),
+            "tool_calls": len(self.tools),
+            "tool_seconds": round(sum(t["elapsed"] for t in self.tools), 6),
+            "prompt_tokens": total(self.turns, "prompt_tokens"),
+            "completion_tokens": total(self.turns, "completion_tokens"),
+            "cached_tokens": total(self.turns, "cached_tokens"),
+            "bytes_read": total(self.tools, "bytes_read"),
+            "bytes_written": total(self.tools, "bytes_written"),
+            "result_bytes": total(self.tools, "result_bytes"),
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Close the trace, call TraceHook.on_run and return to_dict()."""
+        self.ended = time.monotonic()
+        data = self.to_dict()
+        for hook in self.hooks:
+            try:
+                hook.on_run(data)
+            except Exception:
+                self.hook_errors += 1
+        return data
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            {"meta": dict, "started_at": float, "totals": dict, "turns": list[dict],
+             "tools": list[dict], "hook_errors": int}
+        """
+        with self._lock:
+            return {
+                "meta": self.meta,
+                "started_at": self.started_at,
+                "totals": self.totals(),
+                "turns": list(self.turns),
+                "tools": list(self.tools),
+                "hook_errors": self.hook_errors,
+            }
+
+
+def to_chrome_trace(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a trace dict (RunTrace.to_dict) to Chrome trace-event format."""
+    def us(seconds: float) -> int:
+        return int(seconds * 1_000_000)
+
+    events: List[Dict[str, Any]] = [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "llm"}},
+        {
+            "name": "run", "cat": "run", "ph": "X", "pid": 1, "tid": 0, "ts": 0,
+            "dur": us(trace["totals"]["wall_seconds"]), "args": dict(trace["meta"], **trace["totals"]),
+        },
+    ]
+    for t in trace["turns"]:
+        events.append({
+            "name": f"turn {t['turn']}", "cat": "llm", "ph": "X", "pid": 1, "tid": 0,
+            "ts": us(t["start"]), "dur": us(t["latency"]),
+            "args": {k: v for k, v in t.items() if k not in ("start", "latency")},
+        })
+    for thread in sorted({t["thread"] for t in trace["tools"]}):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": thread, "args": {"name": f"tool worker {thread}"}})
+    for t in trace["tools"]:
+        events.append({
+            "name": t["name"], "cat": "tool", "ph": "X", "pid": 1, "tid": t["thread"],
+            "ts": us(t["start"]), "dur": us(t["elapsed"]),
+            "args": {k: v for k, v in t.items() if k not in ("start", "elapsed", "thread", "name")},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(trace: Dict[str, Any], path: str, fmt: str = "json") -> str:
+    """Write a trace dict to path as "json" or "chrome" trace-event format; returns the path."""
+    if fmt not in TRACE_FORMATS:
+        raise ValueError(f"Unknown trace format: {fmt} (use one of {', '.join(TRACE_FORMATS)})")
+    data = to_chrome_trace(trace) if fmt == "chrome" else trace
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    return path
@@ -0,0 +1,300 @@
+"""
+Local pre-triage: decide per log, before any LLM call, whether it is worth summarizing.
+
+Records are parsed with iter_json_records and grouped into runs (a record holding a whole
+run, or the records of one task_id / of the log), which are scored with cheap heuristics:
+- outcome markers (status, success, info_sufficient, error fields);
+- the number of distinct tool/agent steps;
+- whether the run has a final answer.
+
+Tasks already selected in the same batch are dropped as duplicates. Their fingerprint
+is the normalized task text, falling back to task_id / group_id. Failed runs, one-shot
+questions and repeats therefore cost a few milliseconds of disk I/O instead of an
+agent session.
+"""
+import hashlib
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .config import TRIAGE_CONFIG
+from .ingest import iter_json_records
+
+# List fields holding the steps of a run, and item keys naming a step
+_STEP_LIST_KEYS = ("api_call_history", "tool_calls", "actions", "steps", "conversation", "messages", "trajectory")
+_STEP_LABEL_KEYS = ("endpoint", "tool", "tool_name", "function", "action", "command", "source")
+_ANSWER_KEYS = ("final_result", "final_answer", "answer", "result", "output", "response")
+_TASK_TEXT_KEYS = ("task", "query", "fact_question", "question", "instruction")
+_TASK_ID_KEYS = ("task_id", "group_id")
+_SUCCESS_STATUS = {"completed", "complete", "success", "succeeded", "done", "ok", "passed", "finished"}
+_FAILURE_STATUS = {"failed", "failure", "error", "errored", "timeout", "timed_out", "cancelled", "canceled", "aborted"}
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _fields(value: Any, depth: int = 2) -> Iterator[Tuple[str, Any]]:
+    """(key, value) pairs of a record and its nested objects, up to depth levels."""
+    if not isinstance(value, dict):
+        return
+    for key, item in value.items():
+        yield key, item
+        if depth > 1 and isinstance(item, dict):
+            yield from _fields(item, depth - 1)
+
+
+def _step_label(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        for key in _STEP_LABEL_KEYS:
+            if isinstance(item.get(key), str) and item[key]:
+                return item[key]
+        function = item.get("function")
+        if isinstance(function, dict) and function.get("name"):
+            return str(function["name"])
+        sender = item.get("sender") or item.get("name") or item.get("role")
+        if isinstance(sender, str) and sender.lower() not in ("", "unknown", "user", "system"):
+            return sender
+        item = item.get("content")
+    if isinstance(item, str):
+        # Untyped messages: the leading words ("I clicked", "I typed ...") name the action.
+        words = _WORD_RE.findall(item[:80].lower())[:3]
+        return " ".join(words) or None
+    return None
+
+
+def fingerprint(value: Any) -> Optional[str]:
+    """Task fingerprint: hash of the normalized task text, else of task_id / group_id."""
+    fields = dict(_fields(value))
+    for keys in (_TASK_TEXT_KEYS, _TASK_ID_KEYS):
+        for key in keys:
+            text = fields.get(key)
+            if isinstance(text, str) and text.strip():
+                normalized = " ".join(text.lower().split())
+                return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+    return None
+
+
+def _task_id(value: Any) -> Optional[str]:
+    fields = dict(_fields(value))
+    for key in _TASK_ID_KEYS:
+        item = fields.get(key)
+        if isinstance(item, (str, int)) and not isinstance(item, bool) and str(item).strip():
+            return f"{key}={item}"
+    return None
+
+
+def _record_step(value: Any) -> Optional[str]:
+    """Step named by a one-message-per-line record (a tool call or tool result), or None."""
+    if not isinstance(value, dict):
+        return None
+    for key in _STEP_LABEL_KEYS:
+        if isinstance(value.get(key), str) and value[key]:
+            return value[key]
+    function = value.get("function")
+    if isinstance(function, dict) and function.get("name"):
+        return str(function["name"])
+    role = value.get("role")
+    if isinstance(role, str) and role.lower() in ("tool", "function") and isinstance(value.get("name"), str):
+        return value["name"]
+    return None
+
+
+def _signals(value: Any) -> Dict[str, Any]:
+    """Outcome markers, step labels, final answer and repeat index of one record."""
+    success = failure = False
+    steps: Set[str] = set()
+    answer = False
+    repeat = 1
+    has_steps = False
+    for key, item in _fields(value):
+        lowered = key.lower()
+        if lowered == "status" and isinstance(item, str):
+            success |= item.lower() in _SUCCESS_STATUS
+            failure |= item.lower() in _FAILURE_STATUS
+        elif lowered in ("success", "succeeded", "info_sufficient") and isinstance(item, bool):
+            success |= item
+            failure |= not item
+        elif lowered in ("error", "exception") and item:
+            failure = True
+        elif lowered in _ANSWER_KEYS and isinstance(item, str) and item.strip():
+            answer = True
+        elif lowered == "repeat_index" and isinstance(item, int):
+            repeat = item
+        elif lowered in _STEP_LIST_KEYS and isinstance(item, list):
+            has_steps = True
+            for step in item:
+                label = _step_label(step)
+                if label:
+                    steps.add(label)
+    if not has_steps:
+        label = _record_step(value)
+        if label:
+            steps.add(label)
+    return {
+        "success": success and not failure,
+        "failure": failure,
+        "steps": steps,
+        "answer": answer,
+        "repeat": repeat,
+        "has_steps": has_steps,
+        "fingerprint": fingerprint(value),
+        "records": 1,
+    }
+
+
+def _merge_signals(run: Dict[str, Any], record: Dict[str, Any]) -> None:
+    """Fold one record's signals into those of the run it belongs to; the latest outcome wins."""
+    if record["success"] or record["failure"]:
+        run["success"], run["failure"] = record["success"], record["failure"]
+    run["steps"] |= record["steps"]
+    run["answer"] |= record["answer"]
+    run["repeat"] = max(run["repeat"], record["repeat"])
+    run["fingerprint"] = run["fingerprint"] or record["fingerprint"]
+    run["records"] += 1
+
+
+def _score(signals: Dict[str, Any]) -> Dict[str, Any]:
+    steps = signals["steps"]
+    score = 0.2
+    reasons = []
+    if signals["failure"]:
+        outcome = "failure"
+        score -= 0.4
+        reasons.append("run failed")
+    elif signals["success"]:
+        outcome = "success"
+        score += 0.35
+        reasons.append("run succeeded")
+    else:
+        outcome = "unknown"
+        reasons.append("no outcome marker")
+    if len(steps) >= 3:
+        score += 0.3
+        reasons.append(f"{len(steps)} distinct steps")
+    elif len(steps) == 2:
+        score += 0.15
+        reasons.append("2 distinct steps")
+    else:
+        score -= 0.3
+        reasons.append("one-shot (no multi-step workflow)")
+    if signals["answer"]:
+        score += 0.15
+        reasons.append("has a final answer")
+    if signals["repeat"] > 1:
+        score -= 0.1
+        reasons.append(f"repeat {signals['repeat']} of the task")
+    if signals["records"] > 1:
+        reasons.append(f"run spans {signals['records']} records")
+    return {
+        "score": round(min(1.0, max(0.0, score)), 3),
+        "reasons": reasons,
+        "outcome": outcome,
+        "steps": len(steps),
+        "answer": signals["answer"],
+        "fingerprint": signals["fingerprint"],
+        "repeat": signals["repeat"],
+    }
+
+
+def score_record(value: Any) -> Dict[str, Any]:
+    """
+    Score one parsed record on its own.
+
+    Returns:
+        {"score": float in [0, 1], "reasons": list[str], "outcome": "success" | "failure" |
+         "unknown", "steps": int, "answer": bool, "fingerprint": str | None, "repeat": int}
+    """
+    return _score(_signals(value))
+
+
+def triage_log(
+    path: str,
+    seen: Optional[Set[str]] = None,
+    min_score: Optional[float] = None,
+    max_records: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Score a log and decide whether to summarize it.
+
+    The log scores as its best run that is not a duplicate. A record holding a whole run
+    (a step list and a task) is scored on its own; other records (one message or step per
+    line) are collected per task_id / group_id, or into one run for the log, and scored
+    together. Runs whose task fingerprint is in seen are duplicates. When the decision is "process", the
+    fingerprints of the log's qualifying records are added to seen, so later logs in a
+    batch repeating those tasks are skipped.
+
+    Args:
+        path: Log file.
+        seen: Fingerprints of tasks already selected (updated in place); None = no dedupe.
+        min_score: Threshold for "process"; default TRIAGE_CONFIG["min_score"].
+        max_records: Records to inspect; default TRIAGE_CONFIG["max_records"].
+
+    Returns:
+        {"path": str, "score": float, "decision": "process" | "skip", "reasons": list[str],
+         "records": int, "qualifying": int, "duplicates": int}
+    """
+    min_score = TRIAGE_CONFIG["min_score"] if min_score is None else min_score
+    max_records = max_records or TRIAGE_CONFIG["max_records"]
+    best: Optional[Dict[str, Any]] = None
+    qualifying: List[str] = []
+    records = duplicates = passing = 0
+    # Records without their own step list and task (e.g. one chat message per line) are
+    # collected into a run: per task_id / group_id, else one run for the log.
+    runs: Dict[Optional[str], Dict[str, Any]] = {}
+    current: Optional[str] = None
+
+    def consider(scored: Dict[str, Any]) -> None:
+        nonlocal best, duplicates, passing
+        fp = scored["fingerprint"]
+        if seen is not None and fp is not None and fp in seen:
+            duplicates += 1
+            return
+        if scored["score"] >= min_score:
+            passing += 1
+            if fp is not None:
+                qualifying.append(fp)
+        if best is None or scored["score"] > best["score"]:
+            best = scored
+
+    try:
+        for i, record in enumerate(iter_json_records(path)):
+            if i >= max_records:
+                break
+            records += 1
+            signals = _signals(record.value)
+            if signals["has_steps"] and signals["fingerprint"] is not None:
+                consider(_score(signals))
+                continue
+            current = _task_id(record.value) or current
+            if current in runs:
+                _merge_signals(runs[current], signals)
+            else:
+                runs[current] = signals
+    except OSError as e:
+        return {
+            "path": path, "score": 0.0, "decision": "skip", "reasons": [f"unreadable: {e}"],
+            "records": records, "qualifying": 0, "duplicates": duplicates,
+        }
+    for signals in runs.values():
+        consider(_score(signals))
+
+    score = best["score"] if best is not None else 0.0
+    if records == 0:
+        reasons = ["no JSON records"]
+    elif best is None:
+        reasons = [f"all {duplicates} task(s) already selected in this batch"]
+    else:
+        reasons = list(best["reasons"])
+        if records > 1:
+            reasons.append(f"{passing} run(s) of {records} record(s) qualify")
+        if duplicates:
+            reasons.append(f"{duplicates} duplicate task(s)")
+    decision = "process" if best is not None and score >= min_score else "skip"
+    if decision == "process" and seen is not None:
+        seen.update(qualifying)
+    return {
+        "path": path,
+        "score": score,
+        "decision": decision,
+        "reasons": reasons,
+        "records": records,
+        "qualifying": passing,
+        "duplicates": duplicates,
+    }